@@ -0,0 +1,168 @@
+"""Headless scoring service over the master score frame.
+
+Loads the master frame once at startup (the same `load_score_data` the
+Streamlit app uses) and answers scoring, thresholding and top-K queries with
+the shared functions in `scoring`.
+
+    uvicorn api:app --workers 4 --port 8000
+
+Endpoints
+    GET  /health                                   -> {"counties": n}
+    GET  /scores?fips=01001,01003&columns=a,b      -> score rows (all counties if no fips)
+    POST /threshold {"thresholds": {...}, "columns": [...]}
+                                                   -> rows passing every threshold
+    POST /topk {"thresholds": {...}, "weights": {...} | "priority": col, "k": 25}
+                                                   -> k best rows with "score" and "rank"
+
+Responses are column-oriented JSON ({column: [values]}), gzip-compressed
+when the client accepts it. Send `Accept: application/vnd.apache.arrow.stream`
+to get an Arrow IPC stream instead.
+"""
+
+from contextlib import asynccontextmanager
+
+import numpy as np
+import orjson
+import pyarrow as pa
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+from config import SCORE_DATA_PATHS
+from data_processing import SCORE_COLUMNS, load_score_data
+from scoring import threshold_mask, top_k, validate_score_values, weighted_score
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MAX_K = 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _columns(requested):
+    if requested is not None and not (isinstance(requested, list) and all(isinstance(c, str) for c in requested)):
+        raise BadRequest("columns must be a list of column names")
+    cols = requested or SCORE_COLUMNS
+    unknown = [c for c in cols if c not in SCORE_COLUMNS]
+    if unknown:
+        raise BadRequest(f"unknown score columns: {unknown}")
+    return list(cols)
+
+
+def _respond(request, df):
+    """Serialize a result frame as Arrow IPC or column-oriented JSON."""
+    if ARROW_STREAM in request.headers.get("accept", ""):
+        # Plain strings: a categorical would ship the full national dictionary
+        table = pa.Table.from_pandas(df.astype({"fips": str}), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
+    payload = {
+        col: df[col].astype(str).tolist() if col == "fips" else df[col].to_numpy()
+        for col in df.columns
+    }
+    body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return Response(body, media_type="application/json")
+
+
+def _error(message, status=400):
+    return Response(orjson.dumps({"error": message}), status_code=status, media_type="application/json")
+
+
+async def _json_body(request):
+    try:
+        body = orjson.loads(await request.body() or b"{}")
+    except orjson.JSONDecodeError as e:
+        raise BadRequest(f"invalid JSON body: {e}")
+    if not isinstance(body, dict):
+        raise BadRequest("JSON body must be an object")
+    return body
+
+
+def _numbers(body, field):
+    """body[field] as {score column: float}; every value must be a finite number."""
+    try:
+        return validate_score_values(body.get(field) or {}, SCORE_COLUMNS, field)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+def _handler(fn):
+    async def wrapped(request):
+        try:
+            return await fn(request)
+        except BadRequest as e:
+            return _error(str(e))
+    return wrapped
+
+
+async def health(request):
+    body = orjson.dumps({"counties": len(request.app.state.df_master)})
+    return Response(body, media_type="application/json")
+
+
+async def scores(request):
+    df = request.app.state.df_master
+    cols = _columns([c for c in request.query_params.get("columns", "").split(",") if c])
+    fips = [f.zfill(5) for f in request.query_params.get("fips", "").split(",") if f]
+    if fips:
+        df = df[df["fips"].isin(fips)]
+    return _respond(request, df[["fips", *cols]])
+
+
+async def threshold(request):
+    df = request.app.state.df_master
+    body = await _json_body(request)
+    thresholds = _numbers(body, "thresholds")
+    cols = _columns(body.get("columns"))
+    mask = threshold_mask(df, thresholds)
+    return _respond(request, df.loc[mask, ["fips", *cols]])
+
+
+async def topk(request):
+    df = request.app.state.df_master
+    body = await _json_body(request)
+    thresholds = _numbers(body, "thresholds")
+    weights = _numbers(body, "weights")
+    if not weights:
+        priority = body.get("priority", "power_score")
+        if not isinstance(priority, str):
+            raise BadRequest("priority must be a column name")
+        weights = {_columns([priority])[0]: 1.0}
+    k = body.get("k", 25)
+    if isinstance(k, bool) or not isinstance(k, int) or not 0 < k <= MAX_K:
+        raise BadRequest(f"k must be in 1..{MAX_K}")
+    try:
+        score = weighted_score(df, weights)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+    rows = top_k(score, k, threshold_mask(df, thresholds))
+    result = df.iloc[rows][["fips", *_columns(body.get("columns"))]].assign(
+        score=score[rows],
+        rank=np.arange(1, len(rows) + 1, dtype="int32"),
+    )
+    return _respond(request, result)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.df_master = load_score_data(**SCORE_DATA_PATHS)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/health", _handler(health)),
+        Route("/scores", _handler(scores)),
+        Route("/threshold", _handler(threshold), methods=["POST"]),
+        Route("/topk", _handler(topk), methods=["POST"]),
+    ],
+    middleware=[Middleware(GZipMiddleware, minimum_size=1024)],
+    lifespan=lifespan,
+)
@@ -0,0 +1,161 @@
+"""Batch evaluation of site-requirement profiles.
+
+Streams a JSONL file of requirement profiles, scores every county for each
+profile and writes the ranked results to Parquet:
+
+    python batch_requirements.py profiles.jsonl results.parquet --workers 8 --k 100
+
+One profile per line, e.g.
+
+    {"profile_id": "acme-01", "region": "Midwest", "power_cap": 40,
+     "redundancy": "2N (Full Redundancy)", "constraints": {"water": "Low Water Usage"},
+     "thresholds": {"power_score": 60}, "weights": {"power_score": 3, "fiber_score": 1}}
+
+Requirement fields (region, power_cap, redundancy, cooling_method,
+constraints, *_importance, ...) are compiled by
+requirements_compiler.compile_requirements; explicit "thresholds" override
+the compiled ones per column and explicit "weights" replace the compiled weights.
+
+Profiles are grouped into chunks; each chunk is thresholded and scored in one
+vectorized pass (scoring.batch_scores) inside a worker process that loaded
+the master frame once. Invalid lines (bad JSON, unknown or non-numeric
+threshold/weight columns, weights summing to 0) are skipped and reported by
+line number; the remaining profiles are still written. The layer and node-map caches are built in the parent
+before the pool starts, so workers only read them. Output columns:
+profile_id, rank, fips, score.
+"""
+
+import argparse
+import itertools
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import SCORE_DATA_PATHS
+from data_processing import SCORE_COLUMNS, load_score_data
+from requirements_compiler import compile_requirements
+from scoring import batch_scores, region_mask, top_k, validate_score_values
+
+RESULT_SCHEMA = pa.schema([
+    ("profile_id", pa.string()),
+    ("rank", pa.int32()),
+    ("fips", pa.string()),
+    ("score", pa.float32()),
+])
+
+_df_master = None
+
+
+def _init_worker():
+    global _df_master
+    _df_master = load_score_data(**SCORE_DATA_PATHS)
+
+
+def profile_query(profile):
+    """
+    Return (thresholds, weights, state_fips) for one requirement profile.
+    Raises ValueError (or KeyError / TypeError from malformed requirement
+    fields) if the profile cannot be scored.
+    """
+    constraints = {f"{k}_constraints": v for k, v in profile.get("constraints", {}).items()}
+    query = compile_requirements({**profile, **constraints})
+    thresholds = {
+        **query["thresholds"],
+        **validate_score_values(profile.get("thresholds") or {}, SCORE_COLUMNS, "thresholds"),
+    }
+    weights = validate_score_values(profile.get("weights") or {}, SCORE_COLUMNS, "weights") or query["weights"]
+    if sum(weights.values()) <= 0:
+        raise ValueError("weights must sum to a positive value")
+    return thresholds, weights, query["states"]
+
+
+def evaluate_chunk(profiles, k):
+    """Score one chunk of profiles against the worker's master frame; returns an Arrow table."""
+    df = _df_master
+    queries = [profile_query(p) for p in profiles]
+    mask, scores = batch_scores(df, [q[0] for q in queries], [q[1] for q in queries])
+    fips = df["fips"].astype(str).to_numpy()
+
+    ids, ranks, out_fips, out_scores = [], [], [], []
+    for p, (profile, (_, _, states)) in enumerate(zip(profiles, queries)):
+        rows = top_k(scores[p], k, mask[p] & region_mask(df, states))
+        ids.append(np.full(len(rows), str(profile["profile_id"]), dtype=object))
+        ranks.append(np.arange(1, len(rows) + 1, dtype="int32"))
+        out_fips.append(fips[rows])
+        out_scores.append(scores[p, rows])
+
+    return pa.Table.from_arrays(
+        [pa.array(np.concatenate(a)) for a in [ids, ranks, out_fips, out_scores]],
+        schema=RESULT_SCHEMA,
+    )
+
+
+def read_profiles(path, invalid=None):
+    """
+    Yield valid profiles from a JSONL file, assigning line-number ids where missing.
+
+    Lines that do not parse or fail profile_query are skipped; when `invalid`
+    is a list, (line number, reason) is appended to it for each.
+    """
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                profile = json.loads(line)
+                if not isinstance(profile, dict):
+                    raise ValueError("profile must be a JSON object")
+                profile.setdefault("profile_id", str(lineno))
+                profile_query(profile)
+            except (ValueError, KeyError, TypeError) as e:
+                if invalid is not None:
+                    invalid.append((lineno, str(e)))
+                continue
+            yield profile
+
+
+def run_batch(profiles_path, output_path, workers=None, chunk_size=64, k=100):
+    """
+    Evaluate every profile in `profiles_path` and write ranked results to `output_path`.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    regardless of the input size. Returns (profiles written, invalid), where
+    invalid lists the (line number, reason) of every skipped line.
+    """
+    invalid = []
+    profiles = read_profiles(profiles_path, invalid)
+    chunks = iter(lambda: list(itertools.islice(profiles, chunk_size)), [])
+    n_profiles = 0
+    max_in_flight = 2 * (workers or os.cpu_count())
+    # Warm data/store once here; on a cold store every worker would otherwise build the same caches at once
+    load_score_data(**SCORE_DATA_PATHS)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool, \
+            pq.ParquetWriter(output_path, RESULT_SCHEMA, compression="zstd") as writer:
+        in_flight = deque()
+        for chunk in itertools.chain(chunks, [None]):
+            if chunk is not None:
+                in_flight.append(pool.submit(evaluate_chunk, chunk, k))
+                n_profiles += len(chunk)
+            while in_flight and (chunk is None or len(in_flight) >= max_in_flight):
+                writer.write_table(in_flight.popleft().result())
+    return n_profiles, invalid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("profiles", help="JSONL file of requirement profiles")
+    parser.add_argument("output", help="Parquet file for ranked results")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--k", type=int, default=100, help="counties kept per profile")
+    args = parser.parse_args()
+    n, invalid = run_batch(args.profiles, args.output, args.workers, args.chunk_size, args.k)
+    for lineno, reason in invalid:
+        print(f"line {lineno}: skipped ({reason})")
+    print(f"Scored {n} profiles -> {args.output}" + (f", skipped {len(invalid)}" if invalid else ""))
@@ -1,5 +1,8 @@
 # config.py
 
+import json
+import os
+
 CORE_MARKET_FIPS_DICT = {
     "Northern Virginia": ["51107", "51059", "51153", "51600", "51610", "51683", "51685"],
     "Southern Ohio (Columbus)": ["39049", "39041", "39117", "39089", "39129"],
@@ -12,10 +15,200 @@ CORE_MARKET_FIPS_DICT = {
     "Nashville": ["47037", "47147", "47149", "47159", "47187"]
 }
 
+# State FIPS covered by each "Preferred Region" answer in render_region_site
+REGION_STATE_FIPS = {
+    "None": [],
+    "West Coast": ["06", "41", "53"],
+    "Northeast": ["09", "23", "25", "33", "34", "36", "42", "44", "50"],
+    "Southwest": ["04", "32", "35", "40", "48"],
+    "Midwest": ["17", "18", "19", "20", "26", "27", "29", "31", "38", "39", "46", "55"],
+    "Southeast": ["01", "05", "10", "11", "12", "13", "21", "22", "24", "28", "37", "45", "47", "51", "54"],
+}
+
+# State FIPS of the four US Census Bureau regions
+CENSUS_REGION_STATE_FIPS = {
+    "Northeast": ["09", "23", "25", "33", "34", "36", "42", "44", "50"],
+    "Midwest": ["17", "18", "19", "20", "26", "27", "29", "31", "38", "39", "46", "55"],
+    "South": ["01", "05", "10", "11", "12", "13", "21", "22", "24", "28", "37", "40", "45", "47", "48", "51", "54"],
+    "West": ["02", "04", "06", "08", "15", "16", "30", "32", "35", "41", "49", "53", "56"],
+}
+
 PAGE_SETTINGS = {
     "page_title": "Data Center Site Selection Tool",
     "page_icon": "🏢",
     "layout": "wide"
 }
 
-ALT_THEME = "dark" 
\ No newline at end of file
+ALT_THEME = "dark"
+
+# Inputs to data_processing.load_score_data
+SCORE_DATA_PATHS = {
+    "grid_path": "data/doe_grid_constraints.csv",
+    "future_path": "data/future_scalability.parquet",
+    "water_path": "data/county_water_availability_full.csv",
+    "fiber_path": "data/bdc_us_mobile_broadband_summary_by_geography_D24_27may2025.csv",
+    "county_geojson_path": "data/us_county_fips.json",
+    "lmp_path": "data/gridstatus_lmp_samples.parquet",
+    "population_path": "data/us-population-2010-2019-reshaped.csv",
+    "county_scores_path": "data/county_scores.csv",
+}
+
+# Block-group geometry and scores for the core-market maps (GeoJSON, or a
+# GeoParquet file / directory of parts)
+BLOCKGROUP_PATH = "data/core_markets_blockgroup.geojson"
+
+# Materialized data layers (see data_processing.DATA_LAYERS)
+LAYER_STORE_DIR = "data/store/layers"
+
+# MBTiles vector tiles (see vector_tiles.py) and the local server that hosts them.
+# TILE_SERVER is the bind address; TILE_PUBLIC_URL is the base the browser
+# fetches tiles from, e.g. "https://maps.example.com/tiles" behind a proxy
+# that forwards to the bind address when the app is not viewed on localhost
+TILE_STORE_DIR = "data/store/tiles"
+TILE_SERVER = {"host": "127.0.0.1", "port": 8765}
+TILE_PUBLIC_URL = "http://127.0.0.1:8765"
+
+# MapLibre GL JS for the tile map, vendored into MAPLIBRE_DIR by
+# `python vector_tiles.py vendor` and served by the tile server under /static/
+MAPLIBRE_VERSION = "4.7.1"
+MAPLIBRE_DIR = "data/store/vendor/maplibre-gl"
+
+# Hex-grid edge lengths (km), coarse to fine, and precomputed cell mappings (see hexgrid.py)
+HEX_LEVELS_KM = [100, 50, 25, 12.5]
+HEX_STORE_DIR = "data/store/hex"
+
+# Local infrastructure files behind the proximity metrics (see distance_rasters.py);
+# keys are the native-unit county columns they fill
+INFRA_PATHS = {
+    "power_hv_dist": "data/infrastructure/transmission_lines.geojson",
+    "power_gas_dist": "data/infrastructure/gas_pipelines.geojson",
+    "fiber_fiber_dist": "data/infrastructure/fiber_routes.geojson",
+    "fiber_subsea": "data/infrastructure/subsea_landings.geojson",
+}
+DISTANCE_CELL_KM = 2
+RASTER_STORE_DIR = "data/store/rasters"
+
+# Saved map scenarios, one Parquet file per team (see scenarios.py)
+SCENARIO_STORE_DIR = "data/store/scenarios"
+SCENARIO_TEAM = "default"
+
+# Bulk exports (see export.py); tables are written in slices of EXPORT_CHUNK_ROWS
+EXPORT_DIR = "data/exports"
+EXPORT_CHUNK_ROWS = 100_000
+
+# Opt-in rerun profiling (see profiling.py): set the env var or open the app with ?profile=1
+PROFILE = {
+    "env_var": "DRIFTNET_PROFILE",
+    "dir": "data/store/profiles",
+    "interval_s": 0.001,
+    "trace_frames": 1,
+    "top_functions": 200,
+    "top_allocations": 25,
+}
+
+# Output of generate_national.py (synthetic national-scale inputs for load tests).
+# Set DRIFTNET_DATA_DIR to such a directory (e.g. data/synthetic) to run the app,
+# API, batch and export jobs on it: its score_data_paths.json replaces
+# SCORE_DATA_PATHS and its blockgroup_path replaces BLOCKGROUP_PATH
+SYNTHETIC_DIR = "data/synthetic"
+DATA_DIR_ENV = "DRIFTNET_DATA_DIR"
+if os.environ.get(DATA_DIR_ENV):
+    with open(os.path.join(os.environ[DATA_DIR_ENV], "score_data_paths.json")) as _f:
+        SCORE_DATA_PATHS = json.load(_f)
+    BLOCKGROUP_PATH = SCORE_DATA_PATHS.pop("blockgroup_path", BLOCKGROUP_PATH)
+
+# Derived LMP products (representative days, rollups)
+LMP_STORE_DIR = "data/store/lmp"
+# Sites farther than this from every LMP node get no node price (see lmp_mapping.py)
+LMP_NODE_MAX_KM = 1_000
+
+# Incremental LMP ingestion (see lmp_ingest.py): interval files are dropped in
+# LMP_DROP_DIR/{iso}/ and appended as partitions under LMP_LIVE_DIR
+LMP_DROP_DIR = "data/lmp_drop"
+LMP_LIVE_DIR = "data/store/lmp/live"
+LMP_ROLLUP_DIR = "data/store/lmp/rollups"
+LMP_INGEST = {"poll_s": 10, "compact_every": 30, "compact_min_files": 12, "row_group_size": 100_000}
+
+# Native-unit site metrics shown in the constraint panels (constraint_utils)
+# and stored per county as "{category}_{key}" columns (data_processing).
+# For number inputs:  supply min / max / default and optionally "inverse=True"
+# For categorical inputs: supply a "select" mapping of {label: score}
+# Optional "units" (shown as help-text).  Optional custom "score" lambda(value)->0-100.
+METRICS = {
+    "power": [
+        {"key": "cost",       "label": "Cost ($/MWh)",                         "min": 20,  "max": 200,  "default": 70,  "inverse": True,  "units": "$/MWh"},
+        {"key": "queue",      "label": "Interconnection Queue (months)",      "min": 0,   "max": 60,   "default": 24,  "inverse": True,  "units": "months"},
+        {"key": "territory",  "label": "Service-territory size (mi²)",        "min": 0,   "max": 50_000, "default": 5_000, "inverse": False, "units": "mi²"},
+        {"key": "cluster",    "label": "Ongoing Cluster Studies (MW)",       "min": 0,   "max": 10_000, "default": 500, "inverse": False, "units": "MW"},
+        {"key": "pipeline",   "label": "New Power Projects (MW)",            "min": 0,   "max": 10_000, "default": 1_000, "inverse": False, "units": "MW"},
+        {"key": "reg_change", "label": "Regulatory Climate",                 "select": {"Supportive": 100, "Neutral": 50, "Restrictive": 0}},
+        {"key": "lobby",      "label": "Lobbying Effort ($M/y)",             "min": 0,   "max": 50,   "default": 5,   "inverse": False, "units": "Million $"},
+        {"key": "hv_dist",    "label": "HV-Line Proximity (km)",             "min": 0,   "max": 100, "default": 25,  "inverse": True,  "units": "km"},
+        {"key": "gas_dist",   "label": "Gas-Pipe Proximity (km)",            "min": 0,   "max": 200, "default": 50,  "inverse": True,  "units": "km"},
+    ],
+    "land": [
+        {"key": "parcel", "label": "Parcel size (acres)",              "min": 10,  "max": 5_000, "default": 100, "inverse": False, "units": "acres"},
+        {"key": "slope",  "label": "Average slope (%)",               "min": 0,   "max": 15,    "default": 3,   "inverse": True,  "units": "%"},
+        {"key": "zoning", "label": "Zoning & land-use",               "select": {"Industrial": 100, "Commercial": 70, "Mixed Use": 40, "Residential": 0}},
+    ],
+    "climate": [
+        {"key": "temp", "label": "Avg. temperature (°F)", "min": 32, "max": 90, "default": 65, "score": lambda v: 100 - abs(v - 60) * 3, "units": "°F"},
+        {"key": "flood", "label": "Flood risk",           "select": {"Very Low": 100, "Low": 80, "Medium": 60, "High": 30, "Very High": 0}},
+        {"key": "wildfire", "label": "Wildfire risk",     "select": {"Very Low": 100, "Low": 80, "Medium": 60, "High": 30, "Very High": 0}},
+        {"key": "water", "label": "Water availability (kgal/day)", "min": 0, "max": 10_000, "default": 2_000, "inverse": False, "units": "kgal/day"},
+    ],
+    "fiber": [
+        {"key": "fiber_dist", "label": "Fiber backbone distance (km)", "min": 0, "max": 25,  "default": 5,   "inverse": True,  "units": "km"},
+        {"key": "subsea",     "label": "Sub-sea cable distance (km)",  "min": 0, "max": 500, "default": 200, "inverse": True,  "units": "km"},
+    ],
+    "future": [
+        {"key": "corridor", "label": "Growth-corridor score",               "min": 0,  "max": 100, "default": 50, "inverse": False},
+        {"key": "workload", "label": "Workload/design-trend alignment",     "min": 0,  "max": 100, "default": 50, "inverse": False},
+        {"key": "demand",   "label": "Energy-demand growth (%/y)",         "min": 0,  "max": 20,  "default": 5,  "inverse": False, "units": "%"},
+    ],
+}
+
+# Ingestion rules per source (see ingestion.ingest_source): valid value ranges,
+# what to do with out-of-range values, and how duplicate FIPS rows collapse.
+SOURCE_POLICIES = {
+    "water": {"ranges": {"water_score": (0, 100)}, "out_of_range": "clip", "dedup": "mean"},
+    "fiber": {"ranges": {"fiber_score": (0, 100)}, "out_of_range": "clip", "dedup": "max"},
+    "grid": {
+        "ranges": {"transmission_cap": (0, 100), "interconnection_timeline": (0, 100), "hv_line_proximity": (0, 100)},
+        "out_of_range": "clip",
+        "dedup": "mean",
+    },
+    "future": {
+        "ranges": {"power_demand_growth": (0, 100), "zoning_evolution": (0, 100), "climate_resilience": (0, 100)},
+        "out_of_range": "clip",
+        "dedup": "mean",
+    },
+    "lmp_price": {"dedup": "error"},
+    "population_trend": {"ranges": {"population_trend_score": (0, 100)}, "dedup": "error"},
+    "proximity": {
+        "ranges": {
+            f"{cat}_{m['key']}": (m["min"], m["max"])
+            for cat, specs in METRICS.items() for m in specs
+            if f"{cat}_{m['key']}" in INFRA_PATHS
+        },
+        "out_of_range": "clip",
+        "dedup": "error",
+    },
+    "site_metrics": {
+        "ranges": {
+            f"{cat}_{m['key']}": (0, 100) if "select" in m else (m["min"], m["max"])
+            for cat, specs in METRICS.items() for m in specs
+        },
+        "dedup": "error",
+    },
+    "land": {"ranges": {"land_score": (0, 100)}, "dedup": "error"},
+    "regulatory": {
+        "ranges": {c: (0, 100) for c in ["permit_score", "incentive_score", "env_compliance_score", "support_score", "security_score"]},
+        "dedup": "error",
+    },
+    "county_scores": {
+        "ranges": {c: (0, 100) for c in ["water_score", "land_score", "zoning_score", "fiber_score", "power_score"]},
+        "out_of_range": "nan",
+        "dedup": {"fiber_score": "median"},
+    },
+}
@@ -1,5 +1,8 @@
 import streamlit as st
 import numpy as np
+from functools import lru_cache
+
+from config import METRICS
 
 """Generic constraint‐input utilities
 This module exposes the same public functions that streamlit_app.py already imports:
@@ -11,59 +14,34 @@ This module exposes the same public functions that streamlit_app.py already impo
 
 Each function renders a block of inputs in native units (number boxes or dropdowns),
 translates every input into a 0–100 score, and returns
-    {"scores": {metric_key: score, …}, "overall_score": <float>}
-The mapping from native value → score is defined in the METRICS dictionary below.
+    {"scores": {metric_key: score, …}, "overall_score": <float>, "filters": {…}}
+When the panel's "Filter counties" box is ticked, "filters" maps each metric's
+county column ("{category}_{key}") to (lo, hi) native-unit bounds for
+scoring.compile_range_filters; otherwise it is empty.
+The mapping from native value → score is defined in config.METRICS.
 Adjust min/max, default, inverse, or supply a custom lambda in "score" to tune behaviour.
+
+Each category panel is a Streamlit fragment: changing one of its inputs reruns
+only that panel, and scores are memoized by widget value. The latest result of
+every panel is kept in st.session_state[RESULTS_KEY][category], which is what
+the public wrappers return.
 """
 
 # ─────────────────────────── Metric specification ────────────────────────────
-# For number inputs:  supply min / max / default and optionally "inverse=True"
-# For categorical inputs: supply a "select" mapping of {label: score}
-# Optional "units" (shown as help-text).  Optional custom "score" lambda(value)->0-100.
-METRICS = {
-    "power": [
-        {"key": "cost",       "label": "Cost ($/MWh)",                         "min": 20,  "max": 200,  "default": 70,  "inverse": True,  "units": "$/MWh"},
-        {"key": "queue",      "label": "Interconnection Queue (months)",      "min": 0,   "max": 60,   "default": 24,  "inverse": True,  "units": "months"},
-        {"key": "territory",  "label": "Service-territory size (mi²)",        "min": 0,   "max": 50_000, "default": 5_000, "inverse": False, "units": "mi²"},
-        {"key": "cluster",    "label": "Ongoing Cluster Studies (MW)",       "min": 0,   "max": 10_000, "default": 500, "inverse": False, "units": "MW"},
-        {"key": "pipeline",   "label": "New Power Projects (MW)",            "min": 0,   "max": 10_000, "default": 1_000, "inverse": False, "units": "MW"},
-        {"key": "reg_change", "label": "Regulatory Climate",                 "select": {"Supportive": 100, "Neutral": 50, "Restrictive": 0}},
-        {"key": "lobby",      "label": "Lobbying Effort ($M/y)",             "min": 0,   "max": 50,   "default": 5,   "inverse": False, "units": "Million $"},
-        {"key": "hv_dist",    "label": "HV-Line Proximity (km)",             "min": 0,   "max": 100, "default": 25,  "inverse": True,  "units": "km"},
-        {"key": "gas_dist",   "label": "Gas-Pipe Proximity (km)",            "min": 0,   "max": 200, "default": 50,  "inverse": True,  "units": "km"},
-    ],
-    "land": [
-        {"key": "parcel", "label": "Parcel size (acres)",              "min": 10,  "max": 5_000, "default": 100, "inverse": False, "units": "acres"},
-        {"key": "slope",  "label": "Average slope (%)",               "min": 0,   "max": 15,    "default": 3,   "inverse": True,  "units": "%"},
-        {"key": "zoning", "label": "Zoning & land-use",               "select": {"Industrial": 100, "Commercial": 70, "Mixed Use": 40, "Residential": 0}},
-    ],
-    "climate": [
-        {"key": "temp", "label": "Avg. temperature (°F)", "min": 32, "max": 90, "default": 65, "score": lambda v: max(0, 100 - abs(v - 60) * 3), "units": "°F"},
-        {"key": "flood", "label": "Flood risk",           "select": {"Very Low": 100, "Low": 80, "Medium": 60, "High": 30, "Very High": 0}},
-        {"key": "wildfire", "label": "Wildfire risk",     "select": {"Very Low": 100, "Low": 80, "Medium": 60, "High": 30, "Very High": 0}},
-        {"key": "water", "label": "Water availability (kgal/day)", "min": 0, "max": 10_000, "default": 2_000, "inverse": False, "units": "kgal/day"},
-    ],
-    "fiber": [
-        {"key": "fiber_dist", "label": "Fiber backbone distance (km)", "min": 0, "max": 25,  "default": 5,   "inverse": True,  "units": "km"},
-        {"key": "subsea",     "label": "Sub-sea cable distance (km)",  "min": 0, "max": 500, "default": 200, "inverse": True,  "units": "km"},
-    ],
-    "future": [
-        {"key": "corridor", "label": "Growth-corridor score",               "min": 0,  "max": 100, "default": 50, "inverse": False},
-        {"key": "workload", "label": "Workload/design-trend alignment",     "min": 0,  "max": 100, "default": 50, "inverse": False},
-        {"key": "demand",   "label": "Energy-demand growth (%/y)",         "min": 0,  "max": 20,  "default": 5,  "inverse": False, "units": "%"},
-    ],
-}
+# METRICS lives in config.py so data layers can build one county column per metric.
 
-# ─────────────────────────── Helper rendering ───────────────────────────────
+# Widget key → metric spec, for memoized scoring by (widget, value)
+_SPECS_BY_WIDGET = {f"{cat}_{m['key']}": m for cat, specs in METRICS.items() for m in specs}
 
-def _render_table(rows):
-    """Render a markdown table for quick reference."""
-    header = "| Metric | Granularity | Units |\n|---|---|---|\n"
-    st.markdown(header + "\n".join(f"| {m} | {g} | {u} |" for m, g, u in rows))
+# Session-state slot holding {category: last panel result}
+RESULTS_KEY = "constraint_results"
 
+# ─────────────────────────── Helper rendering ───────────────────────────────
 
 def _value_to_score(val, spec):
     """Convert raw value to 0-100 score using spec rules."""
+    if "select" in spec:
+        return val
     if "score" in spec:
         return np.clip(spec["score"](val), 0, 100)
     min_v, max_v = spec["min"], spec["max"]
@@ -72,7 +50,31 @@ def _value_to_score(val, spec):
     return np.interp(val, [min_v, max_v], [0, 100])
 
 
+@lru_cache(maxsize=4096)
+def _widget_score(widget_id, val):
+    """Memoized _value_to_score for the metric behind `widget_id`."""
+    return float(_value_to_score(val, _SPECS_BY_WIDGET[widget_id]))
+
+
+@lru_cache(maxsize=4096)
+def _widget_bounds(widget_id, val):
+    """
+    (lo, hi) native-unit bounds of county values at least as good as `val`.
+    Custom-score metrics are bounded by the span of a fine grid whose score
+    reaches the input's score (exact for single-peaked score functions).
+    """
+    spec = _SPECS_BY_WIDGET[widget_id]
+    if "score" in spec:
+        grid = np.linspace(spec["min"], spec["max"], 1001)
+        ok = grid[_value_to_score(grid, spec) >= _value_to_score(val, spec) - 1e-6]
+        return float(ok.min()), float(ok.max())
+    if spec.get("inverse"):
+        return None, float(val)
+    return float(val), None
+
+
 def _unit_input(spec, widget_id):
+    """Render one metric's input; returns its native value (select: the option's score level)."""
     if "select" in spec:
         choice = st.selectbox(spec["label"], options=list(spec["select"].keys()), key=widget_id)
         return spec["select"][choice]
@@ -88,56 +90,89 @@ def _unit_input(spec, widget_id):
         help=spec.get("units", ""),
         key=widget_id
     )
-    return _value_to_score(val, spec)
+    return val
 
 
 def _render_category(cat_key: str, title: str):
     """Render inputs for a category and return scores."""
     st.markdown(f"### {title}")
 
-    # Build reference table rows
-    table_rows = []
+    values, scores = {}, {}
     for m in METRICS[cat_key]:
-        if "select" in m:
-            units = "/".join(m["select"].keys())
-            gran = "Categorical"
-        else:
-            units = m.get("units", "")
-            gran = ""
-        table_rows.append((m["label"], gran, units))
-    # Reference table removed from final UI
-
-    scores = {}
-    for m in METRICS[cat_key]:
-        scores[m["key"]] = _unit_input(m, f"{cat_key}_{m['key']}")
+        widget_id = f"{cat_key}_{m['key']}"
+        values[widget_id] = _unit_input(m, widget_id)
+        scores[m["key"]] = _widget_score(widget_id, values[widget_id])
 
     overall = float(np.mean(list(scores.values()))) if scores else 0
     st.success(f"Overall {title} Score: **{overall:.1f}/100**")
-    return {"scores": scores, "overall_score": overall}
+
+    filters = {}
+    if st.checkbox("Filter counties by these values", key=f"{cat_key}_filter",
+                   help="Keep only counties whose own values are at least as good as every input above"):
+        filters = {widget_id: _widget_bounds(widget_id, val) for widget_id, val in values.items()}
+    return {"scores": scores, "overall_score": overall, "filters": filters}
+
+def _store_result(cat_key, result):
+    st.session_state.setdefault(RESULTS_KEY, {})[cat_key] = result
+    return result
+
+
+def constraint_results():
+    """Latest {category: result} of every rendered panel."""
+    return st.session_state.get(RESULTS_KEY, {})
+
+
+@st.fragment
+def _category_fragment(cat_key: str, title: str):
+    previous = constraint_results().get(cat_key)
+    result = _store_result(cat_key, _render_category(cat_key, title))
+    # County filters feed the map, so changing them needs a full rerun
+    if previous is not None and previous.get("filters") != result["filters"]:
+        st.rerun(scope="app")
+
+
+@st.fragment
+def _regulatory_fragment():
+    rendered_before = "regulatory" in constraint_results()
+    previous = constraint_results().get("regulatory")
+    result = _store_result("regulatory", _render_regulatory())
+    # The weights re-score every county's regulations_score on the map
+    # (a result is None while the weights sum to 0, on either side)
+    if rendered_before and (previous or {}).get("weights") != (result or {}).get("weights"):
+        st.rerun(scope="app")
 
 # ─────────────────────────── Public wrappers ────────────────────────────────
 
 def render_power_constraints():
-    return _render_category("power", "Power Factors")
+    _category_fragment("power", "Power Factors")
+    return constraint_results().get("power")
 
 
 def render_land_constraints():
-    return _render_category("land", "Land & Site Characteristics")
+    _category_fragment("land", "Land & Site Characteristics")
+    return constraint_results().get("land")
 
 
 def render_climate_constraints():
-    return _render_category("climate", "Climate & Environmental Risk")
+    _category_fragment("climate", "Climate & Environmental Risk")
+    return constraint_results().get("climate")
 
 
 def render_fiber_constraints():
-    return _render_category("fiber", "Connectivity Infrastructure")
+    _category_fragment("fiber", "Connectivity Infrastructure")
+    return constraint_results().get("fiber")
 
 
 def render_future_constraints():
-    return _render_category("future", "Future Scalability & Demand")
+    _category_fragment("future", "Future Scalability & Demand")
+    return constraint_results().get("future")
 
 def render_regulatory_constraints():
     """Render regulatory and compliance constraints"""
+    _regulatory_fragment()
+    return constraint_results().get("regulatory")
+
+def _render_regulatory():
     st.subheader("Regulatory & Compliance Requirements")
     
     # Initialize scores dictionary
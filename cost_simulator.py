@@ -0,0 +1,138 @@
+"""Workload-flexibility-aware energy cost simulation over LMP time series.
+
+Given hourly prices for many series (LMP nodes or counties) and a data
+center load profile, shift each flexible share of the load into the cheapest
+hours of its window and return the annual energy cost per series.
+
+Flexible load is placed greedily, shortest window first: the timeline is cut
+into consecutive blocks of `window` hours, and in every block the class's
+energy is poured into the cheapest hours up to the remaining headroom under
+the facility's capacity (an argsort + cumulative-sum water fill). All series
+and blocks are filled at once, so a year of hourly prices for every county
+runs in seconds. Within one window class the fill is optimal for its block.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Window (hours) each Workload Flexibility answer may move its share of load
+FLEX_WINDOWS_H = {
+    "inflexible": 0,
+    "short_term": 4,
+    "medium_term": 12,
+    "long_term": 24,
+}
+
+# Normalized 24-hour utilization shapes per workload type (hour 0 = midnight)
+_HOURS = np.arange(24)
+WORKLOAD_SHAPES = {
+    "ai_ml": np.full(24, 1.0),
+    "databases": 0.85 + 0.15 * np.sin((_HOURS - 8) / 24 * 2 * np.pi),
+    "web_services": 0.7 + 0.3 * np.sin((_HOURS - 9) / 24 * 2 * np.pi),
+    "media_streaming": 0.6 + 0.4 * np.sin((_HOURS - 14) / 24 * 2 * np.pi),
+}
+
+
+def price_matrix(df_lmp, value_col="lmp"):
+    """
+    Pivot long LMP rows into an hourly (series, hours) matrix.
+
+    Returns
+    -------
+    tuple
+        (prices float32 array, location Index, hourly DatetimeIndex in UTC).
+        Gaps are forward/back-filled per location, then filled with the
+        hour's mean across locations.
+    """
+    wide = df_lmp.pivot_table(
+        index="interval_start_utc", columns="location", values=value_col, aggfunc="mean"
+    )
+    wide = wide.resample("h").mean().ffill().bfill()
+    wide = wide.T.fillna(wide.mean(axis=1)).T
+    return wide.to_numpy(dtype="float32").T, wide.columns, wide.index
+
+
+def node_coordinates(df_lmp, locations):
+    """Latitude/longitude of each LMP location, in the order of `locations`."""
+    coords = df_lmp.groupby("location")[["latitude", "longitude"]].first()
+    return coords.reindex(locations)
+
+
+def workload_load_profile(mix: dict, power_cap_mw, hours, utilization=0.7):
+    """
+    Hourly load (MW) for a workload mix on a facility of `power_cap_mw`.
+
+    mix: {"ai_ml": 30, "databases": 30, ...} percentages; hours: DatetimeIndex.
+    Average draw is `utilization * power_cap_mw`, never above the cap.
+    """
+    total = sum(mix.values()) or 1
+    shape = sum(WORKLOAD_SHAPES[k] * v / total for k, v in mix.items())
+    shape = shape / shape.mean()
+    load = utilization * power_cap_mw * shape[np.asarray(hours.hour)]
+    return np.minimum(load, power_cap_mw).astype("float32")
+
+
+def _water_fill(prices, headroom, energy, window):
+    """Place `energy` per block into the cheapest hours; returns the hourly allocation."""
+    S, T = prices.shape
+    pad = (-T) % window
+    P = np.pad(prices, ((0, 0), (0, pad)), constant_values=np.inf).reshape(S, -1, window)
+    H = np.pad(headroom, ((0, 0), (0, pad))).reshape(S, -1, window)
+    E = np.pad(energy, (0, pad)).reshape(-1, window).sum(axis=1)          # (blocks,)
+
+    order = np.argsort(P, axis=2, kind="stable")
+    H_sorted = np.take_along_axis(H, order, axis=2)
+    before = np.cumsum(H_sorted, axis=2) - H_sorted
+    alloc_sorted = np.clip(E[None, :, None] - before, 0, H_sorted)
+    alloc = np.empty_like(alloc_sorted)
+    np.put_along_axis(alloc, order, alloc_sorted, axis=2)
+    return alloc.reshape(S, -1)[:, :T]
+
+
+def simulate_flexible_cost(prices, load_mw, shares: dict, capacity_mw=None):
+    """
+    Annual energy cost per series with flexible load shifted to cheap hours.
+
+    Parameters
+    ----------
+    prices : ndarray
+        (series, hours) prices in $/MWh.
+    load_mw : ndarray or float
+        Baseline hourly load in MW (length `hours`) or a flat value.
+    shares : dict
+        {flex class in FLEX_WINDOWS_H: percent of load}; normalized to sum to 1.
+    capacity_mw : float, optional
+        Maximum hourly draw; defaults to (and is never below) the peak
+        baseline load, which guarantees every block's energy fits.
+
+    Returns
+    -------
+    DataFrame
+        One row per series: baseline_cost, shifted_cost, savings, savings_pct
+        ($/year, scaled from the price window to 8,760 hours).
+    """
+    prices = np.asarray(prices, dtype="float32")
+    S, T = prices.shape
+    load = np.broadcast_to(np.asarray(load_mw, dtype="float32"), (T,))
+    capacity = max(float(load.max()), capacity_mw or 0.0)
+    total_share = sum(shares.values()) or 1
+
+    placed = np.zeros((S, T), dtype="float32")
+    for cls, window in sorted(FLEX_WINDOWS_H.items(), key=lambda kv: kv[1]):
+        energy = load * shares.get(cls, 0) / total_share
+        if not energy.any():
+            continue
+        if window <= 1:
+            placed += energy
+        else:
+            placed += _water_fill(prices, np.maximum(capacity - placed, 0), energy, window)
+
+    annualize = 8760 / T
+    baseline = (prices @ load.astype("float64")) * annualize
+    shifted = (prices * placed).sum(axis=1, dtype="float64") * annualize
+    return pd.DataFrame({
+        "baseline_cost": baseline,
+        "shifted_cost": shifted,
+        "savings": baseline - shifted,
+        "savings_pct": np.where(baseline != 0, 100 * (baseline - shifted) / baseline, 0.0),
+    })
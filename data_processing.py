@@ -1,39 +1,410 @@
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import hashlib
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-def broadband_processing(df):
-    # Convert 'year' to string for better handling in Altair
-    df_county = df[df["geography_type"] == "County"]
-    df_county['fips'] = df_county['geography_id'].astype(str).str.zfill(5)
-    df_county['fiber_score'] = 100 * df_county['mobilebb_4g_area_st_pct'].fillna(0)
-    return df_county
+from config import INFRA_PATHS, LAYER_STORE_DIR, LMP_STORE_DIR, METRICS, SOURCE_POLICIES
+from ingestion import ingest_source
+from storage import write_parquet
+from scoring import weighted_score
+from cost_simulator import price_matrix, node_coordinates
+from lmp_mapping import load_node_mapping, mapping_matrix, site_price_stats
+from distance_rasters import site_distances
+from trends import read_state_population, region_trends
+
+# Schema of the master score frame. Scores are float32 with NaN marking a
+# county the source has no value for; `source_mask` records which sources
+# contributed to a row (one bit per source in SOURCE_MASK_BITS).
+SCORE_COLUMNS = [
+    "climate factors_score",
+    "land_score",
+    "regulations_score",
+    "fiber_score",
+    "power_score",
+    "future scalability_score",
+]
+
+# Native-unit site metrics (config.METRICS), one column per "{category}_{key}".
+# Select metrics hold the score level of the county's category label.
+NATIVE_METRIC_COLUMNS = {f"{cat}_{m['key']}": m for cat, specs in METRICS.items() for m in specs}
+
+# Per-county regulatory components (0–100), the same scores
+# constraint_utils.render_regulatory_constraints asks the user to weight;
+# regulations_score is their weighted mean.
+REGULATORY_COMPONENTS = [
+    "permit_score",
+    "incentive_score",
+    "env_compliance_score",
+    "support_score",
+    "security_score",
+]
+
+MASTER_SCHEMA = {
+    "fips": "category",
+    "fips_code": "int32",
+    "source_mask": "uint8",
+    **{col: "float32" for col in SCORE_COLUMNS},
+    "transmission_cap": "float32",
+    "interconnection_timeline": "float32",
+    "hv_line_proximity": "float32",
+    "power_demand_growth": "float32",
+    "zoning_evolution": "float32",
+    "climate_resilience": "float32",
+    "lmp_mean": "float32",
+    "lmp_std": "float32",
+    "lmp_p95": "float32",
+    "lmp_price_score": "float32",
+    "population_growth": "float32",
+    "population_cagr": "float32",
+    "population_volatility": "float32",
+    "population_trend_score": "float32",
+    **{col: "float32" for col in NATIVE_METRIC_COLUMNS},
+    **{col: "float32" for col in REGULATORY_COMPONENTS},
+}
+
+SOURCE_MASK_BITS = {
+    "water": 1,
+    "fiber": 2,
+    "grid": 4,
+    "future": 8,
+    "lmp": 16,
+    "proximity": 32,
+    "population": 64,
+    "county_scores": 128,
+}
+
+# Power-cost range ($/MWh) mapped to a 0–100 price score (cheaper is better);
+# matches the "cost" metric in constraint_utils.METRICS
+LMP_SCORE_RANGE = (20, 200)
+
+# State population CAGR mapped to a 0–100 trend score (shrinking to fast-growing)
+POPULATION_CAGR_SCORE_RANGE = (-0.01, 0.02)
+
+def fips_code(series):
+    """Parse a FIPS column (str or int, padded or not) into a numeric key, NaN if unparseable."""
+    return pd.to_numeric(series, errors="coerce")
+
+def fips_str(codes):
+    """Format int FIPS keys as a categorical of zero-padded 5-char strings."""
+    return pd.Categorical(pd.Series(codes).astype(str).str.zfill(5))
+
+def enforce_master_schema(df):
+    """Cast the master frame to MASTER_SCHEMA, keeping schema columns first."""
+    df = df.astype({c: t for c, t in MASTER_SCHEMA.items() if c in df.columns})
+    ordered = [c for c in MASTER_SCHEMA if c in df.columns]
+    return df[ordered + [c for c in df.columns if c not in MASTER_SCHEMA]]
+
+def read_broadband_counties(path, value_col="mobilebb_4g_area_st_pct"):
+    """
+    Read county rows of a BDC broadband summary CSV straight into the compact schema.
+
+    The CSV is scanned as a pyarrow dataset in record batches: only the
+    geography type, id and `value_col` columns are decoded, and non-county
+    rows are dropped during the scan, so memory stays proportional to the
+    county rows kept rather than the full national release.
+
+    Parameters
+    ----------
+    path : str
+        Path to the BDC summary-by-geography CSV.
+    value_col : str
+        Share-of-area column (0–1) to turn into `fiber_score`.
+
+    Returns
+    -------
+    DataFrame
+        Columns `fips_code` (numeric, NaN if unparseable) and float32 `fiber_score`.
+    """
+    csv_format = ds.CsvFileFormat(convert_options=pacsv.ConvertOptions(
+        column_types={"geography_type": pa.string(), "geography_id": pa.string(), value_col: pa.float64()},
+    ))
+    table = ds.dataset(path, format=csv_format).to_table(
+        columns=["geography_id", value_col],
+        filter=ds.field("geography_type") == "County",
+    )
+    return pd.DataFrame({
+        "fips_code": fips_code(table.column("geography_id").to_pandas()),
+        "fiber_score": pc.multiply(table.column(value_col), 100).to_numpy(zero_copy_only=False).astype("float32"),
+    })
 
 def water_processing(df):
-    # Convert 'year' to string for better handling in Altair
-    df['fips'] = df['county_fips'].astype(str).str.zfill(5)
-    df['water_score'] = df['availability_score']
-    return df
+    return pd.DataFrame({
+        "fips_code": fips_code(df["county_fips"]),
+        "water_score": pd.to_numeric(df["availability_score"], errors="coerce").astype("float32"),
+    })
 
-def gen_random_data(df, col_name):
+def gen_random_data(df, col_name, seed):
     N = len(df)
-    # Create random data for dummy data
+    # Create seeded random data for dummy data
+    rng = np.random.default_rng(seed)
     new_df = pd.DataFrame({
-        "fips": df['fips'],
-        col_name: 100 * np.random.rand(N)
+        "fips_code": df["fips_code"].to_numpy(),
+        col_name: (100 * rng.random(N)).astype("float32")
+    })
+    return new_df
+
+def gen_regulatory_components(df, seed):
+    """
+    Seeded placeholder REGULATORY_COMPONENTS, drawn as the regulatory panel's
+    raw answers (permit months, incentive/restriction/security counts,
+    support level) and scored with the panel's rules.
+    """
+    N = len(df)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "fips_code": df["fips_code"].to_numpy(),
+        "permit_score": np.maximum(0, 100 - 2 * rng.integers(0, 49, N)).astype("float32"),
+        "incentive_score": (20 * rng.integers(0, 6, N)).astype("float32"),
+        "env_compliance_score": (100 - 25 * rng.integers(0, 5, N)).astype("float32"),
+        "support_score": (25 * rng.integers(0, 5, N)).astype("float32"),
+        "security_score": (20 * rng.integers(0, 6, N)).astype("float32"),
     })
+
+def gen_native_metrics(df, seed):
+    """Seeded placeholder values for NATIVE_METRIC_COLUMNS, within each metric's native range."""
+    N = len(df)
+    rng = np.random.default_rng(seed)
+    new_df = pd.DataFrame({"fips_code": df["fips_code"].to_numpy()})
+    for col, spec in NATIVE_METRIC_COLUMNS.items():
+        if "select" in spec:
+            levels = np.array(list(spec["select"].values()), dtype="float32")
+            new_df[col] = rng.choice(levels, N)
+        else:
+            new_df[col] = rng.uniform(spec["min"], spec["max"], N).astype("float32")
     return new_df
 
-def load_gridstatus_data():
-    pass
+# Registry of data layers. Each layer is one source (a file, or a seeded
+# synthetic generator) producing a frame keyed on fips_code with the columns
+# declared in its schema. Layers are materialized once into LAYER_STORE_DIR
+# under a fingerprint of their spec and inputs, so a rebuild only happens
+# when that particular layer's source changes. Bump a layer's `version` when
+# its build function changes so stale materialized copies are not reused.
+DATA_LAYERS = {}
+
+def register_layer(name, source, schema, seed=None, version=1):
+    """Register `build(spec, source, fips_codes) -> DataFrame` as data layer `name`."""
+    def wrap(build):
+        DATA_LAYERS[name] = {
+            "name": name,
+            "source": source,
+            "seed": seed,
+            "schema": schema,
+            "version": version,
+            "build": build,
+        }
+        return build
+    return wrap
+
+@register_layer("water", source="csv", schema={"water_score": "float32"})
+def _water_layer(spec, source, fips_codes):
+    return water_processing(pd.read_csv(source, engine="pyarrow"))
+
+@register_layer("fiber", source="csv", schema={"fiber_score": "float32"})
+def _fiber_layer(spec, source, fips_codes):
+    return read_broadband_counties(source)
+
+@register_layer(
+    "grid",
+    source="csv",
+    schema={"transmission_cap": "float32", "interconnection_timeline": "float32", "hv_line_proximity": "float32"},
+)
+def _grid_layer(spec, source, fips_codes):
+    df = pd.read_csv(source, engine="pyarrow", usecols=["fips", *spec["schema"]])
+    df["fips_code"] = fips_code(df.pop("fips"))
+    return df
+
+@register_layer(
+    "future",
+    source="parquet",
+    schema={"power_demand_growth": "float32", "zoning_evolution": "float32", "climate_resilience": "float32"},
+)
+def _future_layer(spec, source, fips_codes):
+    df = pd.read_parquet(source)[["fips", *spec["schema"]]]
+    df["fips_code"] = fips_code(df.pop("fips"))
+    return df
+
+# Placeholder layers until real land and regulatory data is wired in
+@register_layer("land", source="synthetic", schema={"land_score": "float32"}, seed=1)
+def _land_layer(spec, source, fips_codes):
+    return gen_random_data(pd.DataFrame({"fips_code": fips_codes}), "land_score", spec["seed"])
+
+@register_layer(
+    "regulatory",
+    source="synthetic",
+    schema={col: "float32" for col in REGULATORY_COMPONENTS},
+    seed=2,
+)
+def _regulatory_layer(spec, source, fips_codes):
+    return gen_regulatory_components(pd.DataFrame({"fips_code": fips_codes}), spec["seed"])
+
+@register_layer(
+    "site_metrics",
+    source="synthetic",
+    schema={col: "float32" for col in NATIVE_METRIC_COLUMNS},
+    seed=3,
+)
+def _site_metrics_layer(spec, source, fips_codes):
+    return gen_native_metrics(pd.DataFrame({"fips_code": fips_codes}), spec["seed"])
+
+@register_layer(
+    "proximity",
+    source="geojson+infrastructure",
+    schema={col: "float32" for col in INFRA_PATHS},
+)
+def _proximity_layer(spec, source, fips_codes):
+    # Zonal mean distance (km) over each county from the EDT rasters of the
+    # infrastructure files present; a missing file leaves its column NaN
+    county_geojson_path, *paths = source
+    column_of = {path: col for col, path in INFRA_PATHS.items()}
+    features = _read_json(county_geojson_path)["features"]
+    counties = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+    df = site_distances({column_of[p]: p for p in paths}, counties)
+    df = df.reindex(columns=list(spec["schema"]))
+    df["fips_code"] = fips_code(pd.Series([f["id"] for f in features]))
+    return df
+
+# Legacy per-county score table; rows repeat per FIPS with differing fiber_score.
+# Its land_score replaces the seeded placeholder (see load_score_data)
+@register_layer(
+    "county_scores",
+    source="csv",
+    schema={c: "float32" for c in ["water_score", "land_score", "zoning_score", "fiber_score", "power_score"]},
+)
+def _county_scores_layer(spec, source, fips_codes):
+    df = pd.read_csv(source, engine="pyarrow", usecols=["fips", *spec["schema"]])
+    df["fips_code"] = fips_code(df.pop("fips"))
+    return df
+
+def load_concurrently(jobs, max_workers=None):
+    """
+    Run independent loaders in a thread pool and return their results.
+
+    Readers (pyarrow CSV/Parquet, GDAL) release the GIL while parsing, so
+    wall time is bounded by the slowest source rather than the sum.
+
+    Parameters
+    ----------
+    jobs : dict
+        {key: (callable, *args)}.
+    max_workers : int, optional
+        Pool size; defaults to one thread per job.
+
+    Returns
+    -------
+    dict
+        {key: callable(*args)}.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+        futures = {key: pool.submit(fn, *args) for key, (fn, *args) in jobs.items()}
+        return {key: fut.result() for key, fut in futures.items()}
+
+@register_layer(
+    "lmp_price",
+    source="parquet+geojson",
+    schema={"lmp_mean": "float32", "lmp_std": "float32", "lmp_p95": "float32"},
+    version=2,
+)
+def _lmp_price_layer(spec, source, fips_codes):
+    # County prices are IDW blends of the 3 nearest LMP nodes: one sparse W @ prices
+    lmp_path, county_geojson_path = source
+    df_lmp = pd.read_parquet(lmp_path)
+    prices, locations, hours = price_matrix(df_lmp)
+    sites = county_centroids(_read_json(county_geojson_path)).rename(columns={"fips": "site_id"})
+    mapping = load_node_mapping(sites, node_coordinates(df_lmp, locations), LMP_STORE_DIR, "county")
+    stats = site_price_stats(mapping_matrix(mapping, len(sites), len(locations)), prices)
+    stats["fips_code"] = fips_code(sites["site_id"])
+    return stats
+
+@register_layer(
+    "population_trend",
+    source="csv",
+    schema={
+        "population_growth": "float32",
+        "population_cagr": "float32",
+        "population_volatility": "float32",
+        "population_trend_score": "float32",
+    },
+)
+def _population_trend_layer(spec, source, fips_codes):
+    # Trends are per state (one pass over the states x years matrix) and
+    # broadcast to each county by its state FIPS
+    trends = region_trends(read_state_population(source), "state_fips", "year", "population")
+    trends.index = trends.index.astype(int)
+    codes = np.asarray(fips_codes, dtype="int32")
+    state = trends.reindex(codes // 1000)
+    return pd.DataFrame({
+        "fips_code": codes,
+        "population_growth": state["growth"].to_numpy(),
+        "population_cagr": state["cagr"].to_numpy(),
+        "population_volatility": state["volatility"].to_numpy(),
+        "population_trend_score": np.interp(state["cagr"], POPULATION_CAGR_SCORE_RANGE, [0, 100]),
+    })
+
+def layer_fingerprint(spec, source=None, fips_codes=None):
+    """Hash everything a layer's output depends on."""
+    h = hashlib.sha1()
+    h.update(json.dumps(
+        [spec["name"], spec["version"], spec["source"], spec["seed"], spec["schema"], SOURCE_POLICIES.get(spec["name"])],
+        sort_keys=True
+    ).encode())
+    for path in ([source] if isinstance(source, str) else source or []):
+        stat = os.stat(path)
+        h.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    if fips_codes is not None:
+        h.update(np.asarray(fips_codes, dtype="int32").tobytes())
+    return h.hexdigest()[:16]
+
+def load_layer(name, source=None, fips_codes=None, store_dir=LAYER_STORE_DIR):
+    """
+    Return data layer `name`, building and materializing it on first use.
+
+    Parameters
+    ----------
+    name : str
+        Key in DATA_LAYERS.
+    source : str or tuple of str, optional
+        Input file(s) for file-backed layers.
+    fips_codes : array-like, optional
+        County universe for synthetic layers.
+    store_dir : str
+        Directory holding materialized layers.
+
+    Returns
+    -------
+    DataFrame
+        `fips_code` plus the layer's schema columns, validated and
+        de-duplicated by ingestion.ingest_source (one row per county). The
+        violation report, if any, is saved next to the materialized layer.
+    """
+    spec = DATA_LAYERS[name]
+    path = os.path.join(store_dir, f"{name}-{layer_fingerprint(spec, source, fips_codes)}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    df, violations = ingest_source(spec["build"](spec, source, fips_codes), name)
+    df = df[["fips_code", *spec["schema"]]].astype({"fips_code": "int32", **spec["schema"]})
+    os.makedirs(store_dir, exist_ok=True)
+    if not violations.empty:
+        write_parquet(violations, path.replace(".parquet", ".violations.parquet"))
+    write_parquet(df, path)
+    return df
 
 def load_score_data(
     grid_path: str,
     future_path: str,
     water_path: str,
     fiber_path: str,
-    county_geojson_path: str = None
+    county_geojson_path: str = None,
+    lmp_path: str = None,
+    population_path: str = None,
+    county_scores_path: str = None
 ) -> pd.DataFrame:
     """
     Load and merge all score datasets into a master DataFrame.
@@ -49,60 +420,188 @@ def load_score_data(
     fiber_path : str
         Path to broadband summary CSV.
     county_geojson_path : str, optional
-        Path to county FIPS JSON, if needed elsewhere.
+        Path to county FIPS JSON; with `lmp_path`, used to place counties.
+    lmp_path : str, optional
+        Path to LMP Parquet. When given (with `county_geojson_path`), county
+        LMP statistics are added and feed power_score; counties with no
+        node within LMP_NODE_MAX_KM keep the grid-only power_score.
+    population_path : str, optional
+        Path to the long-form state population history CSV. When given,
+        state population trends are added and feed future scalability_score.
+    county_scores_path : str, optional
+        Path to the legacy per-county score CSV. When given, its
+        (de-duplicated) land_score replaces the placeholder land layer
+        wherever it has a value.
 
     Returns
     -------
     DataFrame
-        A master DataFrame with all composite scores.
+        A master DataFrame with all composite scores, one row per county,
+        cast to MASTER_SCHEMA. Scores a source has no value for are NaN;
+        `source_mask` flags which sources were present for each county.
     """
-    # Load new datasets
-    df_grid = pd.read_csv(grid_path)[["fips", "transmission_cap", "interconnection_timeline", "hv_line_proximity"]]
-    df_future = pd.read_parquet(future_path)[["fips", "power_demand_growth", "zoning_evolution", "climate_resilience"]]
+    # Load file-backed layers concurrently
+    jobs = {
+        "grid": (load_layer, "grid", grid_path),
+        "future": (load_layer, "future", future_path),
+        "water": (load_layer, "water", water_path),
+        "fiber": (load_layer, "fiber", fiber_path),
+    }
+    use_lmp = lmp_path is not None and county_geojson_path is not None
+    if use_lmp:
+        jobs["lmp"] = (load_layer, "lmp_price", (lmp_path, county_geojson_path))
+    infra_paths = [p for p in INFRA_PATHS.values() if os.path.exists(p)]
+    use_proximity = county_geojson_path is not None and bool(infra_paths)
+    if use_proximity:
+        jobs["proximity"] = (load_layer, "proximity", (county_geojson_path, *infra_paths))
+    use_county_scores = county_scores_path is not None
+    if use_county_scores:
+        jobs["county_scores"] = (load_layer, "county_scores", county_scores_path)
+    layers = load_concurrently(jobs)
+    df_grid, df_future, df_water, df_fiber = (layers[k] for k in ["grid", "future", "water", "fiber"])
+
+    # Merge into master; missing values stay NaN, presence is tracked in source_mask
+    sources = {"water": df_water, "fiber": df_fiber, "grid": df_grid, "future": df_future}
+    if use_lmp:
+        sources["lmp"] = layers["lmp"]
+    df_proximity = layers["proximity"] if use_proximity else None
+    df_county_scores = layers["county_scores"][["fips_code", "land_score"]] if use_county_scores else None
 
-    # Load original datasets
-    df_water = water_processing(pd.read_csv(water_path))
-    df_fiber = broadband_processing(pd.read_csv(fiber_path))
+    # Placeholder layers, seeded over the water layer's counties
+    counties = df_water["fips_code"].to_numpy()
+    jobs = {
+        "land": (load_layer, "land", None, counties),
+        "regulatory": (load_layer, "regulatory", None, counties),
+        "site_metrics": (load_layer, "site_metrics", None, counties),
+    }
+    use_population = population_path is not None
+    if use_population:
+        jobs["population"] = (load_layer, "population_trend", population_path, counties)
+    layers = load_concurrently(jobs)
+    if use_population:
+        sources["population"] = layers.pop("population")
+    df_master = df_water[["fips_code", "water_score"]]
+    for df_ in [*layers.values(), *list(sources.values())[1:]]:
+        df_master = df_master.merge(df_, on="fips_code", how="outer")
 
-    # Generate dummy data
-    df_land = gen_random_data(df_water, "land_score")
-    df_zoning = gen_random_data(df_water, "zoning_score")
-    df_power = gen_random_data(df_water, "power_score")
+    # Measured infrastructure distances replace the placeholder site_metrics values
+    if use_proximity:
+        df_master = df_master.merge(df_proximity, on="fips_code", how="left", suffixes=("", "_measured"))
+        for col in INFRA_PATHS:
+            df_master[col] = df_master.pop(f"{col}_measured").fillna(df_master[col])
+        sources["proximity"] = df_proximity
 
-    # Ensure fips column formatting
-    for df_ in [df_water, df_land, df_zoning, df_fiber, df_power, df_grid, df_future]:
-        df_["fips"] = df_["fips"].astype(str).str.zfill(5)
+    # Mapped LMP means replace the placeholder power cost ($/MWh) where a node is in range
+    if use_lmp:
+        df_master["power_cost"] = df_master["lmp_mean"].fillna(df_master["power_cost"])
 
-    # Merge into master
-    df_master = df_water[["fips","water_score"]]
-    for df_ in [df_land, df_zoning, df_fiber, df_power, df_grid, df_future]:
-        df_master = df_master.merge(df_, on="fips", how="outer")
+    # Legacy county land scores replace the placeholder land layer
+    if use_county_scores:
+        df_master = df_master.merge(df_county_scores, on="fips_code", how="left", suffixes=("", "_legacy"))
+        df_master["land_score"] = df_master.pop("land_score_legacy").fillna(df_master["land_score"])
+        sources["county_scores"] = df_county_scores
 
-    df_master = df_master.fillna(0)
+    source_mask = np.zeros(len(df_master), dtype="uint8")
+    for name, df_ in sources.items():
+        present = df_master["fips_code"].isin(df_["fips_code"]).to_numpy()
+        source_mask |= np.where(present, SOURCE_MASK_BITS[name], 0).astype("uint8")
+    df_master["source_mask"] = source_mask
 
-    # Composite scores
+    # Composite scores (NaN when a component is missing)
     df_master["power_score"] = (
         df_master["transmission_cap"] * 0.4
         + df_master["interconnection_timeline"] * 0.3
         + df_master["hv_line_proximity"] * 0.3
     )
-    df_master["future scalability_score"] = (
-        df_master["power_demand_growth"] * 0.5
-        + df_master["zoning_evolution"] * 0.3
-        + df_master["climate_resilience"] * 0.2
-    )
+    if use_lmp:
+        df_master["lmp_price_score"] = np.interp(df_master["lmp_mean"], LMP_SCORE_RANGE, [100, 0])
+        df_master.loc[df_master["lmp_mean"].isna(), "lmp_price_score"] = np.nan
+        with_lmp = (
+            df_master["transmission_cap"] * 0.3
+            + df_master["interconnection_timeline"] * 0.25
+            + df_master["hv_line_proximity"] * 0.25
+            + df_master["lmp_price_score"] * 0.2
+        )
+        # Counties with no LMP node in range keep the grid-only weights
+        df_master["power_score"] = with_lmp.fillna(df_master["power_score"])
+    if use_population:
+        df_master["future scalability_score"] = (
+            df_master["power_demand_growth"] * 0.4
+            + df_master["population_trend_score"] * 0.1
+            + df_master["zoning_evolution"] * 0.3
+            + df_master["climate_resilience"] * 0.2
+        )
+    else:
+        df_master["future scalability_score"] = (
+            df_master["power_demand_growth"] * 0.5
+            + df_master["zoning_evolution"] * 0.3
+            + df_master["climate_resilience"] * 0.2
+        )
+    # Equal component weights until the user picks their own (see regulations_score)
+    df_master["regulations_score"] = regulations_score(df_master)
 
     # Rename and map to final schema
     df_master = df_master.rename(
         columns={
-            "fiber_score": "fiber_score",
-            "land_score": "land_score",
-            "zoning_score": "regulations_score",
             "water_score": "climate factors_score"
         }
     )
-    df_master["fips"] = df_master["fips"].astype(str).str.zfill(5)
-    return df_master
+    df_master["fips"] = fips_str(df_master["fips_code"])
+    return enforce_master_schema(df_master)
+
+def regulations_score(df, weights=None):
+    """
+    County regulations_score as one weighted dot product over REGULATORY_COMPONENTS.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Master frame (or any frame with the component columns).
+    weights : dict, optional
+        {component: weight}, e.g. the "weights" returned by
+        render_regulatory_constraints; normalized to sum to 1. Equal weights
+        when omitted.
+
+    Returns
+    -------
+    ndarray
+        float32 scores aligned with the rows of `df`.
+    """
+    return weighted_score(df, weights or {col: 1.0 for col in REGULATORY_COMPONENTS})
+
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def county_names(county_geojson):
+    """Return a DataFrame of fips, county name and state FIPS from the county GeoJSON."""
+    props = [f["properties"] for f in county_geojson["features"]]
+    return pd.DataFrame({
+        "fips": [p["GEO_ID"][-5:] for p in props],
+        "county": [p["NAME"] for p in props],
+        "state": [p["STATE"] for p in props],
+    })
+
+def county_centroids(county_geojson):
+    """Return a DataFrame of fips, lat, lon for each county polygon's centroid."""
+    gdf = gpd.GeoDataFrame.from_features(county_geojson["features"], crs="EPSG:4326")
+    # Centroids are taken in an equal-area projection, then returned as lon/lat
+    centroids = gdf.geometry.to_crs(epsg=5070).centroid.to_crs(epsg=4326)
+    return pd.DataFrame({
+        "fips": [f["id"] for f in county_geojson["features"]],
+        "lat": centroids.y.to_numpy(),
+        "lon": centroids.x.to_numpy(),
+    })
+
+def blockgroup_centroids(blockgroup_gdf, id_col="GEOID"):
+    """Return a DataFrame of site_id, lat, lon for block-group polygon centroids."""
+    centroids = blockgroup_gdf.geometry.to_crs(epsg=5070).centroid.to_crs(epsg=4326)
+    ids = blockgroup_gdf[id_col] if id_col in blockgroup_gdf.columns else blockgroup_gdf.index.to_series()
+    return pd.DataFrame({
+        "site_id": ids.astype(str).to_numpy(),
+        "lat": centroids.y.to_numpy(),
+        "lon": centroids.x.to_numpy(),
+    })
 
 def load_geo_data(
     blockgroup_path: str,
@@ -114,7 +613,8 @@ def load_geo_data(
     Parameters
     ----------
     blockgroup_path : str
-        Path to blockgroup GeoJSON.
+        Path to blockgroup GeoJSON, or a GeoParquet file or directory of
+        GeoParquet parts (generate_national.py output).
     county_fips_json : str
         Path to county FIPS JSON.
 
@@ -123,10 +623,13 @@ def load_geo_data(
     tuple
         A tuple (blockgroup GeoDataFrame, county FIPS JSON dict).
     """
-    blockgroup_gdf = gpd.read_file(blockgroup_path)
-    with open(county_fips_json, 'r') as f:
-        geofips_county_json = json.load(f)
-    return blockgroup_gdf, geofips_county_json
+    is_parquet = os.path.isdir(blockgroup_path) or blockgroup_path.endswith(".parquet")
+    read_blockgroups = gpd.read_parquet if is_parquet else gpd.read_file
+    geo = load_concurrently({
+        "blockgroup": (read_blockgroups, blockgroup_path),
+        "county": (_read_json, county_fips_json),
+    })
+    return geo["blockgroup"], geo["county"]
 
 if __name__ == "__main__":
     # Example usage
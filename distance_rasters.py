@@ -0,0 +1,208 @@
+"""Distance rasters for proximity metrics (HV lines, gas pipes, fiber, subsea).
+
+Infrastructure files (lines or points, any format GeoPandas reads) are burned
+into a boolean grid on EPSG:5070 and turned into a distance-to-nearest-feature
+raster with scipy.ndimage.distance_transform_edt. Rasterizing needs no
+per-feature loop: every geometry is densified to half a cell with
+shapely.segmentize and all vertices are binned at once. Rasters are cached as
+.npz in RASTER_STORE_DIR keyed by the source file, grid and cell size.
+
+Sites are then read off the raster in one pass: `sample_raster` for
+centroids (counties, block groups) and `zonal_stats` for polygons (mean and
+min distance over the cells whose centers fall inside each polygon). The
+cell -> polygon assignment is one STRtree query, shared by every raster.
+"""
+
+import hashlib
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from scipy import ndimage
+
+from config import DISTANCE_CELL_KM, RASTER_STORE_DIR
+from storage import write_atomic
+
+RASTER_CRS = "EPSG:5070"
+
+
+def grid_for_bounds(bounds, cell_km=DISTANCE_CELL_KM, pad_km=0):
+    """
+    Grid covering planar `bounds` (minx, miny, maxx, maxy) in meters.
+
+    Returns
+    -------
+    dict
+        {"x0", "y0" (upper-left corner), "cell" (m), "shape" (rows, cols)}.
+    """
+    cell = cell_km * 1000
+    minx, miny, maxx, maxy = np.asarray(bounds, dtype="float64") + np.array([-1, -1, 1, 1]) * pad_km * 1000
+    x0, y0 = np.floor(minx / cell) * cell, np.ceil(maxy / cell) * cell
+    shape = (int(np.ceil((y0 - miny) / cell)), int(np.ceil((maxx - x0) / cell)))
+    return {"x0": float(x0), "y0": float(y0), "cell": float(cell), "shape": shape}
+
+
+def _cell_index(grid, x, y):
+    """(row, col) of planar points; points off the grid are clipped to its edge."""
+    rows = np.floor((grid["y0"] - np.asarray(y)) / grid["cell"]).astype("int64")
+    cols = np.floor((np.asarray(x) - grid["x0"]) / grid["cell"]).astype("int64")
+    return np.clip(rows, 0, grid["shape"][0] - 1), np.clip(cols, 0, grid["shape"][1] - 1)
+
+
+def rasterize_features(geoms, grid):
+    """Boolean grid, True in every cell touched by a line or point in `geoms` (RASTER_CRS)."""
+    coords = shapely.get_coordinates(shapely.segmentize(np.asarray(geoms), grid["cell"] / 2))
+    rows = np.floor((grid["y0"] - coords[:, 1]) / grid["cell"]).astype("int64")
+    cols = np.floor((coords[:, 0] - grid["x0"]) / grid["cell"]).astype("int64")
+    on_grid = (rows >= 0) & (rows < grid["shape"][0]) & (cols >= 0) & (cols < grid["shape"][1])
+    mask = np.zeros(grid["shape"], dtype=bool)
+    mask[rows[on_grid], cols[on_grid]] = True
+    return mask
+
+
+def distance_raster(mask, grid):
+    """Distance (km, float32) from every cell to the nearest True cell; inf if `mask` is empty."""
+    if not mask.any():
+        return np.full(grid["shape"], np.inf, dtype="float32")
+    return (ndimage.distance_transform_edt(~mask, sampling=grid["cell"]) / 1000).astype("float32")
+
+
+def load_distance_raster(path, grid, store_dir=RASTER_STORE_DIR):
+    """Distance raster for the features in `path` on `grid`, cached in `store_dir`."""
+    stat = os.stat(path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{grid['x0']}:{grid['y0']}:{grid['cell']}:{grid['shape']}".encode()
+    ).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache = os.path.join(store_dir, f"{name}-{key}.npz")
+    if os.path.exists(cache):
+        return np.load(cache)["distance_km"]
+    geoms = gpd.read_file(path).to_crs(RASTER_CRS).geometry.to_numpy()
+    raster = distance_raster(rasterize_features(geoms, grid), grid)
+    os.makedirs(store_dir, exist_ok=True)
+    write_atomic(cache, lambda tmp: _save_npz(tmp, distance_km=raster))
+    return raster
+
+
+def _save_npz(path, **arrays):
+    # Through a file object: np.savez_compressed appends ".npz" to a path that lacks it
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+
+
+def sample_raster(raster, grid, lat, lon):
+    """Raster values at latitude/longitude points (nearest cell)."""
+    pts = gpd.GeoSeries(gpd.points_from_xy(lon, lat), crs="EPSG:4326").to_crs(RASTER_CRS)
+    rows, cols = _cell_index(grid, pts.x.to_numpy(), pts.y.to_numpy())
+    return raster[rows, cols]
+
+
+def polygon_cells(grid, polygons, chunk_cells=500_000):
+    """
+    (flat cell index, polygon index) pairs for the cell centers inside each
+    polygon (RASTER_CRS). Computed once per grid and reused for every raster.
+    """
+    tree = shapely.STRtree(polygons)
+    minx, miny, maxx, maxy = shapely.total_bounds(polygons)
+    r0, c0 = _cell_index(grid, minx, maxy)
+    r1, c1 = _cell_index(grid, maxx, miny)
+    cols = np.arange(c0, c1 + 1)
+    cells, owners = [], []
+    # Row blocks keep the cell-center points bounded on national grids
+    block = max(1, chunk_cells // len(cols))
+    for start in range(r0, r1 + 1, block):
+        rr, cc = np.meshgrid(np.arange(start, min(start + block, r1 + 1)), cols, indexing="ij")
+        rr, cc = rr.ravel(), cc.ravel()
+        centers = shapely.points(grid["x0"] + (cc + 0.5) * grid["cell"], grid["y0"] - (rr + 0.5) * grid["cell"])
+        cell_idx, poly_idx = tree.query(centers, predicate="within")
+        cells.append(rr[cell_idx] * grid["shape"][1] + cc[cell_idx])
+        owners.append(poly_idx)
+    return np.concatenate(cells), np.concatenate(owners)
+
+
+def zonal_stats(raster, grid, polygons, zones=None):
+    """
+    Mean and min of the raster over each polygon (RASTER_CRS).
+
+    Cell values are reduced per polygon with bincount / minimum.at over the
+    `zones` pairs from polygon_cells (built here if not given). Polygons
+    smaller than a cell fall back to the value at their centroid.
+
+    Returns
+    -------
+    DataFrame
+        mean, min per polygon, aligned with `polygons`.
+    """
+    polygons = np.asarray(polygons)
+    cells, owners = zones if zones is not None else polygon_cells(grid, polygons)
+    n = len(polygons)
+    values = raster.ravel()[cells].astype("float64")
+    counts = np.bincount(owners, minlength=n)
+    mean = np.bincount(owners, weights=values, minlength=n) / np.maximum(counts, 1)
+    low = np.full(n, np.inf)
+    np.minimum.at(low, owners, values)
+
+    empty = counts == 0
+    if empty.any():
+        c = shapely.centroid(polygons[empty])
+        er, ec = _cell_index(grid, shapely.get_x(c), shapely.get_y(c))
+        mean[empty] = low[empty] = raster[er, ec]
+    return pd.DataFrame({"mean": mean.astype("float32"), "min": low.astype("float32")})
+
+
+def site_distances(sources: dict, polygons_gdf, cell_km=DISTANCE_CELL_KM, pad_km=500, stat="mean"):
+    """
+    Distance columns for every polygon site from a set of infrastructure files.
+
+    Parameters
+    ----------
+    sources : dict
+        {column: infrastructure file path}, e.g. {"power_hv_dist": "...lines.geojson"}.
+    polygons_gdf : GeoDataFrame
+        Site polygons (counties, block groups) in any CRS.
+    cell_km : float
+        Raster resolution.
+    pad_km : float
+        Margin around the sites; features farther out are ignored.
+    stat : {"mean", "min", "centroid"}
+        Zonal mean / min over each polygon, or the value at its centroid.
+
+    Returns
+    -------
+    DataFrame
+        One float32 column per source, aligned with `polygons_gdf`.
+    """
+    polygons = shapely.make_valid(polygons_gdf.to_crs(RASTER_CRS).geometry.to_numpy())
+    grid = grid_for_bounds(shapely.total_bounds(polygons), cell_km, pad_km)
+    out = pd.DataFrame(index=range(len(polygons)))
+    if stat == "centroid":
+        c = shapely.centroid(polygons)
+        rows, cols = _cell_index(grid, shapely.get_x(c), shapely.get_y(c))
+    else:
+        zones = polygon_cells(grid, polygons)
+    for col, path in sources.items():
+        raster = load_distance_raster(path, grid)
+        if stat == "centroid":
+            out[col] = raster[rows, cols]
+        else:
+            out[col] = zonal_stats(raster, grid, polygons, zones)[stat].to_numpy()
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import INFRA_PATHS
+
+    parser = argparse.ArgumentParser(description="Build distance rasters and county distance columns.")
+    parser.add_argument("county_geojson_path", nargs="?", default="data/us_county_fips.json")
+    parser.add_argument("--cell-km", type=float, default=DISTANCE_CELL_KM)
+    parser.add_argument("--stat", choices=["mean", "min", "centroid"], default="mean")
+    args = parser.parse_args()
+    sources = {col: path for col, path in INFRA_PATHS.items() if os.path.exists(path)}
+    if not sources:
+        parser.error(f"no infrastructure files found; expected any of {list(INFRA_PATHS.values())}")
+    counties = gpd.read_file(args.county_geojson_path)
+    print(site_distances(sources, counties, args.cell_km, stat=args.stat).describe().round(1).to_string())
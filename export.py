@@ -0,0 +1,231 @@
+"""Bulk export of filtered, ranked results and batch static maps.
+
+Tables (the passing counties or block groups, ranked by the priority score)
+are written in EXPORT_CHUNK_ROWS slices so national block-group sets never
+need a second full copy in memory: Parquet through one pyarrow ParquetWriter
+(one row group per slice), CSV by appending, and GeoPackage by appending to
+the layer with pyogrio. Parquet and CSV carry attributes only; GeoPackage
+carries the geometry.
+
+`render_market_images` renders a static map for every CORE_MARKET_FIPS_DICT
+market in a process pool with kaleido, for report batches:
+
+    python export.py table counties data/exports/counties.gpkg --priority power --min power=60
+    python export.py images data/exports/markets --priority power
+"""
+
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import CORE_MARKET_FIPS_DICT, EXPORT_CHUNK_ROWS, EXPORT_DIR
+from plotting import filter_master_df, get_cmap, make_market_static_choropleth
+
+EXPORT_FORMATS = {"parquet": ".parquet", "csv": ".csv", "gpkg": ".gpkg"}
+EXPORT_MIME = {"parquet": "application/vnd.apache.parquet", "csv": "text/csv", "gpkg": "application/geopackage+sqlite3"}
+
+
+def ranked_frame(df, priority_col, passing_only=True):
+    """
+    Rows of a filtered frame ordered by `priority_col`, best first.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Output of plotting.filter_master_df (has a `passes` column).
+    priority_col : str
+        Score column to rank by.
+    passing_only : bool
+        Drop rows that fail the thresholds.
+
+    Returns
+    -------
+    DataFrame
+        `rank` (1 = best) first, then the original columns without the
+        map helpers (`passes`, `color_val`).
+    """
+    if passing_only:
+        df = df[df["passes"].notna()]
+    df = df.sort_values(priority_col, ascending=False, kind="stable", na_position="last")
+    df = df.drop(columns=["passes", "color_val"], errors="ignore")
+    df.insert(0, "rank", range(1, len(df) + 1))
+    return df.reset_index(drop=True)
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _attributes(df):
+    """Plain attribute table (geometry dropped, categoricals as strings)."""
+    df = pd.DataFrame(df.drop(columns="geometry", errors="ignore"))
+    cats = df.select_dtypes("category").columns
+    return df.astype({c: str for c in cats}) if len(cats) else df
+
+
+def write_parquet(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    df = _attributes(df)
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_csv(df, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    df = _attributes(df)
+    for i, chunk in enumerate(_chunks(df, chunk_rows)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+
+def write_geopackage(gdf, path, layer, chunk_rows=EXPORT_CHUNK_ROWS):
+    cats = gdf.select_dtypes("category").columns
+    gdf = gdf.astype({c: str for c in cats}) if len(cats) else gdf
+    if os.path.exists(path):
+        os.remove(path)
+    for i, chunk in enumerate(_chunks(gdf, chunk_rows)):
+        chunk.to_file(path, layer=layer, driver="GPKG", engine="pyogrio", append=i > 0)
+
+
+def county_geometry(county_geojson):
+    """GeoDataFrame of county polygons keyed by `fips` (feature id)."""
+    gdf = gpd.GeoDataFrame.from_features(county_geojson["features"], crs="EPSG:4326")
+    gdf["fips"] = [f["id"] for f in county_geojson["features"]]
+    return gdf[["fips", "geometry"]]
+
+
+def with_geometry(df, geometry, key="fips"):
+    """Attach `geometry` (GeoDataFrame keyed by `key`) to `df`, keeping df's row order."""
+    out = df.assign(**{key: df[key].astype(str)}).merge(geometry, on=key, how="left")
+    return gpd.GeoDataFrame(out, geometry="geometry", crs=geometry.crs)
+
+
+def export_results(df, path, fmt=None, layer="results", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a ranked frame to `path` as Parquet, CSV or GeoPackage.
+
+    `fmt` defaults to the file extension; GeoPackage needs a GeoDataFrame.
+    Returns the number of rows written.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {list(EXPORT_FORMATS)}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "parquet":
+        write_parquet(df, path, chunk_rows)
+    elif fmt == "csv":
+        write_csv(df, path, chunk_rows)
+    else:
+        if not isinstance(df, gpd.GeoDataFrame):
+            raise ValueError("GeoPackage export needs geometry; join it with with_geometry first")
+        write_geopackage(df, path, layer, chunk_rows)
+    return len(df)
+
+
+def export_bytes(df, fmt, layer="results"):
+    """File contents for a download button (GeoPackage goes through a temp file)."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        _attributes(df).to_csv(buf, index=False)
+        return buf.getvalue().encode()
+    if fmt == "parquet":
+        buf = io.BytesIO()
+        _attributes(df).to_parquet(buf, index=False)
+        return buf.getvalue()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{layer}.gpkg")
+        export_results(df, path, "gpkg", layer)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def _render_market(market, gdf, priority_col, path, scale):
+    fig = make_market_static_choropleth(gdf, priority_col, market, get_cmap(priority_col))
+    fig.write_image(path, scale=scale)
+    return market, path
+
+
+def render_market_images(blockgroup_gdf, priority_col, thresholds, out_dir=EXPORT_DIR, fmt="png",
+                         markets=None, scale=2, max_workers=None):
+    """
+    Static block-group map per core market, rendered in parallel.
+
+    Parameters
+    ----------
+    blockgroup_gdf : GeoDataFrame
+        Block groups with `statecounty_fips` and score columns.
+    priority_col : str
+        Score column to color by.
+    thresholds : dict
+        Minimum scores, as for plotting.filter_master_df.
+    out_dir : str
+        Destination folder; files are named after the market.
+    fmt : str
+        Any kaleido image format (png, svg, pdf, ...).
+    markets : list, optional
+        Subset of CORE_MARKET_FIPS_DICT keys (default: all).
+
+    Returns
+    -------
+    dict
+        {market: image path}.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    markets = markets or list(CORE_MARKET_FIPS_DICT)
+    jobs = []
+    for market in markets:
+        gdf = blockgroup_gdf[blockgroup_gdf["statecounty_fips"].isin(CORE_MARKET_FIPS_DICT[market])]
+        if gdf.empty:
+            continue
+        gdf = filter_master_df(gdf.copy(), thresholds)
+        slug = "".join(c if c.isalnum() else "_" for c in market).strip("_").lower()
+        jobs.append((market, gdf, priority_col, os.path.join(out_dir, f"{slug}.{fmt}"), scale))
+    # One kaleido browser per worker process; markets render independently
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(_render_market, *zip(*jobs))) if jobs else {}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import BLOCKGROUP_PATH, SCORE_DATA_PATHS
+    from data_processing import load_geo_data, load_score_data
+
+    parser = argparse.ArgumentParser(description="Export filtered results or batch market maps.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    table = sub.add_parser("table", help="Write the passing, ranked rows")
+    table.add_argument("level", choices=["counties", "blockgroups"])
+    table.add_argument("path", help="Output .parquet, .csv or .gpkg")
+    images = sub.add_parser("images", help="Render a static map per core market")
+    images.add_argument("out_dir", nargs="?", default=EXPORT_DIR)
+    images.add_argument("--format", default="png")
+    images.add_argument("--workers", type=int, default=None)
+    for p in (table, images):
+        p.add_argument("--priority", default="power", help="Category to rank / color by, e.g. power, fiber")
+        p.add_argument("--min", nargs="*", default=[], metavar="CATEGORY=SCORE",
+                       help="Minimum category scores, e.g. power=60 fiber=40")
+        p.add_argument("--blockgroups", default=BLOCKGROUP_PATH)
+    args = parser.parse_args()
+
+    priority_col = f"{args.priority.lower()}_score"
+    thresholds = {f"{k.lower()}_score": float(v) for k, v in (m.split("=", 1) for m in args.min)}
+    blockgroups, county_geojson = load_geo_data(args.blockgroups, SCORE_DATA_PATHS["county_geojson_path"])
+
+    if args.command == "images":
+        for market, path in render_market_images(blockgroups, priority_col, thresholds, args.out_dir,
+                                                 args.format, max_workers=args.workers).items():
+            print(f"{market} -> {path}")
+    else:
+        if args.level == "counties":
+            df = ranked_frame(filter_master_df(load_score_data(**SCORE_DATA_PATHS), thresholds), priority_col)
+            if args.path.endswith(".gpkg"):
+                df = with_geometry(df, county_geometry(county_geojson))
+        else:
+            df = ranked_frame(filter_master_df(blockgroups, thresholds), priority_col)
+        print(f"{export_results(df, args.path, layer=args.level):,} rows -> {args.path}")
@@ -0,0 +1,328 @@
+"""Seeded synthetic national dataset for load tests and benchmarks.
+
+Writes scale-representative inputs under SYNTHETIC_DIR (same layouts the app
+reads), generated in parallel and streamed to disk in chunks:
+
+    counties     every county in the county GeoJSON (~3,200): grid, future
+                 scalability, water and broadband files
+    blockgroups  ~240k block groups with geometry (Voronoi cells clipped to
+                 their county), GeoParquet parts of ~100 counties each
+    lmp          multi-year 5-minute LMP for thousands of nodes in the
+                 gridstatus layout, one Parquet part per (month, node block)
+
+Scores vary smoothly in space (a sum of random plane waves over lat/lon plus
+noise), so neighbouring counties and block groups look alike the way real
+data does. Every chunk draws from its own SeedSequence keyed by (seed,
+dataset, chunk), so output depends on the seed and chunk sizes but not on
+the number of workers.
+
+    python generate_national.py --out data/synthetic --seed 0 --workers 8
+    python generate_national.py --only lmp --nodes 3000 --years 2 --start 2022-01-01
+
+The paths of everything written go to {out}/score_data_paths.json. Run the
+app, API (and loadtest.py against it) or batch jobs on the synthetic data
+by pointing config at that directory:
+
+    DRIFTNET_DATA_DIR=data/synthetic streamlit run streamlit_app.py
+    DRIFTNET_DATA_DIR=data/synthetic uvicorn api:app --workers 4 --port 8000
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from scipy.signal import lfilter
+
+from config import SCORE_DATA_PATHS, SYNTHETIC_DIR
+from data_processing import SCORE_COLUMNS
+
+PLANAR_CRS = "EPSG:5070"
+COUNTY_CHUNK = 100
+NODE_BLOCK = 250
+
+# Rough ISO footprints (lat, lon) and mean energy price ($/MWh); nodes join the nearest
+ISO_CENTERS = {
+    "PJM": (39.5, -78.0, 38.0),
+    "MISO": (41.5, -90.0, 33.0),
+    "ERCOT": (31.0, -98.5, 36.0),
+    "SPP": (37.5, -98.0, 28.0),
+    "CAISO": (36.5, -119.5, 45.0),
+    "NYISO": (42.5, -75.0, 42.0),
+    "ISONE": (43.5, -71.5, 46.0),
+    "SOUTHEAST": (33.0, -85.0, 34.0),
+    "NORTHWEST": (45.5, -118.0, 30.0),
+    "SOUTHWEST": (34.0, -110.0, 35.0),
+}
+
+_DATASET_KEYS = {"counties": 1, "blockgroups": 2, "lmp_iso": 3, "lmp_nodes": 4, "nodes": 5}
+
+
+def _rng(seed, dataset, *chunk):
+    return np.random.default_rng(np.random.SeedSequence([seed, _DATASET_KEYS[dataset], *chunk]))
+
+
+def smooth_field(seed, name, lat, lon, n_waves=8):
+    """
+    Spatially smooth 0–1 field: a fixed sum of random plane waves over lat/lon.
+
+    The waves depend only on (seed, name), so any chunk evaluates the same
+    national surface at its own points.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence([seed, *name.encode()]))
+    angle = rng.uniform(0, 2 * np.pi, n_waves)
+    wavelength = rng.uniform(4, 25, n_waves)                      # degrees
+    phase = rng.uniform(0, 2 * np.pi, n_waves)
+    proj = np.outer(lon, np.cos(angle)) + np.outer(lat, np.sin(angle))
+    field = np.sin(2 * np.pi * proj / wavelength + phase).sum(axis=1) / np.sqrt(n_waves / 2)
+    return 1 / (1 + np.exp(-field))
+
+
+def _scores(seed, name, lat, lon, rng, noise=0.12, mean=0.0):
+    """0–100 score: the smooth field for `name` plus independent noise."""
+    value = smooth_field(seed, name, lat, lon) + rng.normal(mean, noise, len(lat))
+    return (100 * np.clip(value, 0, 1)).astype("float32")
+
+
+def read_counties(county_geojson_path):
+    """County polygons with `fips` and centroid lat/lon."""
+    with open(county_geojson_path) as f:
+        features = json.load(f)["features"]
+    gdf = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+    gdf["fips"] = [feat["id"] for feat in features]
+    c = gdf.to_crs(PLANAR_CRS).geometry.centroid.to_crs("EPSG:4326")
+    gdf["lat"], gdf["lon"] = c.y.to_numpy(), c.x.to_numpy()
+    return gdf[["fips", "lat", "lon", "geometry"]]
+
+
+def write_county_inputs(counties, out_dir, seed):
+    """County-level score inputs in the layouts of SCORE_DATA_PATHS; returns their paths."""
+    rng = _rng(seed, "counties")
+    fips, lat, lon = counties["fips"].to_numpy(), counties["lat"].to_numpy(), counties["lon"].to_numpy()
+    paths = {
+        "grid_path": os.path.join(out_dir, "doe_grid_constraints.csv"),
+        "future_path": os.path.join(out_dir, "future_scalability.parquet"),
+        "water_path": os.path.join(out_dir, "county_water_availability_full.csv"),
+        "fiber_path": os.path.join(out_dir, "bdc_us_mobile_broadband_summary_by_geography.csv"),
+    }
+    pd.DataFrame({
+        "fips": fips,
+        "transmission_cap": _scores(seed, "transmission_cap", lat, lon, rng),
+        "interconnection_timeline": _scores(seed, "interconnection_timeline", lat, lon, rng),
+        "hv_line_proximity": _scores(seed, "hv_line_proximity", lat, lon, rng),
+    }).to_csv(paths["grid_path"], index=False)
+    pd.DataFrame({
+        "fips": fips,
+        "power_demand_growth": _scores(seed, "power_demand_growth", lat, lon, rng),
+        "zoning_evolution": _scores(seed, "zoning_evolution", lat, lon, rng),
+        "climate_resilience": _scores(seed, "climate_resilience", lat, lon, rng),
+    }).to_parquet(paths["future_path"], index=False)
+    pd.DataFrame({
+        "county_fips": fips,
+        "availability_score": _scores(seed, "water", lat, lon, rng),
+    }).to_csv(paths["water_path"], index=False)
+    pd.DataFrame({
+        "geography_type": "County",
+        "geography_id": fips,
+        "mobilebb_4g_area_st_pct": _scores(seed, "fiber", lat, lon, rng) / 100,
+    }).to_csv(paths["fiber_path"], index=False)
+    return paths
+
+
+def blockgroup_counts(counties, target, seed):
+    """Block groups per county: lognormal weights scaled to `target`, at least one each."""
+    weights = _rng(seed, "counties", 1).lognormal(0, 1, len(counties))
+    return np.maximum(1, np.round(weights / weights.sum() * target)).astype(int)
+
+
+def _points_in(polygon, n, rng):
+    """n uniform random points inside a planar polygon (vectorized rejection sampling)."""
+    minx, miny, maxx, maxy = polygon.bounds
+    shapely.prepare(polygon)
+    found = np.empty((0, 2))
+    while len(found) < n:
+        batch = rng.uniform([minx, miny], [maxx, maxy], size=(max(2 * n, 16), 2))
+        found = np.vstack([found, batch[shapely.contains_xy(polygon, batch[:, 0], batch[:, 1])]])
+    return found[:n]
+
+
+def _blockgroup_chunk(chunk, fips, wkb, counts, out_path, seed):
+    """Voronoi block groups for one chunk of counties, written as one GeoParquet part."""
+    rng = _rng(seed, "blockgroups", chunk)
+    geoms, geoids, owners = [], [], []
+    for f, poly, n in zip(fips, shapely.from_wkb(wkb), counts):
+        poly = shapely.make_valid(poly)
+        pts = _points_in(poly, n, rng)
+        if n == 1:
+            cells = np.array([poly])
+        else:
+            cells = shapely.get_parts(shapely.voronoi_polygons(shapely.multipoints(pts), extend_to=poly, ordered=True))
+            cells = shapely.intersection(cells, poly)
+        geoms.append(cells)
+        # GEOID: county (5) + tract (6) + block group (1), four block groups per tract
+        i = np.arange(len(cells))
+        geoids.append([f"{f}{t:04d}00{b}" for t, b in zip(i // 4 + 1, i % 4 + 1)])
+        owners.append(np.full(len(cells), f))
+    gdf = gpd.GeoDataFrame(
+        {"GEOID": np.concatenate(geoids), "statecounty_fips": np.concatenate(owners)},
+        geometry=np.concatenate(geoms), crs=PLANAR_CRS,
+    ).to_crs("EPSG:4326")
+    c = gdf.geometry.representative_point()
+    for col in SCORE_COLUMNS:
+        gdf[col] = _scores(seed, col, c.y.to_numpy(), c.x.to_numpy(), rng, noise=0.08)
+    gdf.to_parquet(out_path, index=False)
+    return len(gdf)
+
+
+def write_blockgroups(counties, out_dir, target, seed, pool):
+    """Block-group parts under out_dir/blockgroups/; returns the number of block groups."""
+    folder = os.path.join(out_dir, "blockgroups")
+    os.makedirs(folder, exist_ok=True)
+    counts = blockgroup_counts(counties, target, seed)
+    wkb = shapely.to_wkb(counties.to_crs(PLANAR_CRS).geometry.to_numpy())
+    fips = counties["fips"].to_numpy()
+    futures = [
+        pool.submit(_blockgroup_chunk, i, fips[s:s + COUNTY_CHUNK], wkb[s:s + COUNTY_CHUNK],
+                    counts[s:s + COUNTY_CHUNK], os.path.join(folder, f"part-{i:04d}.parquet"), seed)
+        for i, s in enumerate(range(0, len(counties), COUNTY_CHUNK))
+    ]
+    return sum(f.result() for f in futures)
+
+
+def make_nodes(counties, n_nodes, seed, target_blockgroups):
+    """LMP nodes placed near counties in proportion to their block groups, tagged with an ISO."""
+    rng = _rng(seed, "nodes")
+    weights = blockgroup_counts(counties, target_blockgroups, seed).astype(float)
+    idx = rng.choice(len(counties), size=n_nodes, p=weights / weights.sum())
+    lat = counties["lat"].to_numpy()[idx] + rng.normal(0, 0.15, n_nodes)
+    lon = counties["lon"].to_numpy()[idx] + rng.normal(0, 0.15, n_nodes)
+    centers = np.array([(c[0], c[1]) for c in ISO_CENTERS.values()])
+    iso = np.argmin((lat[:, None] - centers[:, 0]) ** 2 + (lon[:, None] - centers[:, 1]) ** 2, axis=1)
+    return pd.DataFrame({
+        "location": [f"NODE{i:05d}" for i in range(n_nodes)],
+        "iso": np.array(list(ISO_CENTERS))[iso],
+        "iso_index": iso,
+        "latitude": lat,
+        "longitude": lon,
+        "price_offset": rng.normal(0, 4, n_nodes),
+        "loss_factor": rng.normal(0, 0.02, n_nodes),
+        "congestion_rate": rng.uniform(0.0005, 0.005, n_nodes),
+    })
+
+
+def _iso_shocks(seed, month_index, n_hours):
+    """Hourly AR(1) price shocks per ISO for one month, shared by every node block."""
+    rng = _rng(seed, "lmp_iso", month_index)
+    eps = rng.normal(0, 4, (len(ISO_CENTERS), n_hours))
+    # Start each ISO from the stationary distribution, then x[h] = 0.9 x[h-1] + eps[h]
+    eps[:, 0] /= np.sqrt(1 - 0.9 ** 2)
+    return lfilter([1.0], [1.0, -0.9], eps, axis=1)
+
+
+def _lmp_chunk(month_index, month_start, block, nodes, freq, out_path, seed):
+    """One month of interval prices for one block of nodes, written as one Parquet part."""
+    start = pd.Timestamp(month_start, tz="UTC")
+    times = pd.date_range(start, start + pd.offsets.MonthBegin(1), freq=freq, inclusive="left")
+    step = times[1] - times[0]
+    market = f"REAL_TIME_{step // pd.Timedelta(minutes=1)}_MIN"
+    hour_index = ((times - start) // pd.Timedelta(hours=1)).to_numpy()
+    rng = _rng(seed, "lmp_nodes", month_index, block)
+    T, N = len(times), len(nodes)
+
+    base = np.array([c[2] for c in ISO_CENTERS.values()])[nodes["iso_index"].to_numpy()]
+    local_hour = (times.hour.to_numpy()[None, :] + times.minute.to_numpy()[None, :] / 60
+                  + nodes["longitude"].to_numpy()[:, None] / 15) % 24
+    daily = 1 + 0.3 * np.sin(2 * np.pi * (local_hour - 10) / 24)
+    seasonal = 1 + 0.2 * np.cos(2 * np.pi * (times.dayofyear.to_numpy() - 200) / 365)
+    shocks = _iso_shocks(seed, month_index, hour_index[-1] + 1)[nodes["iso_index"].to_numpy()][:, hour_index]
+
+    energy = (base[:, None] + nodes["price_offset"].to_numpy()[:, None]) * daily * seasonal + shocks
+    energy += rng.normal(0, 1.5, (N, T))
+    spikes = rng.random((N, T)) < nodes["congestion_rate"].to_numpy()[:, None]
+    congestion = np.where(spikes, rng.exponential(60, (N, T)), 0.0)
+    loss = energy * nodes["loss_factor"].to_numpy()[:, None]
+    lmp = energy + congestion + loss
+
+    table = pa.table({
+        "interval_start_utc": pa.array(np.tile(times.to_numpy(), N), pa.timestamp("ns", "UTC")),
+        "interval_end_utc": pa.array(np.tile((times + step).to_numpy(), N), pa.timestamp("ns", "UTC")),
+        "market": pa.DictionaryArray.from_arrays(pa.array(np.zeros(N * T, dtype="int8")), pa.array([market])),
+        "location": pa.DictionaryArray.from_arrays(pa.array(np.repeat(np.arange(N, dtype="int32"), T)), pa.array(nodes["location"].tolist())),
+        "location_type": pa.DictionaryArray.from_arrays(pa.array(np.zeros(N * T, dtype="int8")), pa.array(["NODE"])),
+        "lmp": lmp.ravel().astype("float32"),
+        "energy": energy.ravel().astype("float32"),
+        "congestion": congestion.ravel().astype("float32"),
+        "loss": loss.ravel().astype("float32"),
+        "latitude": np.repeat(nodes["latitude"].to_numpy(), T),
+        "longitude": np.repeat(nodes["longitude"].to_numpy(), T),
+    })
+    pq.write_table(table, out_path, row_group_size=1_000_000)
+    return table.num_rows
+
+
+def write_lmp(nodes, out_dir, start, years, freq, seed, pool):
+    """LMP parts under out_dir/lmp/month=YYYY-MM/; returns the number of rows."""
+    months = pd.date_range(pd.Timestamp(start), periods=12 * years, freq="MS")
+    futures = []
+    for m, month in enumerate(months):
+        folder = os.path.join(out_dir, "lmp", f"month={month:%Y-%m}")
+        os.makedirs(folder, exist_ok=True)
+        for b, s in enumerate(range(0, len(nodes), NODE_BLOCK)):
+            futures.append(pool.submit(
+                _lmp_chunk, m, str(month.date()), b, nodes.iloc[s:s + NODE_BLOCK].reset_index(drop=True),
+                freq, os.path.join(folder, f"part-{b:03d}.parquet"), seed,
+            ))
+    return sum(f.result() for f in futures)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic national dataset.")
+    parser.add_argument("--out", default=SYNTHETIC_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--county-geojson", default=SCORE_DATA_PATHS["county_geojson_path"])
+    parser.add_argument("--blockgroups", type=int, default=240_000, help="Target number of block groups")
+    parser.add_argument("--nodes", type=int, default=3_000)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--start", default="2023-01-01", help="First month of LMP")
+    parser.add_argument("--freq", default="5min")
+    parser.add_argument("--only", nargs="*", choices=["counties", "blockgroups", "lmp"],
+                        default=["counties", "blockgroups", "lmp"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    counties = read_counties(args.county_geojson)
+    # Partial runs (--only) add to the paths of earlier runs into the same directory
+    paths_file = os.path.join(args.out, "score_data_paths.json")
+    paths = {}
+    if os.path.exists(paths_file):
+        with open(paths_file) as f:
+            paths = json.load(f)
+    paths["county_geojson_path"] = args.county_geojson
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if "counties" in args.only:
+            paths.update(write_county_inputs(counties, args.out, args.seed))
+            print(f"counties: {len(counties):,}")
+        if "blockgroups" in args.only:
+            t = time.perf_counter()
+            n = write_blockgroups(counties, args.out, args.blockgroups, args.seed, pool)
+            paths["blockgroup_path"] = os.path.join(args.out, "blockgroups")
+            print(f"blockgroups: {n:,} in {time.perf_counter() - t:.1f}s")
+        if "lmp" in args.only:
+            t = time.perf_counter()
+            nodes = make_nodes(counties, args.nodes, args.seed, args.blockgroups)
+            nodes.drop(columns=["iso_index"]).to_parquet(os.path.join(args.out, "lmp_nodes.parquet"), index=False)
+            n = write_lmp(nodes, args.out, args.start, args.years, args.freq, args.seed, pool)
+            paths["lmp_path"] = os.path.join(args.out, "lmp")
+            print(f"lmp: {n:,} rows for {len(nodes):,} nodes in {time.perf_counter() - t:.1f}s")
+    # Read by config when DRIFTNET_DATA_DIR points here: SCORE_DATA_PATHS plus blockgroup_path
+    with open(paths_file, "w") as f:
+        json.dump(paths, f, indent=2)
@@ -0,0 +1,327 @@
+"""Multi-resolution hexagonal grid over the counties.
+
+Counties are too coarse and block groups too heavy for a national view, so
+scores are also served on a planar hex grid (pointy-top hexagons in
+EPSG:5070, CONUS Albers equal-area) at the edge lengths in HEX_LEVELS_KM,
+coarse to fine. Cells are keyed by an int64 id encoding level and axial
+(q, r) coordinates, H3-style.
+
+Only geometry work is precomputed: for every level a cell table (cell_id,
+lat, lon, land_km2) and a long-form cell -> county mapping weighted by
+intersection area. Fine cells are intersected with the county polygons;
+coarser cells aggregate the fine pieces whose centers fall inside them, so
+every level sums to the same land area. Scoring then runs per rerun as one
+sparse (cells x counties) product over the live master frame, so thresholds,
+rankings and user-weighted columns (regulations_score) work on fixed-size
+uniform cells in milliseconds. Given an LMP file, each level's cell table
+also carries lmp_mean / lmp_std / lmp_p95 from the cell's own nearest nodes,
+cached per level next to the grid.
+"""
+
+import hashlib
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import shapely
+
+from config import HEX_LEVELS_KM, HEX_STORE_DIR, LMP_NODE_MAX_KM, LMP_STORE_DIR
+from cost_simulator import node_coordinates, price_matrix
+from lmp_mapping import load_node_mapping, mapping_matrix, site_price_stats
+from storage import write_parquet
+
+HEX_CRS = "EPSG:5070"
+SQRT3 = np.sqrt(3.0)
+_AXIAL_OFFSET = 2 ** 23
+
+
+def cell_ids(level, q, r):
+    """int64 ids for axial coordinates at `level`."""
+    q = np.asarray(q, dtype="int64") + _AXIAL_OFFSET
+    r = np.asarray(r, dtype="int64") + _AXIAL_OFFSET
+    return (np.int64(level) << 48) | (q << 24) | r
+
+
+def cell_axial(ids):
+    """(level, q, r) arrays from cell ids."""
+    ids = np.asarray(ids, dtype="int64")
+    return ids >> 48, ((ids >> 24) & 0xFFFFFF) - _AXIAL_OFFSET, (ids & 0xFFFFFF) - _AXIAL_OFFSET
+
+
+def point_to_axial(x, y, size):
+    """Axial (q, r) of the hexagon with edge `size` containing planar points (x, y)."""
+    fq = (SQRT3 / 3 * np.asarray(x) - np.asarray(y) / 3) / size
+    fr = (2 / 3 * np.asarray(y)) / size
+    # Cube rounding: round all three coordinates, fix the one with the largest error
+    fs = -fq - fr
+    q, r, s = np.round(fq), np.round(fr), np.round(fs)
+    dq, dr, ds = np.abs(q - fq), np.abs(r - fr), np.abs(s - fs)
+    q = np.where((dq > dr) & (dq > ds), -r - s, q)
+    r = np.where(~((dq > dr) & (dq > ds)) & (dr > ds), -q - s, r)
+    return q.astype("int64"), r.astype("int64")
+
+
+def axial_to_point(q, r, size):
+    """Planar centers of axial cells."""
+    q, r = np.asarray(q, dtype="float64"), np.asarray(r, dtype="float64")
+    return size * SQRT3 * (q + r / 2), size * 1.5 * r
+
+
+def hex_polygons(ids, size):
+    """Shapely hexagons (in HEX_CRS) for cell ids at edge length `size` (m)."""
+    _, q, r = cell_axial(ids)
+    cx, cy = axial_to_point(q, r, size)
+    angles = np.radians(30 + 60 * np.arange(7))
+    coords = np.stack([
+        cx[:, None] + size * np.cos(angles),
+        cy[:, None] + size * np.sin(angles),
+    ], axis=2)
+    return shapely.polygons(coords)
+
+
+def _covering_cells(bounds, size):
+    """Axial cells whose hexagons may touch any of the (n, 4) bounding boxes."""
+    cells = []
+    for minx, miny, maxx, maxy in bounds:
+        r = np.arange(np.floor(2 / 3 * miny / size) - 1, np.ceil(2 / 3 * maxy / size) + 2)
+        q_lo = np.floor(minx / (size * SQRT3) - r.max() / 2) - 1
+        q_hi = np.ceil(maxx / (size * SQRT3) - r.min() / 2) + 1
+        q = np.arange(q_lo, q_hi + 1)
+        qq, rr = np.meshgrid(q, r)
+        cells.append(np.column_stack([qq.ravel(), rr.ravel()]))
+    return np.unique(np.concatenate(cells).astype("int64"), axis=0)
+
+
+def intersect_cells(polygons, ids, level, size):
+    """
+    Long-form (cell_id, site, area_km2) intersections of level-`level` cells with
+    `polygons` (in HEX_CRS); `ids` labels each polygon.
+    """
+    qr = _covering_cells(shapely.bounds(polygons), size)
+    cell = cell_ids(level, qr[:, 0], qr[:, 1])
+    hexes = hex_polygons(cell, size)
+    poly_idx, hex_idx = shapely.STRtree(hexes).query(polygons, predicate="intersects")
+    area = shapely.area(shapely.intersection(hexes[hex_idx], polygons[poly_idx])) / 1e6
+    keep = area > 0
+    return pd.DataFrame({
+        "cell_id": cell[hex_idx[keep]],
+        "site": np.asarray(ids)[poly_idx[keep]],
+        "area_km2": area[keep].astype("float32"),
+    })
+
+
+def _cell_table(mapping, level, size):
+    """cell_id, lat, lon, land_km2 for the cells present in `mapping`."""
+    land = mapping.groupby("cell_id", sort=True)["area_km2"].sum()
+    _, q, r = cell_axial(land.index.to_numpy())
+    x, y = axial_to_point(q, r, size)
+    centers = gpd.GeoSeries(gpd.points_from_xy(x, y), crs=HEX_CRS).to_crs(epsg=4326)
+    return pd.DataFrame({
+        "cell_id": land.index.to_numpy(),
+        "level": np.full(len(land), level, dtype="uint8"),
+        "lat": centers.y.to_numpy().astype("float32"),
+        "lon": centers.x.to_numpy().astype("float32"),
+        "land_km2": land.to_numpy().astype("float32"),
+    })
+
+
+def build_hex_grid(county_gdf, levels_km=HEX_LEVELS_KM):
+    """
+    Cell tables and cell -> county mappings for every level.
+
+    Parameters
+    ----------
+    county_gdf : GeoDataFrame
+        County polygons with a `fips` column.
+    levels_km : list of float
+        Hex edge lengths, coarse to fine.
+
+    Returns
+    -------
+    dict
+        {level: (cells DataFrame, mapping DataFrame with cell_id, fips, area_km2)}.
+    """
+    counties = county_gdf.to_crs(HEX_CRS)
+    polygons = shapely.make_valid(counties.geometry.to_numpy())
+    finest = len(levels_km) - 1
+    fine_size = levels_km[finest] * 1000
+    fine = intersect_cells(polygons, counties["fips"].to_numpy(), finest, fine_size)
+    fine = fine.rename(columns={"site": "fips"})
+
+    # Coarser levels regroup the fine pieces by the coarse cell of their fine center
+    _, q, r = cell_axial(fine["cell_id"].to_numpy())
+    fx, fy = axial_to_point(q, r, fine_size)
+    grid = {}
+    for level, edge_km in enumerate(levels_km):
+        size = edge_km * 1000
+        if level == finest:
+            mapping = fine
+        else:
+            cq, cr = point_to_axial(fx, fy, size)
+            mapping = (
+                fine.assign(cell_id=cell_ids(level, cq, cr))
+                .groupby(["cell_id", "fips"], sort=True, as_index=False)["area_km2"].sum()
+            )
+        grid[level] = (_cell_table(mapping, level, size), mapping.reset_index(drop=True))
+    return grid
+
+
+def load_hex_grid(county_geojson_path, levels_km=HEX_LEVELS_KM, store_dir=HEX_STORE_DIR, lmp_path=None):
+    """
+    build_hex_grid for a county GeoJSON file, cached in `store_dir` by file and levels.
+    With `lmp_path`, every cell table also gets the load_hex_lmp_stats columns.
+    """
+    grid = _load_hex_geometry(county_geojson_path, levels_km, store_dir)
+    if lmp_path is None:
+        return grid
+    return {
+        level: (cells.merge(load_hex_lmp_stats(cells, lmp_path, level, store_dir), on="cell_id", how="left"), mapping)
+        for level, (cells, mapping) in grid.items()
+    }
+
+
+def _load_hex_geometry(county_geojson_path, levels_km, store_dir):
+    stat = os.stat(county_geojson_path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(county_geojson_path)}:{stat.st_size}:{stat.st_mtime_ns}:{list(levels_km)}".encode()
+    ).hexdigest()[:16]
+    paths = {
+        level: (os.path.join(store_dir, f"cells-r{level}-{key}.parquet"), os.path.join(store_dir, f"map-r{level}-{key}.parquet"))
+        for level in range(len(levels_km))
+    }
+    if all(os.path.exists(p) for pair in paths.values() for p in pair):
+        return {level: (pd.read_parquet(c), pd.read_parquet(m)) for level, (c, m) in paths.items()}
+
+    county_gdf = gpd.read_file(county_geojson_path)
+    if "fips" not in county_gdf.columns:
+        county_gdf["fips"] = county_gdf["STATE"] + county_gdf["COUNTY"]
+    grid = build_hex_grid(county_gdf, levels_km)
+    os.makedirs(store_dir, exist_ok=True)
+    for level, (cells, mapping) in grid.items():
+        write_parquet(cells, paths[level][0])
+        write_parquet(mapping, paths[level][1])
+    return grid
+
+
+def _weighted_means(W, X):
+    """NaN-aware rows of W @ X normalized by the weight of the non-NaN entries."""
+    valid = ~np.isnan(X)
+    num = W @ np.where(valid, X, 0)
+    den = W @ valid.astype("float32")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, np.nan).astype("float32")
+
+
+def hex_scores(df, cells, mapping, columns, blockgroups=None, bg_mapping=None):
+    """
+    Area-weighted county scores per cell, one sparse product for all columns.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Master frame (fips plus `columns`), live so user-weighted columns apply.
+    cells, mapping : DataFrame
+        One level of build_hex_grid / load_hex_grid.
+    columns : list of str
+        Score columns to aggregate.
+    blockgroups, bg_mapping : DataFrame, optional
+        Block-group scores and their cell intersections (intersect_cells with
+        the block-group row positions as ids). Where block groups cover part
+        of a cell, that share of the cell takes the block-group mean.
+
+    Returns
+    -------
+    DataFrame
+        `cells` with one float32 column per score (NaN where no data).
+    """
+    row_of = pd.Series(np.arange(len(df)), index=df["fips"].astype(str).to_numpy())
+    cell_pos = np.searchsorted(cells["cell_id"].to_numpy(), mapping["cell_id"].to_numpy())
+    county_rows = row_of.reindex(mapping["fips"].astype(str).to_numpy()).to_numpy()
+    ok = ~np.isnan(county_rows)
+    W = sp.csr_matrix(
+        (mapping["area_km2"].to_numpy()[ok], (cell_pos[ok], county_rows[ok].astype("int64"))),
+        shape=(len(cells), len(df)),
+    )
+    values = _weighted_means(W, df[columns].to_numpy(dtype="float32"))
+
+    if blockgroups is not None and bg_mapping is not None and len(bg_mapping):
+        bg_cols = [c for c in columns if c in blockgroups.columns]
+        bg_pos = np.searchsorted(cells["cell_id"].to_numpy(), bg_mapping["cell_id"].to_numpy())
+        inside = (bg_pos < len(cells)) & (cells["cell_id"].to_numpy()[np.minimum(bg_pos, len(cells) - 1)] == bg_mapping["cell_id"].to_numpy())
+        W_bg = sp.csr_matrix(
+            (bg_mapping["area_km2"].to_numpy()[inside], (bg_pos[inside], bg_mapping["site"].to_numpy()[inside])),
+            shape=(len(cells), len(blockgroups)),
+        )
+        covered = np.clip(np.asarray(W_bg.sum(axis=1)).ravel() / cells["land_km2"].to_numpy(), 0, 1)[:, None]
+        bg_values = _weighted_means(W_bg, blockgroups[bg_cols].to_numpy(dtype="float32"))
+        idx = [columns.index(c) for c in bg_cols]
+        blended = covered * bg_values + (1 - covered) * values[:, idx]
+        values[:, idx] = np.where(np.isnan(bg_values), values[:, idx], blended)
+
+    out = cells.copy()
+    for i, col in enumerate(columns):
+        out[col] = values[:, i]
+    return out
+
+
+def subset_cells(cells, mapping, bounds):
+    """Cells (and their mapping rows) whose centers lie in (lon_min, lat_min, lon_max, lat_max)."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    keep = cells["lon"].between(lon_min, lon_max) & cells["lat"].between(lat_min, lat_max)
+    cells = cells[keep].reset_index(drop=True)
+    return cells, mapping[mapping["cell_id"].isin(cells["cell_id"])].reset_index(drop=True)
+
+
+def hex_lmp_stats(cells, lmp_path, level):
+    """lmp_mean, lmp_std, lmp_p95 per cell from its nearest LMP nodes (lmp_mapping KD-tree)."""
+    df_lmp = pd.read_parquet(lmp_path)
+    prices, locations, hours = price_matrix(df_lmp)
+    sites = pd.DataFrame({"site_id": cells["cell_id"].to_numpy(), "lat": cells["lat"], "lon": cells["lon"]})
+    mapping = load_node_mapping(sites, node_coordinates(df_lmp, locations), LMP_STORE_DIR, f"hex-r{level}")
+    return site_price_stats(mapping_matrix(mapping, len(sites), len(locations)), prices)
+
+
+def load_hex_lmp_stats(cells, lmp_path, level, store_dir=HEX_STORE_DIR):
+    """hex_lmp_stats keyed by cell_id, cached in `store_dir` by the cells and the LMP file."""
+    stat = os.stat(lmp_path)
+    h = hashlib.sha1(f"{os.path.abspath(lmp_path)}:{stat.st_size}:{stat.st_mtime_ns}:{LMP_NODE_MAX_KM}".encode())
+    h.update(cells["cell_id"].to_numpy().tobytes())
+    path = os.path.join(store_dir, f"lmp-r{level}-{h.hexdigest()[:16]}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    stats = hex_lmp_stats(cells, lmp_path, level)
+    stats.insert(0, "cell_id", cells["cell_id"].to_numpy())
+    os.makedirs(store_dir, exist_ok=True)
+    write_parquet(stats, path)
+    return stats
+
+
+def hex_geojson(cells, edge_km):
+    """FeatureCollection (EPSG:4326) of the given cells, feature id = str(cell_id)."""
+    ids = cells["cell_id"].to_numpy()
+    polygons = gpd.GeoSeries(hex_polygons(ids, edge_km * 1000), index=ids.astype(str), crs=HEX_CRS)
+    return polygons.to_crs(epsg=4326).__geo_interface__
+
+
+def level_for_zoom(zoom, levels_km=HEX_LEVELS_KM):
+    """Grid level to draw at a web-map zoom: about one level finer per zoom step past 3."""
+    return int(np.clip(np.floor(zoom) - 3, 0, len(levels_km) - 1))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Precompute the hex grid for a county GeoJSON.")
+    parser.add_argument("county_geojson_path", nargs="?", default="data/us_county_fips.json")
+    parser.add_argument("--lmp-path", default=None, help="Also map cells to LMP nodes and store their price stats")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    grid = load_hex_grid(args.county_geojson_path, lmp_path=args.lmp_path)
+    for level, (cells, mapping) in grid.items():
+        print(f"level {level} ({HEX_LEVELS_KM[level]} km): {len(cells):,} cells, {len(mapping):,} county pieces")
+        if args.lmp_path:
+            print(f"  lmp_mean {cells['lmp_mean'].mean():.2f} $/MWh, p95 {cells['lmp_p95'].mean():.2f} $/MWh")
+    print(f"{time.perf_counter() - t0:.1f}s")
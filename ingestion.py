@@ -0,0 +1,122 @@
+"""Validation and de-duplication of county-level sources before they are merged.
+
+Every source frame handed to `ingest_source` must carry a numeric `fips_code`
+column (NaN where the raw value could not be parsed). Checks run as whole-column
+operations and all violations are collected into a single report frame:
+
+    source | check | fips_code | column | value
+
+Checks
+    fips_format  code is missing, non-integral, or not a county FIPS (SSCCC, county != 000)
+    duplicate    more than one row for the same fips_code
+    range        value outside the (min, max) declared for the column
+
+Invalid-FIPS rows are dropped, out-of-range values are clipped or set to NaN
+(policy "out_of_range"), and duplicate rows are collapsed with the policy's
+"dedup" aggregation. A "dedup" of "error" raises instead.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from config import SOURCE_POLICIES
+
+
+VIOLATION_COLUMNS = ["source", "check", "fips_code", "column", "value"]
+
+
+class IngestionError(ValueError):
+    """Raised when a source breaks a policy configured to fail; carries the report."""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def _violations(source, check, fips_codes, column, values):
+    return pd.DataFrame({
+        "source": source,
+        "check": check,
+        "fips_code": np.asarray(fips_codes, dtype="float64"),
+        "column": column,
+        "value": np.asarray(values, dtype="float64"),
+    })
+
+
+def validate_source(df, source, policy):
+    """Return every violation in `df` as one report frame (empty if the source is clean)."""
+    codes = df["fips_code"].to_numpy(dtype="float64")
+    state = codes // 1000
+    bad_fips = (
+        np.isnan(codes)
+        | (codes != np.floor(codes))
+        | (state < 1) | (state > 78)
+        | (codes % 1000 == 0)
+    )
+    reports = [_violations(source, "fips_format", codes[bad_fips], "fips_code", codes[bad_fips])]
+
+    dup = df["fips_code"].duplicated(keep=False).to_numpy() & ~bad_fips
+    reports.append(_violations(source, "duplicate", codes[dup], "fips_code", codes[dup]))
+
+    for col, (lo, hi) in policy.get("ranges", {}).items():
+        values = df[col].to_numpy(dtype="float64")
+        out = (values < lo) | (values > hi)
+        reports.append(_violations(source, "range", codes[out], col, values[out]))
+
+    return pd.concat(reports, ignore_index=True)[VIOLATION_COLUMNS]
+
+
+def _summarize(report):
+    counts = report.groupby(["check", "column"]).size()
+    return ", ".join(f"{n} {check} ({col})" for (check, col), n in counts.items())
+
+
+def ingest_source(df, source, policy=None):
+    """
+    Validate and clean one source frame so it holds exactly one row per county.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Source rows with a numeric `fips_code` column.
+    source : str
+        Source name; selects the policy from SOURCE_POLICIES when `policy` is None.
+    policy : dict, optional
+        {"ranges": {col: (min, max)}, "out_of_range": "clip" | "nan",
+         "dedup": agg | {col: agg} | "error"}
+
+    Returns
+    -------
+    tuple
+        (cleaned DataFrame with int32 `fips_code`, violation report DataFrame).
+        A non-empty report is also summarized in a single warning.
+    """
+    if policy is None:
+        policy = SOURCE_POLICIES.get(source, {})
+    report = validate_source(df, source, policy)
+
+    if not report.empty:
+        warnings.warn(f"{source}: {len(report)} ingestion violations: {_summarize(report)}")
+    if policy.get("dedup") == "error" and (report["check"] == "duplicate").any():
+        raise IngestionError(f"{source}: duplicate FIPS rows", report)
+
+    bad_fips = report.loc[report["check"] == "fips_format", "fips_code"]
+    df = df[~df["fips_code"].isin(bad_fips) & df["fips_code"].notna()].copy()
+
+    for col, (lo, hi) in policy.get("ranges", {}).items():
+        if policy.get("out_of_range", "clip") == "clip":
+            df[col] = df[col].clip(lo, hi)
+        else:
+            df[col] = df[col].where(df[col].between(lo, hi))
+
+    df["fips_code"] = df["fips_code"].astype("int32")
+    if (report["check"] == "duplicate").any():
+        dedup = policy.get("dedup", "first")
+        value_cols = [c for c in df.columns if c != "fips_code"]
+        agg = dedup if isinstance(dedup, dict) else {c: dedup for c in value_cols}
+        agg = {c: agg.get(c, "first") for c in value_cols}
+        df = df.groupby("fips_code", as_index=False, sort=False).agg(agg)
+
+    return df.reset_index(drop=True), report
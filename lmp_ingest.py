@@ -0,0 +1,402 @@
+"""Incremental LMP ingestion: drop directory -> append-only partitions.
+
+New interval files (Parquet or CSV in the gridstatus layout) are dropped in
+LMP_DROP_DIR/{iso}/; the sub-directory names the ISO. For each file,
+`ingest_drop`
+
+1. appends the rows newer than their series' watermark as a small Parquet
+   file under LMP_LIVE_DIR/iso={iso}/date={YYYY-MM-DD}/, every row tagged
+   with the `ingest_seq` of its batch;
+2. commits the batch by atomically rewriting LMP_LIVE_DIR/_watermarks.parquet
+   (one row per iso, market and location: its watermark and the
+   `ingest_seq` that last advanced it);
+3. folds the committed batches into the daily rollups;
+4. moves the file to {iso}/_done/.
+
+The watermark file is the commit point. A crash before it leaves partition
+files past the ISO's committed `ingest_seq`; they are deleted before the
+next ingest and never shown to readers, and the drop file is ingested
+again. A crash after it is caught up from the partitions: rollups record
+the last `ingest_seq` they folded, so every committed batch is folded
+exactly once, and the re-read drop file holds only late rows. Rows at or
+before their series' watermark are late duplicates and are dropped; a file
+that cannot be read is moved to {iso}/_failed/ so it does not block later
+files. History is never rewritten:
+
+- `compact_partitions` merges a partition's small files into one file with
+  large row groups once it holds `compact_min_files` of them;
+- `update_rollups` folds committed batches into per-ISO daily rollups kept
+  as additive statistics (count, sum, sum of squares, min, max), so they
+  update without touching earlier data;
+- `read_new_intervals` gives readers only the committed rows ingested since
+  their own per-ISO cursor (last `ingest_seq` read), so a long-running app
+  keeps its frame current by appending, whatever the event time of the new rows.
+
+One writer at a time: run the CLI (`python lmp_ingest.py --watch`) or the
+app's background thread (`start_ingest_thread`), not both.
+"""
+
+import glob
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config import LMP_DROP_DIR, LMP_INGEST, LMP_LIVE_DIR, LMP_ROLLUP_DIR
+from storage import write_parquet
+
+# Columns kept from drop files; local-time columns are dropped because their
+# offset differs per ISO (interval_*_utc is the key everywhere)
+LMP_COLUMNS = {
+    "interval_start_utc": "datetime64[ns, UTC]",
+    "interval_end_utc": "datetime64[ns, UTC]",
+    "market": "string",
+    "location": "string",
+    "location_type": "string",
+    "lmp": "float64",
+    "energy": "float64",
+    "congestion": "float64",
+    "loss": "float64",
+    "latitude": "float64",
+    "longitude": "float64",
+}
+PARTITIONING = ds.partitioning(pa.schema([("iso", pa.string()), ("date", pa.string())]), flavor="hive")
+REQUIRED_COLUMNS = ["interval_start_utc", "interval_end_utc", "market", "location", "lmp"]
+DEDUP_KEY = ["market", "location", "interval_start_utc"]
+SERIES_KEY = ["iso", "market", "location"]
+_WATERMARKS = "_watermarks.parquet"
+
+
+def read_watermarks(live_dir=LMP_LIVE_DIR):
+    """
+    Last ingested interval_start_utc per series: DataFrame of SERIES_KEY plus
+    `watermark` and the `ingest_seq` of the batch that last advanced it.
+    """
+    path = os.path.join(live_dir, _WATERMARKS)
+    if not os.path.exists(path):
+        return pd.DataFrame({
+            "iso": pd.Series(dtype="string"),
+            "market": pd.Series(dtype="string"),
+            "location": pd.Series(dtype="string"),
+            "watermark": pd.Series(dtype=LMP_COLUMNS["interval_start_utc"]),
+            "ingest_seq": pd.Series(dtype="int64"),
+        })
+    return pd.read_parquet(path)
+
+
+def write_watermarks(watermarks, live_dir=LMP_LIVE_DIR):
+    os.makedirs(live_dir, exist_ok=True)
+    write_parquet(watermarks, os.path.join(live_dir, _WATERMARKS))
+
+
+def advance_watermarks(watermarks, df, iso, seq):
+    """Watermarks moved up to the newest row of each series in `df`, ingested as batch `seq`."""
+    latest = df.groupby(["market", "location"], as_index=False, dropna=False)["interval_start_utc"].max()
+    latest = latest.rename(columns={"interval_start_utc": "watermark"}).assign(iso=iso, ingest_seq=np.int64(seq))
+    merged = pd.concat([watermarks, latest[watermarks.columns]], ignore_index=True)
+    return merged.groupby(SERIES_KEY, as_index=False, dropna=False).agg(
+        watermark=("watermark", "max"), ingest_seq=("ingest_seq", "max"),
+    ).astype(watermarks.dtypes)
+
+
+def committed_seqs(watermarks):
+    """{iso: last committed ingest_seq}; partition rows past it belong to an unfinished batch."""
+    return {iso: int(seq) for iso, seq in watermarks.groupby("iso")["ingest_seq"].max().items()}
+
+
+def past_watermarks(df, watermarks, iso):
+    """Rows of `df` newer than the watermark of their own series (all rows of unseen series)."""
+    marks = watermarks.loc[watermarks["iso"] == iso, ["market", "location", "watermark"]]
+    mark = df[["market", "location"]].merge(marks, on=["market", "location"], how="left")["watermark"].set_axis(df.index)
+    return df[mark.isna() | (df["interval_start_utc"] > mark)]
+
+
+def normalize_intervals(df):
+    """
+    Drop-file rows in LMP_COLUMNS order and dtypes.
+
+    Optional columns that are missing are NaN / NA; rows without an interval
+    start or end are dropped. Raises ValueError when a REQUIRED_COLUMNS column is missing.
+    """
+    missing_required = [col for col in REQUIRED_COLUMNS if col not in df]
+    if missing_required:
+        raise ValueError(f"drop file is missing columns {missing_required}")
+    out = pd.DataFrame(index=df.index)
+    for col, dtype in LMP_COLUMNS.items():
+        if col not in df:
+            missing = np.nan if dtype == "float64" else pd.NA
+            out[col] = pd.Series(missing, index=df.index, dtype=dtype)
+        elif col.startswith("interval_"):
+            out[col] = pd.to_datetime(df[col], utc=True).astype(dtype)
+        else:
+            out[col] = df[col].astype(dtype)
+    out = out.dropna(subset=["interval_start_utc", "interval_end_utc"])
+    return out.drop_duplicates(DEDUP_KEY, keep="last").reset_index(drop=True)
+
+
+def _read_drop_file(path):
+    return pd.read_csv(path) if path.endswith(".csv") else pd.read_parquet(path)
+
+
+def append_partition(df, iso, seq, live_dir=LMP_LIVE_DIR):
+    """
+    Write normalized rows as one new file per UTC date under iso={iso}/date=...
+
+    Every row is tagged with `ingest_seq` = seq (increasing per batch), which
+    readers use as their cursor; file names start with part-{seq} so an
+    uncommitted batch can be found without reading it. Returns the written paths.
+    """
+    paths = []
+    df = df.assign(ingest_seq=np.int64(seq))
+    dates = df["interval_start_utc"].dt.strftime("%Y-%m-%d")
+    for date, part in df.groupby(dates, sort=True):
+        folder = os.path.join(live_dir, f"iso={iso}", f"date={date}")
+        os.makedirs(folder, exist_ok=True)
+        name = f"part-{seq}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(folder, name)
+        # Dot-prefixed while writing so dataset scans skip the partial file
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), os.path.join(folder, f".{name}"))
+        os.replace(os.path.join(folder, f".{name}"), path)
+        paths.append(path)
+    return paths
+
+
+def discard_uncommitted(iso, committed, live_dir=LMP_LIVE_DIR):
+    """Delete the ISO's partition files written past its `committed` ingest_seq (a crashed batch)."""
+    removed = 0
+    for path in glob.glob(os.path.join(live_dir, f"iso={iso}", "date=*", "part-*.parquet")):
+        seq = int(os.path.basename(path).split("-")[1])
+        if committed is None or seq > committed:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def update_rollups(iso, committed, live_dir=LMP_LIVE_DIR, rollup_dir=LMP_ROLLUP_DIR):
+    """
+    Fold the ISO's committed batches not yet in its daily rollups (one row per
+    location and UTC date) into them.
+
+    Rollups hold additive statistics plus the newest `ingest_seq` folded in,
+    so only partition rows past that and up to `committed` are read and
+    added; a batch is never folded twice. See `load_rollups` for mean and std.
+    """
+    path = os.path.join(rollup_dir, f"daily-{iso}.parquet")
+    rollups = pd.read_parquet(path) if os.path.exists(path) else None
+    folded = int(rollups["ingest_seq"].max()) if rollups is not None else -1
+    if committed is None or committed <= folded:
+        return rollups
+    dataset = ds.dataset(live_dir, format="parquet", partitioning=PARTITIONING)
+    df = dataset.to_table(
+        columns=["interval_start_utc", "location", "lmp", "ingest_seq"],
+        filter=(pc.field("iso") == iso) & (pc.field("ingest_seq") > folded) & (pc.field("ingest_seq") <= committed),
+    ).to_pandas()
+    if df.empty:
+        return rollups
+    batch = df.assign(date=df["interval_start_utc"].dt.floor("D").dt.tz_localize(None), lmp_sq=df["lmp"] ** 2)
+    batch = batch.groupby(["location", "date"], as_index=False).agg(
+        n=("lmp", "count"), lmp_sum=("lmp", "sum"), lmp_sumsq=("lmp_sq", "sum"),
+        lmp_min=("lmp", "min"), lmp_max=("lmp", "max"), ingest_seq=("ingest_seq", "max"),
+    )
+    if rollups is not None:
+        batch = pd.concat([rollups, batch], ignore_index=True).groupby(
+            ["location", "date"], as_index=False
+        ).agg(n=("n", "sum"), lmp_sum=("lmp_sum", "sum"), lmp_sumsq=("lmp_sumsq", "sum"),
+              lmp_min=("lmp_min", "min"), lmp_max=("lmp_max", "max"), ingest_seq=("ingest_seq", "max"))
+    os.makedirs(rollup_dir, exist_ok=True)
+    write_parquet(batch, path)
+    return batch
+
+
+def load_rollups(rollup_dir=LMP_ROLLUP_DIR):
+    """Daily rollups of every ISO with lmp_mean and lmp_std derived from the sums."""
+    frames = [
+        pd.read_parquet(path).assign(iso=os.path.basename(path)[len("daily-"):-len(".parquet")])
+        for path in sorted(glob.glob(os.path.join(rollup_dir, "daily-*.parquet")))
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["iso", "location", "date", "n", "lmp_mean", "lmp_std", "lmp_min", "lmp_max"])
+    df = pd.concat(frames, ignore_index=True)
+    df["lmp_mean"] = df["lmp_sum"] / df["n"]
+    df["lmp_std"] = ((df["lmp_sumsq"] / df["n"] - df["lmp_mean"] ** 2).clip(lower=0)) ** 0.5
+    return df[["iso", "location", "date", "n", "lmp_mean", "lmp_std", "lmp_min", "lmp_max"]]
+
+
+def ingest_drop(drop_dir=LMP_DROP_DIR, live_dir=LMP_LIVE_DIR, rollup_dir=LMP_ROLLUP_DIR):
+    """
+    Ingest every pending file in drop_dir/{iso}/, oldest first.
+
+    Returns
+    -------
+    dict
+        {iso: {"files", "rows" appended, "late" rows dropped, "failed" files,
+        "watermark" (newest interval of the ISO)}} for the ISOs that had
+        pending files.
+    """
+    watermarks = read_watermarks(live_dir)
+    committed = committed_seqs(watermarks)
+    report = {}
+    for iso_dir in sorted(glob.glob(os.path.join(drop_dir, "*", ""))):
+        iso = os.path.basename(os.path.dirname(iso_dir))
+        if iso.startswith(("_", ".")):
+            continue
+        # Recover from a crash: drop an uncommitted batch, fold committed ones the rollups missed
+        discard_uncommitted(iso, committed.get(iso), live_dir)
+        update_rollups(iso, committed.get(iso), live_dir, rollup_dir)
+        pending = sorted(
+            (p for p in glob.glob(os.path.join(iso_dir, "*")) if p.endswith((".parquet", ".csv"))),
+            key=os.path.getmtime,
+        )
+        if not pending:
+            continue
+        stats = {"files": 0, "rows": 0, "late": 0, "failed": 0}
+        for path in pending:
+            try:
+                df = normalize_intervals(_read_drop_file(path))
+            except Exception as exc:  # unreadable file: set it aside, keep ingesting the rest
+                print(f"LMP ingest: {path} failed: {exc}")
+                _move(path, os.path.join(iso_dir, "_failed"))
+                stats["failed"] += 1
+                continue
+            fresh = past_watermarks(df, watermarks, iso)
+            if len(fresh):
+                seq = time.time_ns()
+                append_partition(fresh, iso, seq, live_dir)
+                watermarks = advance_watermarks(watermarks, fresh, iso, seq)
+                write_watermarks(watermarks, live_dir)  # commit point
+                committed[iso] = seq
+                update_rollups(iso, seq, live_dir, rollup_dir)
+            _move(path, os.path.join(iso_dir, "_done"))
+            stats["files"] += 1
+            stats["rows"] += len(fresh)
+            stats["late"] += len(df) - len(fresh)
+        report[iso] = {**stats, "watermark": watermarks.loc[watermarks["iso"] == iso, "watermark"].max()}
+    return report
+
+
+def _move(path, folder):
+    os.makedirs(folder, exist_ok=True)
+    shutil.move(path, os.path.join(folder, os.path.basename(path)))
+
+
+def compact_partitions(live_dir=LMP_LIVE_DIR, min_files=LMP_INGEST["compact_min_files"],
+                       row_group_size=LMP_INGEST["row_group_size"]):
+    """
+    Merge partitions holding at least `min_files` files into one file each.
+
+    The merged file is renamed into place before its inputs are removed;
+    its rows keep their `ingest_seq`, so readers never see them twice.
+    Uncommitted batch files are left for `discard_uncommitted`.
+    Returns the number of partitions compacted.
+    """
+    committed = committed_seqs(read_watermarks(live_dir))
+    compacted = 0
+    for folder in sorted(glob.glob(os.path.join(live_dir, "iso=*", "date=*"))):
+        last = committed.get(os.path.basename(os.path.dirname(folder))[len("iso="):], -1)
+        files = sorted(
+            f for f in glob.glob(os.path.join(folder, "*.parquet"))
+            if not os.path.basename(f).startswith("part-") or int(os.path.basename(f).split("-")[1]) <= last
+        )
+        if len(files) < min_files:
+            continue
+        table = pa.concat_tables([pq.read_table(f) for f in files])
+        name = f"compact-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(folder, f".{name}")
+        pq.write_table(table.sort_by([("interval_start_utc", "ascending")]), tmp, row_group_size=row_group_size)
+        os.replace(tmp, os.path.join(folder, name))
+        for f in files:
+            os.remove(f)
+        compacted += 1
+    return compacted
+
+
+def read_new_intervals(cursor=None, live_dir=LMP_LIVE_DIR):
+    """
+    Committed rows ingested since `cursor` ({iso: last ingest_seq read}; empty
+    reads everything).
+
+    The cursor follows ingestion order, not event time, so a late-arriving
+    node or market is picked up even when its intervals are older than rows
+    already read. Files whose `ingest_seq` statistics are all at or below the
+    cursor are skipped without reading their data.
+
+    Returns
+    -------
+    tuple
+        (DataFrame in LMP_COLUMNS plus `iso`, updated cursor).
+    """
+    cursor = dict(cursor or {})
+    if not os.path.isdir(live_dir):
+        return pd.DataFrame(columns=[*LMP_COLUMNS, "iso"]), cursor
+    committed = committed_seqs(read_watermarks(live_dir))
+    if not committed:
+        return pd.DataFrame(columns=[*LMP_COLUMNS, "iso"]), cursor
+    dataset = ds.dataset(live_dir, format="parquet", partitioning=PARTITIONING)
+    flt = None
+    for iso, last in committed.items():
+        # Every ISO without a cursor is read in full, up to its committed batch
+        new = (pc.field("iso") == iso) & (pc.field("ingest_seq") > cursor.get(iso, -1)) & (pc.field("ingest_seq") <= last)
+        flt = new if flt is None else flt | new
+    df = dataset.to_table(filter=flt).to_pandas()
+    if df.empty:
+        return pd.DataFrame(columns=[*LMP_COLUMNS, "iso"]), cursor
+    for iso, last in df.groupby("iso", observed=True)["ingest_seq"].max().items():
+        cursor[iso] = int(last)
+    df = df.drop(columns=["date", "ingest_seq"]).drop_duplicates(DEDUP_KEY, keep="last").reset_index(drop=True)
+    return df, cursor
+
+
+def run_ingest_cycle(cycle=0, drop_dir=LMP_DROP_DIR, live_dir=LMP_LIVE_DIR, rollup_dir=LMP_ROLLUP_DIR):
+    """One poll: ingest pending drops, and compact every `compact_every` cycles."""
+    report = ingest_drop(drop_dir, live_dir, rollup_dir)
+    if cycle % LMP_INGEST["compact_every"] == 0:
+        compact_partitions(live_dir)
+    return report
+
+
+def start_ingest_thread(drop_dir=LMP_DROP_DIR, poll_s=LMP_INGEST["poll_s"]):
+    """Poll `drop_dir` from a daemon thread; returns a threading.Event that stops it when set."""
+    stop = threading.Event()
+
+    def loop():
+        cycle = 0
+        while not stop.is_set():
+            try:
+                run_ingest_cycle(cycle, drop_dir)
+            except Exception as exc:  # a bad drop file must not kill the poller
+                print(f"LMP ingest failed: {exc}")
+            cycle += 1
+            stop.wait(poll_s)
+
+    threading.Thread(target=loop, daemon=True, name="lmp-ingest").start()
+    return stop
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest LMP drop files into append-only partitions.")
+    parser.add_argument("--drop-dir", default=LMP_DROP_DIR)
+    parser.add_argument("--watch", action="store_true", help="Keep polling every poll_s seconds")
+    parser.add_argument("--compact", action="store_true", help="Compact partitions after ingesting")
+    args = parser.parse_args()
+
+    cycle = 0
+    while True:
+        for iso, stats in ingest_drop(args.drop_dir).items():
+            print(f"{iso}: {stats['files']} files, {stats['rows']:,} rows, {stats['late']:,} late, "
+                  f"{stats['failed']} failed, watermark {stats['watermark']}")
+        if args.compact or (args.watch and cycle % LMP_INGEST["compact_every"] == 0):
+            print(f"compacted {compact_partitions()} partitions")
+        if not args.watch:
+            break
+        cycle += 1
+        time.sleep(LMP_INGEST["poll_s"])
@@ -0,0 +1,146 @@
+"""Nearest-LMP-node assignment for counties and block groups.
+
+Sites (county or block-group centroids) are matched to their k nearest LMP
+nodes with a KD-tree over 3-D unit vectors: chord length on the unit sphere
+is monotonic in great-circle distance, so the tree's neighbours are the
+haversine neighbours, and distances are converted back to km. Each site gets
+inverse-distance weights over its neighbours within LMP_NODE_MAX_KM (summing
+to 1); a site with no node in range (e.g. Alaska or Hawaii against a
+contiguous-US node set) gets no weights and NaN prices.
+
+The mapping is kept in long form (site, node, distance_km, weight), persisted
+as Parquet, and turned into a sparse (sites x nodes) matrix W. Site-level
+prices for every interval are then one sparse product, W @ node_prices.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+from config import LMP_NODE_MAX_KM
+from storage import write_parquet
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit vectors for latitude/longitude arrays in degrees."""
+    lat_r, lon_r = np.radians(lat), np.radians(lon)
+    return np.column_stack([
+        np.cos(lat_r) * np.cos(lon_r),
+        np.cos(lat_r) * np.sin(lon_r),
+        np.sin(lat_r),
+    ])
+
+
+def nearest_nodes(site_lat, site_lon, node_lat, node_lon, k=3, power=2.0):
+    """
+    k nearest nodes per site with inverse-distance weights.
+
+    Returns
+    -------
+    tuple
+        (node indices (sites, k), distances km (sites, k), weights (sites, k)).
+        A site sitting on a node gets all its weight on that node.
+    """
+    k = min(k, len(node_lat))
+    tree = cKDTree(unit_vectors(node_lat, node_lon))
+    chord, idx = tree.query(unit_vectors(site_lat, site_lon), k=k)
+    chord, idx = chord.reshape(len(site_lat), k), idx.reshape(len(site_lat), k)
+    dist_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+    exact = dist_km < 1e-6
+    inv = np.where(exact, 0.0, 1.0 / np.maximum(dist_km, 1e-6) ** power)
+    inv = np.where(exact.any(axis=1, keepdims=True), exact.astype(float), inv)
+    return idx, dist_km, inv / inv.sum(axis=1, keepdims=True)
+
+
+def build_node_mapping(sites, nodes, k=3, power=2.0, max_km=LMP_NODE_MAX_KM):
+    """
+    Long-form site -> node mapping.
+
+    Parameters
+    ----------
+    sites : DataFrame
+        Columns site_id, lat, lon (county or block-group centroids).
+    nodes : DataFrame
+        Index of node names with latitude, longitude columns (e.g.
+        cost_simulator.node_coordinates), in price-matrix order.
+    max_km : float, optional
+        Neighbours farther than this are dropped and the remaining weights
+        renormalized; sites with none left have no rows. None keeps all k.
+
+    Returns
+    -------
+    DataFrame
+        site_id, site_index, location, node_index, distance_km, weight.
+    """
+    idx, dist_km, weights = nearest_nodes(
+        sites["lat"].to_numpy(), sites["lon"].to_numpy(),
+        nodes["latitude"].to_numpy(), nodes["longitude"].to_numpy(),
+        k=k, power=power,
+    )
+    n_sites, k = idx.shape
+    keep = np.ones_like(dist_km, dtype=bool) if max_km is None else dist_km <= max_km
+    weights = np.where(keep, weights, 0.0)
+    total = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+    keep = keep.ravel()
+    return pd.DataFrame({
+        "site_id": np.repeat(sites["site_id"].to_numpy(), k)[keep],
+        "site_index": np.repeat(np.arange(n_sites, dtype="int32"), k)[keep],
+        "location": nodes.index.to_numpy()[idx.ravel()][keep],
+        "node_index": idx.ravel().astype("int32")[keep],
+        "distance_km": dist_km.ravel().astype("float32")[keep],
+        "weight": weights.ravel().astype("float32")[keep],
+    })
+
+
+def mapping_matrix(mapping, n_sites, n_nodes):
+    """Sparse (sites x nodes) CSR weight matrix from a long-form mapping."""
+    return sp.csr_matrix(
+        (mapping["weight"].to_numpy(), (mapping["site_index"].to_numpy(), mapping["node_index"].to_numpy())),
+        shape=(n_sites, n_nodes),
+    )
+
+
+def site_price_stats(W, prices):
+    """
+    Per-site price statistics from node prices.
+
+    W: (sites x nodes) sparse weights; prices: (nodes, intervals).
+    Returns a DataFrame with lmp_mean, lmp_std, lmp_p95 per site, NaN for
+    sites with no weights (no node within range).
+    """
+    site_prices = np.asarray(W @ prices, dtype="float32")                # (sites, intervals)
+    site_prices[~mapped_sites(W)] = np.nan
+    return pd.DataFrame({
+        "lmp_mean": site_prices.mean(axis=1),
+        "lmp_std": site_prices.std(axis=1),
+        "lmp_p95": np.percentile(site_prices, 95, axis=1).astype("float32"),
+    })
+
+
+def mapped_sites(W):
+    """Boolean mask of sites (rows of a CSR W) with at least one node in range."""
+    return np.diff(W.indptr) > 0
+
+
+def load_node_mapping(sites, nodes, store_dir, name, k=3, power=2.0, max_km=LMP_NODE_MAX_KM):
+    """
+    Build or reuse a persisted mapping in `store_dir`, keyed by the site and node coordinates.
+    """
+    h = hashlib.sha1(f"{k}:{power}:{max_km}".encode())
+    h.update(pd.util.hash_pandas_object(sites[["site_id", "lat", "lon"]], index=False).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(nodes[["latitude", "longitude"]], index=True).to_numpy().tobytes())
+    path = os.path.join(store_dir, f"node-map-{name}-{h.hexdigest()[:16]}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    mapping = build_node_mapping(sites, nodes, k=k, power=power, max_km=max_km)
+    os.makedirs(store_dir, exist_ok=True)
+    write_parquet(mapping, path)
+    return mapping
@@ -0,0 +1,78 @@
+"""Load test for the scoring API (api.py).
+
+Fires a mix of /scores, /threshold and /topk requests from concurrent
+asyncio clients for a fixed duration and reports throughput and latency.
+
+    uvicorn api:app --workers 4 --port 8000
+    python loadtest.py --url http://127.0.0.1:8000 --concurrency 64 --duration 30
+
+For scale-representative numbers, serve the generate_national.py dataset
+instead (config reads its paths from DRIFTNET_DATA_DIR):
+
+    python generate_national.py --out data/synthetic
+    DRIFTNET_DATA_DIR=data/synthetic uvicorn api:app --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+
+from data_processing import SCORE_COLUMNS
+
+
+def random_request(rng):
+    """Return (method, path, json body) for one randomized query."""
+    kind = rng.choice(["scores", "threshold", "topk"])
+    if kind == "scores":
+        return "GET", "/scores?columns=power_score,fiber_score", None
+    thresholds = {c: rng.randint(0, 80) for c in rng.sample(SCORE_COLUMNS, rng.randint(1, 3))}
+    if kind == "threshold":
+        return "POST", "/threshold", {"thresholds": thresholds, "columns": list(thresholds)}
+    weights = {c: rng.randint(1, 5) for c in rng.sample(SCORE_COLUMNS, 3)}
+    return "POST", "/topk", {"thresholds": thresholds, "weights": weights, "k": 25}
+
+
+async def worker(client, deadline, rng, latencies, errors):
+    while time.perf_counter() < deadline:
+        method, path, body = random_request(rng)
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, path, json=body)
+            if resp.status_code != 200:
+                errors.append(resp.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(url, concurrency, duration, seed):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+    headers = {"Accept-Encoding": "gzip"}
+    async with httpx.AsyncClient(base_url=url, limits=limits, headers=headers, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            worker(client, deadline, random.Random(seed + i), latencies, errors)
+            for i in range(concurrency)
+        ))
+
+    lat_ms = np.array(latencies) * 1000
+    print(f"requests: {len(lat_ms)}  errors: {len(errors)}")
+    print(f"throughput: {len(lat_ms) / duration:.1f} req/s")
+    if len(lat_ms):
+        p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99])
+        print(f"latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {lat_ms.max():.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration, args.seed))
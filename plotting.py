@@ -2,17 +2,20 @@ import plotly.express as px
 import numpy as np
 import pandas as pd
 
-def filter_master_df(df, thresholds: dict):
+from scoring import threshold_mask, range_mask
+
+def filter_master_df(df, thresholds: dict, ranges=None):
     """
     Return a new DataFrame in which each 'fips' row passes
     ALL of the thresholds in the dictionary.
     thresholds: {"water_score": 80, "land_score": 70, ...}
+    ranges: optional native-unit bounds from scoring.compile_range_filters
     """
-    df["passes"] = 1
-    for col, min_val in thresholds.items():
-        # Any row where col < min_val (or is NaN) should be marked 0
-        mask_fails = df[col].fillna(-1) < min_val
-        df.loc[mask_fails, "passes"] = np.nan
+    # Rows where any col < min_val (or is NaN) are marked NaN
+    mask = threshold_mask(df, thresholds)
+    if ranges is not None:
+        mask &= range_mask(df, ranges)
+    df["passes"] = np.where(mask, 1.0, np.nan)
     return df
 
 def get_cmap(max_priority_col):
@@ -87,31 +90,85 @@ def make_choropleth_threshold(df_marked, max_priority, county_geojson, color_the
     )
     return choropleth
 
-def make_zoomed_choropleth(df_marked, max_priority, county_geojson, region_name, core_market_fips_dict, color_theme="Viridis"):
-    # Get FIPS list for selected region
-    region_fips = core_market_fips_dict[region_name]
-    
-    # Filter dataframe to only selected region's FIPS
-    df_filtered = df_marked[df_marked["fips"].isin(region_fips)]
-    
-    # Plot the choropleth without `scope='usa'` so that it zooms to selected region
+def make_zoomed_choropleth(df_marked, max_priority, region, color_theme="Viridis"):
+    # region: an entry of regions.build_region_index; its rows, geometry subset
+    # and bounds are precomputed, so no filtering or fitbounds pass here
+    df_filtered = df_marked.iloc[region["rows"]]
+
     choropleth = px.choropleth(
         df_filtered,
-        geojson=county_geojson,
+        geojson=region["geojson"],
         locations="fips",
         color="color_val",
         color_continuous_scale=color_theme,
         range_color=(0, 100),
         labels={"color_val": f"{max_priority}"},
     )
-    
+
+    lon_min, lat_min, lon_max, lat_max = region["bounds"]
     choropleth.update_geos(
-        fitbounds="locations",  # automatically zoom to the included counties
-        #visible=False           # remove base map (optional)
+        lonaxis_range=[lon_min, lon_max],
+        lataxis_range=[lat_min, lat_max],
+        center=region["center"],
+    )
+
+    choropleth.update_layout(
+        title=f"{region['label']} - {max_priority} Score",
+        template='plotly',
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=500
+    )
+    return choropleth
+
+def make_hex_choropleth(df_hex, max_priority, hex_geojson, color_theme="Viridis", region=None):
+    # df_hex: hexgrid.hex_scores output with color_val; hex_geojson ids are str(cell_id).
+    # Cells' own LMP stats (hexgrid.load_hex_lmp_stats), when present, show on hover
+    lmp_cols = [c for c in ["lmp_mean", "lmp_p95"] if c in df_hex.columns]
+    choropleth = px.choropleth(
+        df_hex.assign(cell=df_hex["cell_id"].astype(str)),
+        geojson=hex_geojson,
+        locations="cell",
+        color="color_val",
+        color_continuous_scale=color_theme,
+        range_color=(0, 100),
+        scope=None if region else "usa",
+        labels={"color_val": f"{max_priority}", "lmp_mean": "LMP mean ($/MWh)", "lmp_p95": "LMP p95 ($/MWh)"},
+        hover_data={c: ":.2f" for c in lmp_cols},
+    )
+    if region:
+        lon_min, lat_min, lon_max, lat_max = region["bounds"]
+        choropleth.update_geos(lonaxis_range=[lon_min, lon_max], lataxis_range=[lat_min, lat_max], center=region["center"])
+    choropleth.update_traces(marker_line_width=0)
+    choropleth.update_layout(
+        template='plotly',
+        plot_bgcolor='rgba(0, 0, 0, 0)',
+        paper_bgcolor='rgba(0, 0, 0, 0)',
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=500
+    )
+    return choropleth
+
+DELTA_COLORS = {"Gained": "#1a9850", "Lost": "#d73027", "In both": "#bdbdbd"}
+
+def make_delta_choropleth(df_delta, county_geojson, label_a, label_b):
+    # df_delta: fips plus scenarios.diff_scenarios columns; counties in neither
+    # scenario are left out so they draw blank
+    status = df_delta["status"].map({1.0: "Gained", -1.0: "Lost", 0.0: "In both"})
+    df_plot = df_delta.assign(change=status).dropna(subset=["change"])
+    choropleth = px.choropleth(
+        df_plot,
+        geojson=county_geojson,
+        locations="fips",
+        color="change",
+        color_discrete_map=DELTA_COLORS,
+        category_orders={"change": list(DELTA_COLORS)},
+        hover_data={"rank_a": True, "rank_b": True, "rank_change": True},
+        scope="usa",
     )
-    
     choropleth.update_layout(
-        title=f"{region_name} - {max_priority} Score",
+        title=f"{label_b} vs {label_a}",
         template='plotly',
         plot_bgcolor='rgba(0, 0, 0, 0)',
         paper_bgcolor='rgba(0, 0, 0, 0)',
@@ -157,6 +214,31 @@ def census_blockgroup_choropleth(gdf, max_priority, core_market, cmap, threshold
     )
     return fig
 
+def make_market_static_choropleth(gdf_marked, max_priority, core_market, color_theme="Viridis"):
+    # Static export variant of census_blockgroup_choropleth: a geo map fitted
+    # to the market, with no basemap tiles so kaleido can render it offline.
+    # gdf_marked: the market's block groups after filter_master_df
+    gdf = gdf_marked.to_crs(epsg=4326)
+    fig = px.choropleth(
+        gdf.assign(color_val=gdf[max_priority] * gdf["passes"]),
+        geojson=gdf.__geo_interface__,
+        locations=gdf.index,
+        color="color_val",
+        color_continuous_scale=color_theme,
+        range_color=(0, 100),
+        labels={"color_val": f"{max_priority}"},
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_traces(marker_line_width=0.2)
+    fig.update_layout(
+        title=f"{core_market} - {max_priority}",
+        template='plotly',
+        margin=dict(l=0, r=0, t=40, b=0),
+        width=900,
+        height=700
+    )
+    return fig
+
 def plot_lmp_map(hourly, title=None, dot_size=12):
     """
     Given a DataFrame `hourly` with columns latitude, longitude, lmp,
@@ -176,10 +258,10 @@ def plot_lmp_map(hourly, title=None, dot_size=12):
         color_continuous_scale="Turbo",
         zoom=4,
         mapbox_style="open-street-map",
+        # Live-ingested intervals carry UTC times only
         hover_data={
             "lmp": ":.2f",
-            "interval_start_local": True,
-            "interval_end_local": True,
+            **{c: True for c in ["interval_start_local", "interval_end_local"] if c in hourly.columns},
             "interval_start_utc": True,
             "interval_end_utc": True
         }
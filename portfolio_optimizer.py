@@ -0,0 +1,327 @@
+"""Generation and storage portfolio sizing with an hourly dispatch LP.
+
+For one county and a set of allowed generation / storage technologies,
+`optimize_portfolio` chooses capacities and an hourly dispatch over a set
+of representative days that serve the load at least annualized cost:
+
+    min  capex(capacities) + Σ_d w_d Σ_h [var cost · gen + LMP · grid + VOLL · unserved]
+    s.t. gen + discharge − charge + grid + unserved = load        (every hour)
+         grid = 0 during the outage window
+         gen_g ≤ availability_g · cap_g,  charge/discharge ≤ P_s,  soc ≤ E_s
+         soc evolves with charge/discharge efficiency, cyclic per representative day
+         Σ renewable gen ≥ target · Σ load                         (weighted by w_d)
+         firm capacity ≥ reliability factor · peak load
+
+Solved with SciPy's HiGHS backend (`scipy.optimize.linprog`). Solar and wind
+availability are synthetic, seeded per county: clear-sky solar from the
+county centroid's latitude and longitude, and a diurnal wind profile with
+seeded AR(1) noise. Compressing the year to representative days keeps each
+solve to a few thousand variables.
+
+Grid import is unlimited except in one outage: an extra copy of the
+highest-load representative day (taking one day of its original's weight)
+loses the grid for GRID_OUTAGE_HOURS from its peak hour. Load the allowed
+local generation and storage cannot carry through it goes unserved at VOLL,
+and that is what reliability_pct reports.
+
+HiGHS through linprog cannot be warm started, so repeat queries are served
+from a per-(county, inputs) cache instead (see streamlit_app).
+"""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+from scipy.signal import lfilter
+
+from requirements_compiler import IMPORTANCE_LEVELS
+
+# Annualized capex ($/MW-yr), variable cost ($/MWh), renewable flag and
+# availability profile ("solar", "wind" or a constant capacity factor).
+GEN_TECHS = {
+    "Solar":         {"capex": 75_000,  "var": 0.0,  "renewable": True,  "firm": False, "profile": "solar"},
+    "Wind":          {"capex": 120_000, "var": 0.0,  "renewable": True,  "firm": False, "profile": "wind"},
+    "Hydroelectric": {"capex": 250_000, "var": 5.0,  "renewable": True,  "firm": True,  "profile": 0.45},
+    "Geothermal":    {"capex": 400_000, "var": 10.0, "renewable": True,  "firm": True,  "profile": 0.90},
+    "Biomass":       {"capex": 300_000, "var": 45.0, "renewable": True,  "firm": True,  "profile": 0.85},
+    "Natural Gas":   {"capex": 90_000,  "var": 40.0, "renewable": False, "firm": True,  "profile": 0.95},
+    "Nuclear":       {"capex": 650_000, "var": 12.0, "renewable": False, "firm": True,  "profile": 0.92},
+}
+
+# Annualized capex per MW of power and per MWh of energy, round-trip split
+# into charge / discharge efficiency, and the allowed energy/power ratio (h).
+STORAGE_TECHS = {
+    "Battery Storage": {"capex_p": 35_000, "capex_e": 25_000, "eff": 0.90, "duration": (1, 8)},
+    "Pumped Hydro":    {"capex_p": 90_000, "capex_e": 8_000,  "eff": 0.80, "duration": (6, 24)},
+    "Hydrogen":        {"capex_p": 120_000, "capex_e": 1_000, "eff": 0.40, "duration": (12, 24)},
+    "Thermal Storage": {"capex_p": 45_000, "capex_e": 6_000,  "eff": 0.70, "duration": (4, 16)},
+}
+
+VOLL = 10_000           # $/MWh of unserved load
+GRID_ADDER = 15.0       # $/MWh transmission & delivery on top of LMP
+CARBON_PRICE = 30.0     # $/MWh penalty per sustainability level on fossil gen + grid
+GRID_OUTAGE_HOURS = 8   # consecutive hours per year without grid import
+
+
+def solar_profile(lat, lon, hours):
+    """Clear-sky capacity factor per UTC hour for a site at (lat, lon)."""
+    doy = np.asarray(hours.dayofyear)
+    solar_time = (np.asarray(hours.hour) + lon / 15.0) % 24
+    decl = np.radians(23.44) * np.sin(2 * np.pi * (284 + doy) / 365)
+    hour_angle = np.radians(15 * (solar_time - 12))
+    lat_r = np.radians(lat)
+    elevation = np.sin(lat_r) * np.sin(decl) + np.cos(lat_r) * np.cos(decl) * np.cos(hour_angle)
+    return np.clip(elevation, 0, None) * 0.8
+
+
+def wind_profile(seed, hours, mean_cf=0.35):
+    """Seeded wind capacity factor: night-peaking diurnal shape plus AR(1) noise."""
+    rng = np.random.default_rng(seed)
+    ar = lfilter([1.0], [1.0, -0.9], rng.normal(0, 0.15, len(hours)))
+    diurnal = 0.1 * np.cos(2 * np.pi * (np.asarray(hours.hour) - 3) / 24)
+    return np.clip(mean_cf + diurnal + 0.3 * ar, 0, 1)
+
+
+def monthly_representative_days(prices, hours):
+    """
+    Pick one representative day per month: the day closest (RMSE) to the
+    month's mean daily price profile, weighted by the number of days it stands for.
+
+    Returns (day start positions into `hours`, weights in days).
+    """
+    days = pd.Series(np.arange(len(hours)), index=hours).groupby(hours.normalize())
+    starts = np.array([idx.iloc[0] for _, idx in days if len(idx) == 24])
+    profiles = prices[starts[:, None] + np.arange(24)]                   # (days, 24)
+    months = np.asarray(hours[starts].month)
+
+    reps, weights = [], []
+    for m in np.unique(months):
+        in_month = np.flatnonzero(months == m)
+        centre = profiles[in_month].mean(axis=0)
+        best = in_month[np.argmin(((profiles[in_month] - centre) ** 2).mean(axis=1))]
+        reps.append(starts[best])
+        weights.append(len(in_month))
+    return np.array(reps), np.array(weights, dtype=float)
+
+
+def optimize_portfolio(
+    lat,
+    lon,
+    seed,
+    prices,
+    hours,
+    load_mw,
+    generation_sources,
+    storage_technologies,
+    renewable_perc=50,
+    cost_importance="Medium Importance",
+    reliability_importance="Medium Importance",
+    sustainability_importance="Medium Importance",
+    representative_days=None,
+):
+    """
+    Size a generation + storage portfolio for one site.
+
+    Parameters
+    ----------
+    lat, lon : float
+        Site (county centroid) coordinates, for the solar profile.
+    seed : int
+        Seed for the site's wind profile (e.g. the county FIPS code).
+    prices : ndarray
+        Hourly grid price ($/MWh) aligned with `hours`.
+    hours : DatetimeIndex
+        Hourly UTC timestamps of the price year.
+    load_mw : ndarray or float
+        Hourly load (MW) aligned with `hours`, or flat.
+    generation_sources, storage_technologies : list
+        Allowed technologies (keys of GEN_TECHS / STORAGE_TECHS).
+    renewable_perc : float
+        Minimum share (%) of load served by renewable generation.
+    cost_importance, reliability_importance, sustainability_importance : str
+        Importance answers; reliability sets the firm-capacity requirement,
+        sustainability prices fossil and grid energy, cost scales the grid
+        price sensitivity.
+    representative_days : tuple, optional
+        (day start positions, weights), e.g. from
+        representative_days.load_representative_days; defaults to
+        monthly_representative_days.
+
+    Returns
+    -------
+    dict
+        status, generation (MWh/yr by source, incl. "Grid"), gen_capacity_mw,
+        storage_power_mw, storage_energy_mwh, cost_per_kwh, renewable_pct,
+        reliability_pct, annual_cost.
+    """
+    prices = np.asarray(prices, dtype=float)
+    load_full = np.broadcast_to(np.asarray(load_mw, dtype=float), prices.shape)
+    starts, weights = representative_days or monthly_representative_days(prices, hours)
+    starts, weights = np.asarray(starts), np.asarray(weights, dtype=float)
+    # Outage day: a copy of the highest-load representative day, islanded from its peak hour
+    stress = int(np.argmax(load_full[starts[:, None] + np.arange(24)].sum(axis=1)))
+    outage_start = min(int(np.argmax(load_full[starts[stress]:starts[stress] + 24])), 24 - GRID_OUTAGE_HOURS)
+    weights = np.append(np.where(np.arange(len(weights)) == stress, np.maximum(weights - 1, 0), weights), 1.0)
+    starts = np.append(starts, starts[stress])
+    idx = (starts[:, None] + np.arange(24)).ravel()
+    w = np.repeat(weights, 24)                                          # hour weights (days)
+    T = len(idx)
+    outage = np.zeros(T, dtype=bool)
+    outage[T - 24 + outage_start:T - 24 + outage_start + GRID_OUTAGE_HOURS] = True
+    load = load_full[idx]
+    price = prices[idx]
+    rep_hours = hours[idx]
+
+    gens = [g for g in generation_sources if g in GEN_TECHS]
+    stores = [s for s in storage_technologies if s in STORAGE_TECHS]
+    sustain = IMPORTANCE_LEVELS.get(sustainability_importance, 2)
+    reliability = IMPORTANCE_LEVELS.get(reliability_importance, 2)
+    cost_weight = 0.5 + 0.25 * IMPORTANCE_LEVELS.get(cost_importance, 2)
+
+    avail = {}
+    for g in gens:
+        prof = GEN_TECHS[g]["profile"]
+        if prof == "solar":
+            avail[g] = solar_profile(lat, lon, rep_hours)
+        elif prof == "wind":
+            avail[g] = wind_profile(seed, hours)[idx]
+        else:
+            avail[g] = np.full(T, prof)
+
+    # Variable layout: [cap_g | gen_g,t | P_s, E_s | ch_s,t, dis_s,t, soc_s,t | grid_t | unserved_t]
+    nG, nS = len(gens), len(stores)
+    o_cap = 0
+    o_gen = o_cap + nG
+    o_sp = o_gen + nG * T
+    o_se = o_sp + nS
+    o_ch = o_se + nS
+    o_dis = o_ch + nS * T
+    o_soc = o_dis + nS * T
+    o_grid = o_soc + nS * T
+    o_un = o_grid + T
+    n = o_un + T
+
+    c = np.zeros(n)
+    carbon = CARBON_PRICE * sustain
+    for i, g in enumerate(gens):
+        spec = GEN_TECHS[g]
+        c[o_cap + i] = spec["capex"]
+        c[o_gen + i * T:o_gen + (i + 1) * T] = w * (spec["var"] + (0 if spec["renewable"] else carbon))
+    for j, s in enumerate(stores):
+        c[o_sp + j] = STORAGE_TECHS[s]["capex_p"]
+        c[o_se + j] = STORAGE_TECHS[s]["capex_e"]
+        c[o_dis + j * T:o_dis + (j + 1) * T] = w * 0.5                # small cycling cost
+    c[o_grid:o_grid + T] = w * (cost_weight * (price + GRID_ADDER) + carbon)
+    c[o_un:o_un + T] = w * VOLL
+
+    t = np.arange(T)
+    eq_rows, eq_cols, eq_vals, b_eq = [], [], [], []
+    ub_rows, ub_cols, ub_vals, b_ub = [], [], [], []
+
+    def add(rows, cols, vals, r, cidx, v):
+        rows.append(np.broadcast_to(r, np.shape(cidx)).ravel())
+        cols.append(np.ravel(cidx))
+        vals.append(np.broadcast_to(v, np.shape(cidx)).ravel())
+
+    # Hourly energy balance
+    for i in range(nG):
+        add(eq_rows, eq_cols, eq_vals, t, o_gen + i * T + t, 1.0)
+    for j in range(nS):
+        add(eq_rows, eq_cols, eq_vals, t, o_dis + j * T + t, 1.0)
+        add(eq_rows, eq_cols, eq_vals, t, o_ch + j * T + t, -1.0)
+    add(eq_rows, eq_cols, eq_vals, t, o_grid + t, 1.0)
+    add(eq_rows, eq_cols, eq_vals, t, o_un + t, 1.0)
+    b_eq.append(load)
+    row = T
+
+    # Storage state of charge, cyclic within each representative day
+    prev = (t - 1) % 24 + (t // 24) * 24
+    for j, s in enumerate(stores):
+        eff = np.sqrt(STORAGE_TECHS[s]["eff"])
+        r = row + t
+        add(eq_rows, eq_cols, eq_vals, r, o_soc + j * T + t, 1.0)
+        add(eq_rows, eq_cols, eq_vals, r, o_soc + j * T + prev, -1.0)
+        add(eq_rows, eq_cols, eq_vals, r, o_ch + j * T + t, -eff)
+        add(eq_rows, eq_cols, eq_vals, r, o_dis + j * T + t, 1.0 / eff)
+        b_eq.append(np.zeros(T))
+        row += T
+
+    # Availability: gen_g,t − avail_g,t · cap_g ≤ 0
+    urow = 0
+    for i, g in enumerate(gens):
+        r = urow + t
+        add(ub_rows, ub_cols, ub_vals, r, o_gen + i * T + t, 1.0)
+        add(ub_rows, ub_cols, ub_vals, r, np.full(T, o_cap + i), -avail[g])
+        b_ub.append(np.zeros(T))
+        urow += T
+
+    # Storage power and energy limits, and duration bounds
+    for j, s in enumerate(stores):
+        for off in (o_ch, o_dis):
+            r = urow + t
+            add(ub_rows, ub_cols, ub_vals, r, off + j * T + t, 1.0)
+            add(ub_rows, ub_cols, ub_vals, r, np.full(T, o_sp + j), -1.0)
+            b_ub.append(np.zeros(T))
+            urow += T
+        r = urow + t
+        add(ub_rows, ub_cols, ub_vals, r, o_soc + j * T + t, 1.0)
+        add(ub_rows, ub_cols, ub_vals, r, np.full(T, o_se + j), -1.0)
+        b_ub.append(np.zeros(T))
+        urow += T
+        lo, hi = STORAGE_TECHS[s]["duration"]
+        add(ub_rows, ub_cols, ub_vals, np.array([urow, urow]), np.array([o_sp + j, o_se + j]), np.array([lo, -1.0]))
+        add(ub_rows, ub_cols, ub_vals, np.array([urow + 1, urow + 1]), np.array([o_se + j, o_sp + j]), np.array([1.0, -hi]))
+        b_ub.append(np.zeros(2))
+        urow += 2
+
+    # Renewable share: −Σ w · renewable gen ≤ −target · Σ w · load
+    renew = [i for i, g in enumerate(gens) if GEN_TECHS[g]["renewable"]]
+    if renewable_perc > 0:
+        for i in renew:
+            add(ub_rows, ub_cols, ub_vals, np.full(T, urow), o_gen + i * T + t, -w)
+        b_ub.append(np.array([-renewable_perc / 100 * (w * load).sum()]))
+        urow += 1
+
+    # Firm capacity: −(Σ firm cap + Σ storage power) ≤ −factor · peak load
+    firm = [o_cap + i for i, g in enumerate(gens) if GEN_TECHS[g]["firm"]] + [o_sp + j for j in range(nS)]
+    if reliability and firm:
+        add(ub_rows, ub_cols, ub_vals, np.full(len(firm), urow), np.array(firm), -1.0)
+        b_ub.append(np.array([-0.25 * reliability * load.max()]))
+        urow += 1
+
+    A_eq = sp.csr_matrix((np.concatenate(eq_vals), (np.concatenate(eq_rows), np.concatenate(eq_cols))), shape=(row, n))
+    # With no technologies allowed the inequality block may have rows but no entries
+    ub_vals, ub_rows, ub_cols = ([*parts, np.empty(0, dtype=dt)] for parts, dt in [(ub_vals, float), (ub_rows, int), (ub_cols, int)])
+    A_ub = sp.csr_matrix((np.concatenate(ub_vals), (np.concatenate(ub_rows), np.concatenate(ub_cols))), shape=(urow, n))
+    bounds = np.column_stack([np.zeros(n), np.full(n, np.inf)])
+    bounds[o_grid + np.flatnonzero(outage), 1] = 0.0
+    res = linprog(c, A_ub=A_ub if urow else None, b_ub=np.concatenate(b_ub) if urow else None, A_eq=A_eq, b_eq=np.concatenate(b_eq),
+                  bounds=bounds, method="highs")
+    if res.status != 0:
+        return {"status": res.message}
+
+    x = res.x
+    generation = {g: float((w * x[o_gen + i * T:o_gen + (i + 1) * T]).sum()) for i, g in enumerate(gens)}
+    generation["Grid"] = float((w * x[o_grid:o_grid + T]).sum())
+    energy = float((w * load).sum())
+    unserved = float((w * x[o_un:o_un + T]).sum())
+    # Out-of-pocket cost: objective without the carbon, importance and VOLL terms
+    annual_cost = float(
+        sum(GEN_TECHS[g]["capex"] * x[o_cap + i] + GEN_TECHS[g]["var"] * (w * x[o_gen + i * T:o_gen + (i + 1) * T]).sum()
+            for i, g in enumerate(gens))
+        + sum(STORAGE_TECHS[s]["capex_p"] * x[o_sp + j] + STORAGE_TECHS[s]["capex_e"] * x[o_se + j]
+              for j, s in enumerate(stores))
+        + (w * (price + GRID_ADDER) * x[o_grid:o_grid + T]).sum()
+    )
+    renewable_mwh = sum(generation[gens[i]] for i in renew)
+    return {
+        "status": "optimal",
+        "generation": generation,
+        "gen_capacity_mw": {g: float(x[o_cap + i]) for i, g in enumerate(gens)},
+        "storage_power_mw": {s: float(x[o_sp + j]) for j, s in enumerate(stores)},
+        "storage_energy_mwh": {s: float(x[o_se + j]) for j, s in enumerate(stores)},
+        "annual_cost": annual_cost,
+        "cost_per_kwh": annual_cost / energy / 1000 if energy else 0.0,
+        "renewable_pct": 100 * renewable_mwh / energy if energy else 0.0,
+        "reliability_pct": 100 * (1 - unserved / energy) if energy else 100.0,
+    }
@@ -0,0 +1,217 @@
+"""Opt-in whole-rerun profiling for streamlit_app.py.
+
+Enable with the env var DRIFTNET_PROFILE=1 or the query parameter ?profile=1.
+Each rerun is then sampled with pyinstrument (every frame, including pandas
+internals and Plotly serialization) and traced with tracemalloc, and two
+files are written to PROFILE["dir"]:
+
+    {stamp}-{label}.speedscope.json   flame graph (open at speedscope.app)
+    {stamp}-{label}.summary.json      wall time, per-function self / total
+                                      time, peak memory, top allocation sites
+
+Compare two captures (e.g. before / after a change to the Map tab's
+threshold -> choropleth path):
+
+    python profiling.py compare data/store/profiles/A.summary.json data/store/profiles/B.summary.json
+    python profiling.py list
+
+tracemalloc is process-wide: concurrent captures share one trace (started
+by the first, stopped by the last), so their peak memory and allocation
+sites include the other sessions' work. Profile one session at a time for
+clean memory numbers.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+
+from config import PROFILE
+
+_SESSION_KEY = "_rerun_profile"
+
+# Captures currently running in this process, guarding tracemalloc start/stop
+_tracing_lock = threading.Lock()
+_active_captures = 0
+
+
+def _acquire_tracing():
+    global _active_captures
+    with _tracing_lock:
+        if _active_captures == 0:
+            tracemalloc.start(PROFILE["trace_frames"])
+            tracemalloc.reset_peak()
+        _active_captures += 1
+
+
+def _release_tracing():
+    global _active_captures
+    with _tracing_lock:
+        _active_captures -= 1
+        if _active_captures == 0:
+            tracemalloc.stop()
+
+
+def profiling_requested(query_params=None):
+    """True when the env var or the `profile` query parameter asks for a capture."""
+    if os.environ.get(PROFILE["env_var"], "") not in ("", "0"):
+        return True
+    return query_params is not None and query_params.get("profile") == "1"
+
+
+def start_rerun_profile(state, label="rerun"):
+    """
+    Start sampling and allocation tracing for this rerun.
+
+    `state` is st.session_state; a capture left running by a rerun that
+    raised is discarded first.
+    """
+    stale = state.get(_SESSION_KEY)
+    if stale is not None:
+        stale["profiler"].stop()
+        _release_tracing()
+    _acquire_tracing()
+    profiler = Profiler(interval=PROFILE["interval_s"], async_mode="disabled")
+    profiler.start()
+    state[_SESSION_KEY] = {"profiler": profiler, "label": label, "t0": time.perf_counter()}
+
+
+def stop_rerun_profile(state, label=None, out_dir=PROFILE["dir"]):
+    """
+    Stop the running capture (if any) and write its flame graph and summary.
+
+    Call before st.stop() as well as at the end of the script, so early
+    exits are captured too. Returns the summary path, or None.
+    """
+    handle = state.pop(_SESSION_KEY, None)
+    if handle is None:
+        return None
+    session = handle["profiler"].stop()
+    wall_s = time.perf_counter() - handle["t0"]
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        _release_tracing()
+
+    os.makedirs(out_dir, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+    stem = os.path.join(out_dir, f"{stamp}-{label or handle['label']}")
+    with open(f"{stem}.speedscope.json", "w") as f:
+        f.write(SpeedscopeRenderer().render(session))
+    summary = {
+        "label": label or handle["label"],
+        "wall_s": round(wall_s, 4),
+        "sampled_s": round(session.duration, 4),
+        "peak_mb": round(peak / 2**20, 2),
+        "functions": function_times(session.root_frame()),
+        "allocations": allocation_summary(snapshot),
+    }
+    with open(f"{stem}.summary.json", "w") as f:
+        json.dump(summary, f, indent=1)
+    return f"{stem}.summary.json"
+
+
+def function_times(root, top=PROFILE["top_functions"]):
+    """
+    Self and total seconds per function from a pyinstrument frame tree.
+
+    Total time counts a function once per stack, so recursion is not
+    double-counted. Returns the `top` functions by total time.
+    """
+    self_s, total_s = defaultdict(float), defaultdict(float)
+    stack = [(root, frozenset())] if root is not None else []
+    while stack:
+        frame, ancestors = stack.pop()
+        # Synthetic [self] / [await] leaves are already in their parent's total_self_time
+        children = [c for c in frame.children if not c.is_synthetic]
+        key = f"{frame.function} ({os.path.basename(frame.file_path or '?')}:{frame.line_no})"
+        self_s[key] += frame.total_self_time
+        if key not in ancestors:
+            total_s[key] += frame.time
+        stack.extend((child, ancestors | {key}) for child in children)
+    ranked = sorted(total_s, key=total_s.get, reverse=True)[:top]
+    return {k: {"total_s": round(total_s[k], 4), "self_s": round(self_s[k], 4)} for k in ranked}
+
+
+def allocation_summary(snapshot, top=PROFILE["top_allocations"]):
+    """Live allocations at the end of the rerun: top source lines and totals per package."""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "*/pyinstrument/*"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    lines = snapshot.statistics("lineno")
+    by_package = defaultdict(float)
+    for stat in snapshot.statistics("filename"):
+        path = stat.traceback[0].filename
+        package = path.split("site-packages/")[1].split("/")[0] if "site-packages/" in path else os.path.basename(path)
+        by_package[package] += stat.size / 2**20
+    return {
+        "lines": [
+            {"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "mb": round(s.size / 2**20, 3), "count": s.count}
+            for s in lines[:top]
+        ],
+        "packages_mb": {k: round(v, 3) for k, v in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]},
+    }
+
+
+def compare_summaries(a, b, top=20):
+    """
+    Differences between two capture summaries (b - a).
+
+    Returns
+    -------
+    dict
+        wall_s / peak_mb deltas, and the `top` functions and packages by
+        absolute change in total time / allocated MB.
+    """
+    def deltas(x, y, field=None):
+        keys = set(x) | set(y)
+        get = (lambda d, k: d.get(k, {}).get(field, 0.0)) if field else (lambda d, k: d.get(k, 0.0))
+        rows = [(k, get(x, k), get(y, k)) for k in keys]
+        rows.sort(key=lambda r: abs(r[2] - r[1]), reverse=True)
+        return [{"name": k, "a": round(va, 4), "b": round(vb, 4), "delta": round(vb - va, 4)} for k, va, vb in rows[:top]]
+
+    return {
+        "wall_s": {"a": a["wall_s"], "b": b["wall_s"], "delta": round(b["wall_s"] - a["wall_s"], 4)},
+        "peak_mb": {"a": a["peak_mb"], "b": b["peak_mb"], "delta": round(b["peak_mb"] - a["peak_mb"], 2)},
+        "functions": deltas(a["functions"], b["functions"], "total_s"),
+        "packages_mb": deltas(a["allocations"]["packages_mb"], b["allocations"]["packages_mb"]),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Inspect and compare rerun profiles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List captures in the profile directory")
+    cmp_ = sub.add_parser("compare", help="Compare two .summary.json captures (b - a)")
+    cmp_.add_argument("a")
+    cmp_.add_argument("b")
+    cmp_.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for path in sorted(glob.glob(os.path.join(PROFILE["dir"], "*.summary.json"))):
+            with open(path) as f:
+                s = json.load(f)
+            print(f"{os.path.basename(path)}  wall {s['wall_s']:.3f}s  peak {s['peak_mb']:.1f} MB")
+    else:
+        with open(args.a) as fa, open(args.b) as fb:
+            diff = compare_summaries(json.load(fa), json.load(fb), args.top)
+        for key in ("wall_s", "peak_mb"):
+            d = diff[key]
+            print(f"{key:8s} {d['a']:>10} -> {d['b']:>10}  ({d['delta']:+})")
+        for section, unit in (("functions", "s"), ("packages_mb", "MB")):
+            print(f"\n{section} (largest changes)")
+            for row in diff[section]:
+                print(f"  {row['delta']:+10.4f} {unit}  {row['a']:>10} -> {row['b']:<10} {row['name']}")
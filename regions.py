@@ -0,0 +1,103 @@
+"""Region index for region-scoped map views.
+
+Every selectable region (core connectivity markets, census regions and the
+Preferred Region answers) is resolved once into
+
+    rows     row positions into the master frame
+    fips     the region's county FIPS strings
+    geojson  a FeatureCollection of just those counties
+    bounds   (lon_min, lat_min, lon_max, lat_max) of their geometry
+    center   {"lat", "lon"} of the bounds
+
+so switching region is a dict lookup plus a small payload (df.iloc[rows] and
+the subset geometry) rather than an isin filter over the full frame with the
+national geometry and a Plotly fitbounds pass on every render.
+
+Bounds and center come from a region's contiguous-US counties; Alaska,
+Hawaii and Puerto Rico stay in its rows and geometry but are left to insets,
+so e.g. the census West frames the western states rather than the Pacific.
+Longitudes are wrapped west of 180° first, so the Aleutians never stretch a
+box across the globe.
+"""
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from config import CENSUS_REGION_STATE_FIPS, CORE_MARKET_FIPS_DICT, REGION_STATE_FIPS
+
+# State FIPS left out of region bounds (Alaska, Hawaii, Puerto Rico)
+OUTLYING_STATE_FIPS = ["02", "15", "72"]
+
+REGION_KINDS = {
+    "core": "core market",
+    "census": "census region",
+    "preferred": "preferred region",
+}
+
+
+def region_definitions():
+    """{(kind, name): ("counties" | "states", FIPS list)} for every indexed region."""
+    regions = {("core", name): ("counties", fips) for name, fips in CORE_MARKET_FIPS_DICT.items()}
+    regions.update({("census", name): ("states", states) for name, states in CENSUS_REGION_STATE_FIPS.items()})
+    regions.update({("preferred", name): ("states", states) for name, states in REGION_STATE_FIPS.items() if states})
+    return regions
+
+
+def build_region_index(fips, county_geojson, pad_deg=0.25):
+    """
+    Precompute row positions, geometry subsets and bounds for every region.
+
+    Parameters
+    ----------
+    fips : array-like
+        County FIPS of the master frame, in row order.
+    county_geojson : dict
+        County FeatureCollection whose feature ids are 5-digit FIPS.
+    pad_deg : float
+        Margin added around each region's bounding box.
+
+    Returns
+    -------
+    dict
+        {(kind, name): {"label", "rows", "fips", "geojson", "bounds", "center"}}.
+    """
+    fips = np.asarray(fips).astype(str)
+    features = county_geojson["features"]
+    feature_ids = np.array([f["id"] for f in features])
+    bounds = feature_bounds(features)
+    outlying = np.isin(feature_ids.astype("U2"), OUTLYING_STATE_FIPS)
+
+    index = {}
+    for (kind, name), (level, codes) in region_definitions().items():
+        codes = np.asarray(codes)
+        if level == "states":
+            in_region = np.isin(fips.astype("U2"), codes)
+            in_geometry = np.isin(feature_ids.astype("U2"), codes)
+        else:
+            in_region = np.isin(fips, codes)
+            in_geometry = np.isin(feature_ids, codes)
+
+        feat_pos = np.flatnonzero(in_geometry)
+        framed = feat_pos[~outlying[feat_pos]] if (~outlying[feat_pos]).any() else feat_pos
+        lon_min, lat_min = bounds[framed, :2].min(axis=0) - pad_deg
+        lon_max, lat_max = bounds[framed, 2:].max(axis=0) + pad_deg
+        index[(kind, name)] = {
+            "label": f"{name} ({REGION_KINDS[kind]})",
+            "rows": np.flatnonzero(in_region),
+            "fips": fips[in_region].tolist(),
+            "geojson": {"type": "FeatureCollection", "features": [features[i] for i in feat_pos]},
+            "bounds": (float(lon_min), float(lat_min), float(lon_max), float(lat_max)),
+            "center": {"lat": float(lat_min + lat_max) / 2, "lon": float(lon_min + lon_max) / 2},
+        }
+    return index
+
+
+def feature_bounds(features):
+    """
+    (features, 4) lon/lat bounds with eastern-hemisphere longitudes wrapped
+    to below -180°, so a county crossing the antimeridian stays one narrow box.
+    """
+    geoms = gpd.GeoDataFrame.from_features(features).geometry.to_numpy()
+    wrapped = shapely.transform(geoms, lambda xy: np.column_stack([np.where(xy[:, 0] > 0, xy[:, 0] - 360, xy[:, 0]), xy[:, 1]]))
+    return shapely.bounds(wrapped)
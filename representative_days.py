@@ -0,0 +1,171 @@
+"""Representative-day compression of hourly LMP (or load) time series.
+
+Every series' complete days are clustered into K representative days with
+k-means on the 24-hour profiles. All series are clustered at once: the
+(series, days, 24) array is processed with batched distance and update
+steps, no per-series loop. Each cluster is represented by its medoid, the
+real day closest to the centroid, so downstream models (cost simulation,
+dispatch optimization) can keep using actual calendar days. The cluster
+size is the medoid's weight in days.
+
+Error metrics per series compare the reconstructed year (every day replaced
+by its cluster's medoid) with the actual one:
+
+    rmse            hourly RMSE ($/MWh)
+    mean_error_pct  error in the annual mean price (%)
+    duration_rmse   RMSE between the sorted (price duration) curves
+
+Results are written to LMP_STORE_DIR keyed by a fingerprint of the input
+file and parameters; `load_representative_days` reuses them on later runs.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import LMP_STORE_DIR
+from cost_simulator import price_matrix
+from storage import write_parquet
+
+
+def daily_profiles(prices, hours):
+    """Split a (series, hours) matrix into complete UTC days: returns ((series, days, 24), day start positions)."""
+    day = np.asarray(hours.normalize().asi8)
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    lengths = np.diff(np.r_[starts, len(day)])
+    starts = starts[lengths == 24]
+    return prices[:, starts[:, None] + np.arange(24)], starts
+
+
+def kmeans_days(profiles, k=12, n_iter=50, seed=0):
+    """
+    Batched k-means over (series, days, 24) daily profiles.
+
+    Returns
+    -------
+    tuple
+        (medoids (series, k) day positions into `profiles`, weights (series, k)
+        in days, labels (series, days)). Empty clusters get weight 0.
+    """
+    S, D, H = profiles.shape
+    k = min(k, D)
+    rng = np.random.default_rng(seed)
+    X = profiles.astype("float32")
+    sq = (X ** 2).sum(axis=2)                                            # (S, D)
+
+    # k-means++ initialization, vectorized across series
+    centers = np.empty((S, k, H), dtype="float32")
+    first = rng.integers(0, D, S)
+    centers[:, 0] = X[np.arange(S), first]
+    closest = sq - 2 * np.einsum("sdh,sh->sd", X, centers[:, 0]) + (centers[:, 0] ** 2).sum(axis=1)[:, None]
+    for c in range(1, k):
+        p = np.clip(closest, 0, None)
+        p = p / np.where(p.sum(axis=1, keepdims=True) > 0, p.sum(axis=1, keepdims=True), 1)
+        cum = p.cumsum(axis=1)
+        pick = (cum < rng.random((S, 1))).sum(axis=1).clip(0, D - 1)
+        centers[:, c] = X[np.arange(S), pick]
+        d_new = sq - 2 * np.einsum("sdh,sh->sd", X, centers[:, c]) + (centers[:, c] ** 2).sum(axis=1)[:, None]
+        closest = np.minimum(closest, d_new)
+
+    labels = np.zeros((S, D), dtype=np.int64)
+    for _ in range(n_iter):
+        dist = sq[:, :, None] - 2 * np.einsum("sdh,skh->sdk", X, centers) + (centers ** 2).sum(axis=2)[:, None, :]
+        new_labels = dist.argmin(axis=2)
+        onehot = np.eye(k, dtype="float32")[new_labels]              # (S, D, k)
+        counts = onehot.sum(axis=1)                                      # (S, k)
+        sums = np.einsum("sdk,sdh->skh", onehot, X)
+        centers = np.where(counts[:, :, None] > 0, sums / np.maximum(counts, 1)[:, :, None], centers)
+        if (new_labels == labels).all():
+            break
+        labels = new_labels
+
+    dist = sq[:, :, None] - 2 * np.einsum("sdh,skh->sdk", X, centers) + (centers ** 2).sum(axis=2)[:, None, :]
+    labels = dist.argmin(axis=2)
+    onehot = np.eye(k, dtype="float32")[labels]
+    weights = onehot.sum(axis=1)
+    # Medoid: the member day nearest its centroid (non-members pushed to +inf)
+    member_dist = np.where(onehot > 0, dist, np.inf)
+    medoids = member_dist.argmin(axis=1)                                 # (S, k)
+    return medoids, weights, labels
+
+
+def reconstruction_errors(profiles, medoids, labels):
+    """Per-series rmse, mean_error_pct and duration_rmse of the medoid reconstruction."""
+    S = profiles.shape[0]
+    rep_day = np.take_along_axis(medoids, labels, axis=1)                # (S, D)
+    recon = profiles[np.arange(S)[:, None], rep_day]                     # (S, D, 24)
+    actual = profiles.reshape(S, -1)
+    recon = recon.reshape(S, -1)
+    mean_actual = actual.mean(axis=1)
+    return pd.DataFrame({
+        "rmse": np.sqrt(((recon - actual) ** 2).mean(axis=1)),
+        "mean_error_pct": 100 * (recon.mean(axis=1) - mean_actual) / np.where(mean_actual != 0, mean_actual, 1),
+        "duration_rmse": np.sqrt(((np.sort(recon, axis=1) - np.sort(actual, axis=1)) ** 2).mean(axis=1)),
+    })
+
+
+def representative_days(prices, hours, k=12, seed=0):
+    """
+    Cluster each series' days into k representative days.
+
+    Returns
+    -------
+    tuple
+        (DataFrame with one row per (series, cluster): series, cluster,
+        day_start (position into `hours`), date, weight; and the per-series
+        error metrics DataFrame).
+    """
+    profiles, starts = daily_profiles(np.asarray(prices), hours)
+    medoids, weights, labels = kmeans_days(profiles, k=k, seed=seed)
+    S, K = medoids.shape
+    day_start = starts[medoids]
+    reps = pd.DataFrame({
+        "series": np.repeat(np.arange(S), K),
+        "cluster": np.tile(np.arange(K), S),
+        "day_start": day_start.ravel(),
+        "date": hours[day_start.ravel()].normalize(),
+        "weight": weights.ravel(),
+    })
+    reps = reps[reps["weight"] > 0].reset_index(drop=True)
+    return reps, reconstruction_errors(profiles, medoids, labels)
+
+
+def load_representative_days(lmp_path, k=12, seed=0, store_dir=LMP_STORE_DIR):
+    """
+    Representative days for every LMP location in `lmp_path`, cached in `store_dir`.
+
+    Returns
+    -------
+    tuple
+        (reps DataFrame with a `location` column, metrics DataFrame indexed by location).
+    """
+    stat = os.stat(lmp_path)
+    key = hashlib.sha1(f"{os.path.abspath(lmp_path)}:{stat.st_size}:{stat.st_mtime_ns}:{k}:{seed}".encode()).hexdigest()[:16]
+    reps_path = os.path.join(store_dir, f"repdays-{key}.parquet")
+    metrics_path = os.path.join(store_dir, f"repdays-{key}.metrics.parquet")
+    if os.path.exists(reps_path) and os.path.exists(metrics_path):
+        return pd.read_parquet(reps_path), pd.read_parquet(metrics_path)
+
+    prices, locations, hours = price_matrix(pd.read_parquet(lmp_path))
+    reps, metrics = representative_days(prices, hours, k=k, seed=seed)
+    reps["location"] = locations[reps["series"].to_numpy()]
+    metrics.index = pd.Index(locations, name="location")
+    os.makedirs(store_dir, exist_ok=True)
+    write_parquet(reps, reps_path)
+    write_parquet(metrics, metrics_path, index=True)
+    return reps, metrics
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build representative days for an LMP Parquet file.")
+    parser.add_argument("lmp_path", nargs="?", default="data/gridstatus_lmp_samples.parquet")
+    parser.add_argument("--k", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    reps, metrics = load_representative_days(args.lmp_path, k=args.k, seed=args.seed)
+    print(f"{reps['location'].nunique()} locations x {args.k} representative days")
+    print(metrics.describe().loc[["mean", "max"]].round(2).to_string())
@@ -0,0 +1,107 @@
+"""Compile Requirements-tab answers into a county query.
+
+`compile_requirements` turns the answers collected by requirements_utils
+(power capacity, redundancy, cooling, site constraints, importance levels,
+region) into the threshold and weight dicts used by scoring.threshold_mask /
+scoring.weighted_score, plus the list of states the preferred region covers.
+No Streamlit here, so the batch CLI and the API can compile the same answers.
+
+All mapping tables live below; adjust them to tune how answers translate.
+"""
+
+import numpy as np
+
+from config import REGION_STATE_FIPS
+
+# power_cap (MW) -> minimum power_score, interpolated between the points
+POWER_CAP_THRESHOLDS = ([0, 20, 50, 100], [0, 40, 55, 70])
+
+# Extra power_score headroom and power weight multiplier per redundancy level
+REDUNDANCY = {
+    "N (Basic)": {"threshold": 0, "weight": 1.0},
+    "N+1 (Standard)": {"threshold": 5, "weight": 1.25},
+    "2N (Full Redundancy)": {"threshold": 10, "weight": 1.5},
+    "2N+1 (Enhanced)": {"threshold": 15, "weight": 1.75},
+}
+
+# Relative water draw of each cooling method (scales the water threshold)
+COOLING_WATER_INTENSITY = {
+    "Air Cooling": 1.0,
+    "Liquid Cooling": 1.3,
+    "Immersion Cooling": 0.5,
+    "Hybrid Cooling": 1.15,
+}
+
+# Site-constraint answers -> minimum score of the matching column
+WATER_USAGE_THRESHOLDS = {"None": 0, "Low Water Usage": 20, "Moderate Water Usage": 40, "High Water Usage": 60}
+LAND_THRESHOLDS = {"None": 0, "Low": 20, "Moderate": 40, "High": 60}
+
+IMPORTANCE_LEVELS = {
+    "No Importance": 0,
+    "Low Importance": 1,
+    "Medium Importance": 2,
+    "High Importance": 3,
+    "Very Important": 4,
+}
+LATENCY_LEVELS = {"Not Important": 0, "Somewhat Important": 1, "Important": 2, "Very Important": 4}
+
+BASE_WEIGHTS = {
+    "power_score": 1.0,
+    "fiber_score": 1.0,
+    "land_score": 1.0,
+    "regulations_score": 1.0,
+    "climate factors_score": 1.0,
+    "future scalability_score": 1.0,
+}
+
+
+def compile_requirements(answers: dict):
+    """
+    Translate requirement answers into a county query.
+
+    Parameters
+    ----------
+    answers : dict
+        Any of: region, power_cap, redundancy, cooling_method,
+        water_constraints, land_constraints, cost_importance,
+        reliability_importance, sustainability_importance, network_latency,
+        proximity. Missing keys fall back to neutral values.
+
+    Returns
+    -------
+    dict
+        {"thresholds": {col: min}, "weights": {col: w}, "states": [state fips]}
+    """
+    redundancy = REDUNDANCY.get(answers.get("redundancy"), REDUNDANCY["N (Basic)"])
+    water_intensity = COOLING_WATER_INTENSITY.get(answers.get("cooling_method"), 1.0)
+
+    power_min = float(np.interp(answers.get("power_cap", 0), *POWER_CAP_THRESHOLDS)) + redundancy["threshold"]
+    water_min = WATER_USAGE_THRESHOLDS.get(answers.get("water_constraints"), 0) * water_intensity
+    land_min = LAND_THRESHOLDS.get(answers.get("land_constraints"), 0)
+    thresholds = {
+        col: round(min(val, 100.0), 1)
+        for col, val in [
+            ("power_score", power_min),
+            ("climate factors_score", water_min),
+            ("land_score", land_min),
+        ]
+        if val > 0
+    }
+
+    cost = IMPORTANCE_LEVELS.get(answers.get("cost_importance"), 2)
+    reliability = IMPORTANCE_LEVELS.get(answers.get("reliability_importance"), 2)
+    sustainability = IMPORTANCE_LEVELS.get(answers.get("sustainability_importance"), 2)
+    latency = LATENCY_LEVELS.get(answers.get("network_latency"), 2)
+    proximity = answers.get("proximity", 50) / 50
+
+    weights = dict(BASE_WEIGHTS)
+    weights["power_score"] *= redundancy["weight"] * (1 + 0.5 * cost + 0.5 * reliability)
+    weights["future scalability_score"] *= 1 + 0.5 * reliability
+    weights["climate factors_score"] *= (1 + 0.5 * sustainability) * water_intensity
+    weights["fiber_score"] *= 1 + 0.5 * latency + 0.5 * proximity
+
+    return {
+        "thresholds": thresholds,
+        "weights": {col: round(w, 3) for col, w in weights.items()},
+        "states": REGION_STATE_FIPS.get(answers.get("region") or "None", []),
+    }
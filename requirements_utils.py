@@ -6,7 +6,8 @@ def render_region_site():
     st.subheader("Region & Site")
     region = st.radio(
         "Preferred Region",
-        ["None", "West Coast", "Northeast", "Southwest", "Midwest", "Southeast"]
+        ["None", "West Coast", "Northeast", "Southwest", "Midwest", "Southeast"],
+        key="preferred_region"
     )
     city = st.text_input(
         "Add specific cities or sites you'd like to consider",
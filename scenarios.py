@@ -0,0 +1,162 @@
+"""Saved scenarios and cheap diffs between threshold/weight configurations.
+
+A scenario is the query a planner ran (thresholds, native-unit filters,
+regulatory weights, priority column, map region) plus its result over the
+master frame: a bitset of passing counties (np.packbits, ~400 bytes for
+3,221 counties) and the float32 priority-score vector. Scenarios are kept
+per team in one Parquet file under SCENARIO_STORE_DIR, tagged with a hash
+of the county order so bitsets from a different frame are never mixed.
+
+Diffs work on the packed bits: gained = B & ~A, lost = A & ~B, and the
+pairwise overlap of every saved scenario is a single boolean matrix product,
+so hundreds of scenarios per team compare in milliseconds.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from config import SCENARIO_STORE_DIR
+from storage import write_parquet
+
+
+def fips_key(fips):
+    """Short hash of the county order a scenario's bitset is aligned with."""
+    return hashlib.sha1("|".join(map(str, fips)).encode()).hexdigest()[:16]
+
+
+def make_scenario(name, mask, scores, config: dict, fips):
+    """
+    Snapshot one query result.
+
+    Parameters
+    ----------
+    name : str
+        Scenario name (unique per team; saving again replaces it).
+    mask : ndarray of bool
+        Passing counties, aligned with `fips`.
+    scores : ndarray
+        Priority score per county (NaN allowed).
+    config : dict
+        JSON-serializable query settings (thresholds, weights, priority, region).
+    fips : array-like
+        County FIPS in master-frame order.
+    """
+    return {
+        "name": name,
+        "created": pd.Timestamp.now(tz="UTC"),
+        "config": json.dumps(config, sort_keys=True, default=str),
+        "fips_key": fips_key(fips),
+        "n": len(mask),
+        "bits": np.packbits(np.asarray(mask, dtype=bool)).tobytes(),
+        "scores": np.asarray(scores, dtype="float32").tobytes(),
+    }
+
+
+def team_slug(team):
+    """
+    File-safe form of a team name: runs of anything but letters, digits,
+    '_' and '-' become '-', so names like "../x" cannot leave the store.
+    Raises ValueError if nothing usable is left.
+    """
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", str(team)).strip("-")
+    if not slug:
+        raise ValueError(f"invalid team name: {team!r}")
+    return slug
+
+
+def _team_path(team, store_dir):
+    return os.path.join(store_dir, f"{team_slug(team)}.parquet")
+
+
+def load_scenarios(team, store_dir=SCENARIO_STORE_DIR):
+    """All saved scenarios of `team`, oldest first (empty frame if none)."""
+    path = _team_path(team, store_dir)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["name", "created", "config", "fips_key", "n", "bits", "scores"])
+    return pd.read_parquet(path)
+
+
+def save_scenario(team, scenario, store_dir=SCENARIO_STORE_DIR):
+    """Add (or replace by name) a scenario in the team file; returns the updated frame."""
+    saved = load_scenarios(team, store_dir)
+    saved = saved[saved["name"] != scenario["name"]]
+    new = pd.DataFrame([scenario])
+    saved = pd.concat([saved, new], ignore_index=True) if len(saved) else new
+    _write(saved, team, store_dir)
+    return saved
+
+
+def delete_scenario(team, name, store_dir=SCENARIO_STORE_DIR):
+    """Drop a scenario by name; returns the updated frame."""
+    saved = load_scenarios(team, store_dir)
+    saved = saved[saved["name"] != name].reset_index(drop=True)
+    _write(saved, team, store_dir)
+    return saved
+
+
+def _write(saved, team, store_dir):
+    os.makedirs(store_dir, exist_ok=True)
+    write_parquet(saved, _team_path(team, store_dir))
+
+
+def scenario_arrays(saved, fips):
+    """
+    Stack saved scenarios aligned with `fips`.
+
+    Returns
+    -------
+    tuple
+        (names, packed bits (S, ceil(N/8)) uint8, scores (S, N) float32).
+
+    Raises
+    ------
+    ValueError
+        If a scenario was saved against a different county order.
+    """
+    stale = saved["fips_key"] != fips_key(fips)
+    if stale.any():
+        raise ValueError(f"scenarios saved on a different county frame: {saved.loc[stale, 'name'].tolist()}")
+    if saved.empty:
+        return [], np.empty((0, 0), dtype=np.uint8), np.empty((0, 0), dtype=np.float32)
+    bits = np.frombuffer(b"".join(saved["bits"]), dtype=np.uint8).reshape(len(saved), -1)
+    scores = np.frombuffer(b"".join(saved["scores"]), dtype=np.float32).reshape(len(saved), -1)
+    return saved["name"].tolist(), bits, scores
+
+
+def passing_ranks(mask, scores):
+    """1-based rank of each passing county by descending score; NaN elsewhere."""
+    ranks = np.full(len(scores), np.nan, dtype="float32")
+    eligible = np.flatnonzero(mask & ~np.isnan(scores))
+    order = eligible[np.argsort(-scores[eligible], kind="stable")]
+    ranks[order] = np.arange(1, len(order) + 1)
+    return ranks
+
+
+def diff_scenarios(bits_a, scores_a, bits_b, scores_b, n):
+    """
+    Compare scenario A (baseline) with scenario B.
+
+    Returns
+    -------
+    DataFrame
+        One row per county: status (1 gained by B, -1 lost, 0 in both, NaN in
+        neither), rank_a, rank_b, rank_change (positive = moved up in B).
+    """
+    gained = np.unpackbits(bits_b & ~bits_a, count=n).astype(bool)
+    lost = np.unpackbits(bits_a & ~bits_b, count=n).astype(bool)
+    both = np.unpackbits(bits_a & bits_b, count=n).astype(bool)
+    status = np.select([gained, lost, both], [1.0, -1.0, 0.0], default=np.nan).astype("float32")
+    rank_a = passing_ranks(np.unpackbits(bits_a, count=n).astype(bool), scores_a)
+    rank_b = passing_ranks(np.unpackbits(bits_b, count=n).astype(bool), scores_b)
+    return pd.DataFrame({"status": status, "rank_a": rank_a, "rank_b": rank_b, "rank_change": rank_a - rank_b})
+
+
+def overlap_matrix(bits, n):
+    """(S, S) counts of counties passing in both scenarios, from one boolean matrix product."""
+    B = np.unpackbits(bits, axis=1, count=n).astype("float32")
+    return (B @ B.T).astype("int64")
@@ -0,0 +1,136 @@
+"""Vectorized thresholding and ranking over the master score frame.
+
+These functions do not touch Streamlit or Plotly, so the app, the API service
+and batch jobs all share them. Every function takes the master frame (or any
+frame with the score columns) and returns plain NumPy arrays aligned with its rows.
+"""
+
+import math
+
+import numpy as np
+
+
+def validate_score_values(values, columns, field="values"):
+    """
+    Check a user-supplied {column: number} mapping (thresholds or weights).
+
+    Every key must be one of `columns` and every value a finite number
+    (bools are rejected). Returns {column: float}; raises ValueError otherwise.
+    """
+    if not isinstance(values, dict):
+        raise ValueError(f"{field} must be an object of {{column: number}}")
+    unknown = [c for c in values if c not in columns]
+    if unknown:
+        raise ValueError(f"unknown score columns: {unknown}")
+    bad = [c for c, v in values.items()
+           if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v)]
+    if bad:
+        raise ValueError(f"{field} values must be finite numbers: {bad}")
+    return {c: float(v) for c, v in values.items()}
+
+
+def threshold_mask(df, thresholds: dict):
+    """
+    Return a boolean array, True where a row passes ALL thresholds.
+    thresholds: {"power_score": 70, "fiber_score": 50, ...}
+    NaN scores never pass.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, min_val in thresholds.items():
+        mask &= df[col].to_numpy(dtype="float32") >= min_val
+    return mask
+
+
+def compile_range_filters(filters: dict):
+    """
+    Compile {column: (lo, hi)} bounds into arrays for range_mask.
+    A None bound is open. Compile once per query, then run on any frame.
+    """
+    cols = list(filters)
+    lo = np.array([-np.inf if filters[c][0] is None else filters[c][0] for c in cols], dtype="float32")
+    hi = np.array([np.inf if filters[c][1] is None else filters[c][1] for c in cols], dtype="float32")
+    return cols, lo, hi
+
+
+def range_mask(df, compiled):
+    """
+    Boolean array, True where every column lies within its compiled [lo, hi].
+    compiled: the output of compile_range_filters. NaN values never pass.
+    """
+    cols, lo, hi = compiled
+    if not cols:
+        return np.ones(len(df), dtype=bool)
+    X = df[cols].to_numpy(dtype="float32")
+    return ((X >= lo) & (X <= hi)).all(axis=1)
+
+
+def weighted_score(df, weights: dict):
+    """
+    Weighted mean of score columns, normalized by the total weight.
+    weights: {"power_score": 3, "fiber_score": 1, ...}
+    Returns float32 scores (NaN where any weighted column is NaN).
+    """
+    total = float(sum(weights.values()))
+    if total <= 0:
+        raise ValueError("weights must sum to a positive value")
+    cols = list(weights)
+    w = np.array([weights[c] for c in cols], dtype="float32") / total
+    return df[cols].to_numpy(dtype="float32") @ w
+
+
+def top_k(scores, k: int, mask=None):
+    """
+    Row positions of the k highest scores, best first.
+    Rows outside `mask` or with NaN scores are never returned.
+    """
+    scores = np.asarray(scores, dtype="float32")
+    eligible = ~np.isnan(scores)
+    if mask is not None:
+        eligible &= mask
+    candidates = np.flatnonzero(eligible)
+    if len(candidates) > k:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def region_mask(df, state_fips):
+    """True for rows whose county lies in one of `state_fips` (2-digit codes); all True if empty."""
+    if not state_fips:
+        return np.ones(len(df), dtype=bool)
+    states = np.array([int(s) for s in state_fips], dtype="int32")
+    return np.isin(df["fips_code"].to_numpy() // 1000, states)
+
+
+def batch_scores(df, thresholds: list, weights: list):
+    """
+    Threshold and score many profiles at once.
+
+    thresholds, weights: one dict per profile (same shape as threshold_mask /
+    weighted_score arguments). Returns (mask, scores), both (profiles, rows):
+    mask is True where a row passes all of that profile's thresholds, scores
+    is the profile's normalized weighted score (NaN where a weighted column is NaN).
+    """
+    cols = sorted({c for t in thresholds for c in t} | {c for w in weights for c in w})
+    index = {c: i for i, c in enumerate(cols)}
+    S = df[cols].to_numpy(dtype="float32")                      # (rows, cols)
+
+    T = np.full((len(thresholds), len(cols)), -np.inf, dtype="float32")
+    for p, t in enumerate(thresholds):
+        for c, v in t.items():
+            T[p, index[c]] = v
+    W = np.zeros((len(weights), len(cols)), dtype="float32")
+    for p, w in enumerate(weights):
+        for c, v in w.items():
+            W[p, index[c]] = v
+    totals = W.sum(axis=1, keepdims=True)
+    if (totals <= 0).any():
+        raise ValueError("weights must sum to a positive value")
+    W /= totals
+
+    # NaN never passes a threshold; -inf marks a column the profile leaves unconstrained
+    mask = ((S[None, :, :] >= T[:, None, :]) | np.isneginf(T)[:, None, :]).all(axis=2)
+    scores = np.nan_to_num(S) @ W.T                             # (rows, profiles)
+    missing = np.isnan(S).astype("float32") @ (W > 0).T.astype("float32")
+    scores[missing > 0] = np.nan
+    return mask, scores.T
@@ -0,0 +1,28 @@
+"""Crash-safe writes for the files cached under data/store.
+
+Every cache is written under a unique temp name next to its final path and
+renamed into place, so a crashed or concurrent writer never leaves a
+truncated file where readers look for it.
+"""
+
+import os
+import uuid
+
+
+def write_atomic(path, write):
+    """
+    Call `write(tmp)` with a unique temp path beside `path`, then rename it to `path`.
+    The temp file is removed if `write` raises.
+    """
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_parquet(df, path, index=False):
+    """DataFrame.to_parquet through write_atomic."""
+    write_atomic(path, lambda tmp: df.to_parquet(tmp, index=index))
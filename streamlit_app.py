@@ -5,13 +5,22 @@ import pandas as pd
 import altair as alt
 import plotly.express as px
 import numpy as np
+import time
+import threading
+from functools import partial
+import os
+import streamlit.components.v1 as components
 
 # Import our custom modules
-from config import CORE_MARKET_FIPS_DICT, PAGE_SETTINGS, ALT_THEME
+from config import CORE_MARKET_FIPS_DICT, PAGE_SETTINGS, ALT_THEME, SCORE_DATA_PATHS, BLOCKGROUP_PATH, LMP_STORE_DIR, LMP_NODE_MAX_KM, LMP_DROP_DIR, TILE_PUBLIC_URL, HEX_LEVELS_KM, SCENARIO_TEAM
 
 from data_processing import (
     load_score_data,
     load_geo_data,
+    county_names,
+    county_centroids,
+    regulations_score,
+    SCORE_COLUMNS,
 )
 
 from requirements_utils import (
@@ -32,9 +41,26 @@ from plotting import (
     get_cmap,
     census_blockgroup_choropleth,
     make_choropleth_threshold,
+    make_zoomed_choropleth,
+    make_hex_choropleth,
+    make_delta_choropleth,
     get_selected_ts, filter_intervals, plot_lmp_map
 )
 
+from scoring import threshold_mask, weighted_score, region_mask, top_k, compile_range_filters
+from requirements_compiler import compile_requirements
+from cost_simulator import price_matrix, node_coordinates, workload_load_profile, simulate_flexible_cost
+from portfolio_optimizer import GRID_OUTAGE_HOURS, optimize_portfolio
+from representative_days import load_representative_days
+from lmp_mapping import load_node_mapping, mapped_sites, mapping_matrix
+from lmp_ingest import read_new_intervals, start_ingest_thread
+from regions import build_region_index
+from vector_tiles import maplibre_vendored, serve_tiles, tileset_path, tile_map_html
+from hexgrid import load_hex_grid, hex_scores, hex_geojson, subset_cells, level_for_zoom
+from export import ranked_frame, export_bytes, county_geometry, with_geometry, EXPORT_FORMATS, EXPORT_MIME
+from profiling import profiling_requested, start_rerun_profile, stop_rerun_profile
+from scenarios import team_slug, make_scenario, save_scenario, load_scenarios, scenario_arrays, diff_scenarios, overlap_matrix
+
 from constraint_utils import (
     render_power_constraints,
     render_land_constraints,
@@ -49,6 +75,10 @@ from constraint_utils import (
 st.set_page_config(**PAGE_SETTINGS)
 alt.themes.enable(ALT_THEME)
 
+# Opt-in whole-rerun profile (DRIFTNET_PROFILE=1 or ?profile=1); written when the rerun ends
+if profiling_requested(st.query_params):
+    start_rerun_profile(st.session_state)
+
 # 2) Load and inject CSS
 with open("style.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
@@ -60,13 +90,21 @@ def get_score_data(
     grid_path: str,
     future_path: str,
     water_path: str,
-    fiber_path: str
+    fiber_path: str,
+    county_geojson_path: str = None,
+    lmp_path: str = None,
+    population_path: str = None,
+    county_scores_path: str = None
 ):
     return load_score_data(
         grid_path=grid_path,
         future_path=future_path,
         water_path=water_path,
-        fiber_path=fiber_path
+        fiber_path=fiber_path,
+        county_geojson_path=county_geojson_path,
+        lmp_path=lmp_path,
+        population_path=population_path,
+        county_scores_path=county_scores_path
     )
 
 @st.cache_data
@@ -80,29 +118,163 @@ def get_geo_data(
     )
 
 @st.cache_data
-def load_lmp(lmp_path: str):
+def load_lmp_history(lmp_path: str):
     # adjust path if needed
     return pd.read_parquet(lmp_path)
 
+@st.cache_resource
+def get_lmp_feed():
+    # Shared by all sessions: the LMP frame so far and the ingest cursor it was
+    # read up to. Polls the drop directory in the background when it exists.
+    if os.path.isdir(LMP_DROP_DIR):
+        start_ingest_thread()
+    return {"frame": None, "cursor": {}, "lock": threading.Lock()}
+
+@st.cache_data(ttl=45)
+def load_lmp(lmp_path: str):
+    # History plus the intervals ingested since the last refresh; only
+    # files past the feed's cursor are read, never the history
+    feed = get_lmp_feed()
+    with feed["lock"]:
+        if feed["frame"] is None:
+            feed["frame"] = load_lmp_history(lmp_path)
+        new, feed["cursor"] = read_new_intervals(feed["cursor"])
+        if len(new):
+            feed["frame"] = pd.concat([feed["frame"], new.drop(columns="iso")], ignore_index=True)
+        return feed["frame"]
+
 # 2) Then use those cached wrappers in your main code
-df_master = get_score_data(
-    grid_path="data/doe_grid_constraints.csv",
-    future_path="data/future_scalability.parquet",
-    water_path="data/county_water_availability_full.csv",
-    fiber_path="data/bdc_us_mobile_broadband_summary_by_geography_D24_27may2025.csv"
-)
+df_master = get_score_data(**SCORE_DATA_PATHS)
 
 blockgroup_gdf, geofips_county_json = get_geo_data(
-    blockgroup_path="data/core_markets_blockgroup.geojson",
+    blockgroup_path=BLOCKGROUP_PATH,
     county_fips_json="data/us_county_fips.json"
 )
 
 df_lmp = load_lmp(lmp_path="data/gridstatus_lmp_samples.parquet")
 
+@st.cache_data
+def get_price_matrix(lmp_path: str):
+    return price_matrix(load_lmp_history(lmp_path))
+
+@st.cache_data
+def get_county_names(_county_geojson):
+    return county_names(_county_geojson).merge(county_centroids(_county_geojson), on="fips")
+
+@st.cache_data
+def get_county_node_map(lmp_path: str):
+    # Highest-weight node of each county's KD-tree mapping (same map that feeds lmp_mean);
+    # counties with no node within LMP_NODE_MAX_KM are absent
+    prices, locations, hours = get_price_matrix(lmp_path)
+    sites = df_county_names[["fips", "lat", "lon"]].rename(columns={"fips": "site_id"})
+    mapping = load_node_mapping(sites, node_coordinates(load_lmp_history(lmp_path), locations), LMP_STORE_DIR, "county")
+    best = mapping.sort_values("weight", ascending=False).drop_duplicates("site_id")
+    return best.set_index("site_id")["node_index"]
+
+@st.cache_resource
+def get_county_prices(lmp_path: str):
+    # Hourly county prices W @ node prices over the same KD-tree mapping; counties
+    # with no node in range are left out. A resource, so the matrix is never copied
+    prices, locations, hours = get_price_matrix(lmp_path)
+    sites = df_county_names[["fips", "lat", "lon"]].rename(columns={"fips": "site_id"})
+    mapping = load_node_mapping(sites, node_coordinates(load_lmp_history(lmp_path), locations), LMP_STORE_DIR, "county")
+    W = mapping_matrix(mapping, len(sites), len(locations))
+    mapped = mapped_sites(W)
+    return np.asarray(W[mapped] @ prices, dtype="float32"), sites["site_id"].to_numpy()[mapped], hours
+
+@st.cache_data
+def get_county_costs(lmp_path: str, power_cap, workload_mix, flex_shares):
+    # Annual cost per county for one set of Requirements answers (about a second uncached)
+    county_prices, fips, hours = get_county_prices(lmp_path)
+    load_mw = workload_load_profile(dict(workload_mix), power_cap, hours)
+    df_cost = simulate_flexible_cost(county_prices, load_mw, dict(flex_shares), capacity_mw=power_cap)
+    return df_cost.assign(fips=fips)
+
+df_county_names = get_county_names(geofips_county_json)
+
+@st.cache_resource
+def get_region_index(fips, _county_geojson):
+    # Shared across reruns and sessions; entries hold geometry subsets, not copies
+    return build_region_index(fips, _county_geojson)
+
+region_index = get_region_index(tuple(df_master["fips"]), geofips_county_json)
+
+# Vector tiles built with `python vector_tiles.py counties|blockgroups ...`
+tilesets = {layer: tileset_path(layer) for layer in ["counties", "blockgroups"] if os.path.exists(tileset_path(layer))}
+
+@st.cache_resource
+def get_tile_server(layers):
+    # One server per process; if the port is taken another app process is already serving
+    try:
+        return serve_tiles({layer: tileset_path(layer) for layer in layers})
+    except OSError:
+        return None
+
+@st.cache_resource
+def get_hex_grid(county_geojson_path: str, lmp_path: str = None):
+    return load_hex_grid(county_geojson_path, lmp_path=lmp_path)
+
+@st.cache_resource
+def get_hex_geojson(county_geojson_path: str, level: int, region=None):
+    # Only the region's cells, so a zoomed fine level ships a small payload
+    cells, cell_map = get_hex_grid(county_geojson_path, SCORE_DATA_PATHS["lmp_path"])[level]
+    if region is not None:
+        cells, _ = subset_cells(cells, cell_map, region_index[region]["bounds"])
+    return hex_geojson(cells, HEX_LEVELS_KM[level])
+
+@st.cache_resource
+def get_county_geometry(county_geojson_path: str):
+    return county_geometry(geofips_county_json)
+
+def export_file(df, fmt, level):
+    # Runs on click; county GeoPackages get their polygons only then
+    if fmt == "gpkg" and level == "counties":
+        df = with_geometry(df, get_county_geometry(SCORE_DATA_PATHS["county_geojson_path"]))
+    return export_bytes(df, fmt, level)
+
+def tile_url(layer):
+    return f"{TILE_PUBLIC_URL.rstrip('/')}/{layer}/{{z}}/{{x}}/{{y}}.pbf"
+
+@st.cache_data
+def get_portfolio(fips, power_cap, workload_mix, generation_sources, storage_technologies,
+                  renewable_perc, cost_importance, reliability_importance, sustainability_importance):
+    # Cached per (county, inputs); each solve runs on the node's clustered representative days.
+    # None when there is nothing to size (no load, or no LMP node in range)
+    if power_cap == 0:
+        return None
+    prices, locations, hours = get_price_matrix("data/gridstatus_lmp_samples.parquet")
+    node_map = get_county_node_map("data/gridstatus_lmp_samples.parquet")
+    if fips not in node_map.index:
+        return None
+    site = df_county_names.set_index("fips").loc[fips]
+    node = int(node_map.loc[fips])
+    reps, rep_errors = load_representative_days("data/gridstatus_lmp_samples.parquet")
+    node_reps = reps[reps["location"] == locations[node]]
+    load_mw = workload_load_profile(dict(workload_mix), power_cap, hours)
+    result = optimize_portfolio(
+        site["lat"], site["lon"], int(fips), prices[node], hours, load_mw,
+        list(generation_sources), list(storage_technologies), renewable_perc,
+        cost_importance, reliability_importance, sustainability_importance,
+        representative_days=(node_reps["day_start"].to_numpy(), node_reps["weight"].to_numpy(dtype=float)),
+    )
+    result["rep_days"] = len(node_reps)
+    result["rep_error_pct"] = float(rep_errors.loc[locations[node], "mean_error_pct"])
+    return result
+
 #######################
 # Define tabs
 maps, requirements, requirments_summary, results = st.tabs(["Map", "Requirements", "Requirements Summary", "Results"])
 
+# Category → constraint panel (each panel reruns on its own as a fragment)
+render_map = {
+    "Power": render_power_constraints,
+    "Land": render_land_constraints,
+    "Climate Factors": render_climate_constraints,
+    "Fiber": render_fiber_constraints,
+    "Future Scalability": render_future_constraints,
+    "Regulations": render_regulatory_constraints,
+}
+
 with maps:
     col = st.columns((1.5, 6.5), gap='medium')
     selected_sub_cat = None
@@ -111,12 +283,41 @@ with maps:
         st.markdown('Visualize data for data center planning')
         #all_categories = ["Water", "Land", "Regulations", "Fiber", "Power"]
         show_core_only = st.checkbox("Show core connectivity markets only", value=False)
+        hex_level = None
         if show_core_only:
             select_core_market = st.selectbox(
                 "Select Core Market",
                 options=list(CORE_MARKET_FIPS_DICT.keys()),
                 index=0  # Default to first option
             )
+        else:
+            # Defaults to the Preferred Region answer from the Requirements tab
+            preferred = st.session_state.get("preferred_region", "None")
+            region_options = [None, *region_index]
+            map_region = st.selectbox(
+                "Map region",
+                options=region_options,
+                index=region_options.index(("preferred", preferred)) if ("preferred", preferred) in region_index else 0,
+                format_func=lambda key: "All US counties" if key is None else region_index[key]["label"],
+            )
+            # Hex grid: "auto" picks the level for the view (national vs region zoom)
+            geometry_options = ["Counties", "Hex grid (auto)", *[f"Hex grid ({km:g} km)" for km in HEX_LEVELS_KM]]
+            map_geometry = st.selectbox("Map geometry", options=geometry_options, index=0)
+            if map_geometry == "Hex grid (auto)":
+                hex_level = level_for_zoom(3.5 if map_region is None else 6.5)
+            elif map_geometry != "Counties":
+                hex_level = geometry_options.index(map_geometry) - 2
+        use_tiles = False
+        if tilesets and not maplibre_vendored():
+            st.caption("Run `python vector_tiles.py vendor` to enable the vector tile map.")
+        elif tilesets:
+            use_tiles = st.checkbox(
+                "Vector tile map",
+                value=False,
+                help="Stream county / block-group geometry as vector tiles and join scores in the browser."
+            )
+            if use_tiles:
+                get_tile_server(tuple(tilesets))
         all_categories = ["Power", "Fiber", "Land", "Regulations", "Climate Factors", "Future Scalability"]
         st.markdown("1) Select categories to filter (you can pick 1–5)")
         selected_cats = st.multiselect(
@@ -126,32 +327,29 @@ with maps:
 
         if not selected_cats:
             st.warning("▶️ Pick at least one category above to continue.")
+            stop_rerun_profile(st.session_state, "stopped")
             st.stop()
 
         # 4b) For each chosen category, ask for a minimum‐score:
         min_thresholds = {}  # e.g. {"Water": 80, "Land": 70, ...}
+        native_filters = {}  # e.g. {"power_hv_dist": (None, 10), "land_slope": (None, 5)}
 
         st.markdown("2) For each selected category, set a minimum score (0–100)")
         show_grid_lmp = False
+        regulatory_weights = None
         for cat in selected_cats:
             col_name = f"{cat.lower()}_score"
             if cat == "Power":
                 show_grid_lmp = st.checkbox("Show Grid LMP", value=False, help="Display the local grid's LMP (Locational Marginal Price) for power costs.")
-            
-            # ADD CATEGORY DESCRIPTIONS
-            render_map = {
-                "Power": render_power_constraints,
-                "Land": render_land_constraints,
-                "Climate Factors": render_climate_constraints,
-                "Fiber": render_fiber_constraints,
-                "Future Scalability": render_future_constraints,
-                "Regulations": render_regulatory_constraints,
-            }
 
             if cat in render_map:
                 cat_res = render_map[cat]()
-                if cat_res and "overall_score" in cat_res:
-                    min_thresholds[col_name] = cat_res["overall_score"]
+                if cat_res:
+                    native_filters.update(cat_res.get("filters", {}))
+                if cat == "Regulations" and cat_res:
+                    regulatory_weights = cat_res["weights"]
+                    # Re-score every county with the user's component weights
+                    df_master["regulations_score"] = regulations_score(df_master, cat_res["weights"])
             
             min_val = st.slider(
                 label=f"Minimum {cat} score",
@@ -169,7 +367,9 @@ with maps:
             index=0
         )
         max_priority_col = f"{max_priority.lower()}_score"
-        df_for_map = filter_master_df(df_master, min_thresholds)
+        df_for_map = filter_master_df(df_master, min_thresholds, compile_range_filters(native_filters))
+        if native_filters:
+            st.caption(f"{int(np.nansum(df_for_map['passes'])):,} counties pass the native-unit filters and minimum scores")
         
         if show_core_only:
             # Set color_val to NaN for non-core counties (they will appear white)
@@ -184,9 +384,94 @@ with maps:
             df_for_map['color_val'] = df_for_map[max_priority_col] * df_for_map['passes']
         cmap = get_cmap(max_priority_col)
 
+        if hex_level is not None:
+            # Thresholds run on the live county scores re-aggregated to uniform cells
+            cells, cell_map = get_hex_grid(SCORE_DATA_PATHS["county_geojson_path"], SCORE_DATA_PATHS["lmp_path"])[hex_level]
+            if map_region is not None:
+                cells, cell_map = subset_cells(cells, cell_map, region_index[map_region]["bounds"])
+            df_hex = filter_master_df(hex_scores(df_master, cells, cell_map, SCORE_COLUMNS), min_thresholds)
+            df_hex["color_val"] = df_hex[max_priority_col] * df_hex["passes"]
+            st.caption(f"{int(np.nansum(df_hex['passes'])):,} of {len(df_hex):,} {HEX_LEVELS_KM[hex_level]:g} km cells pass")
+
+        # Scenarios: snapshot this query as a bitset of passing counties plus the
+        # priority scores, and compare any two as a gained / lost delta map
+        scenario_mask = df_for_map["passes"].notna().to_numpy()
+        if not show_core_only and map_region is not None:
+            in_region = np.zeros(len(df_for_map), dtype=bool)
+            in_region[region_index[map_region]["rows"]] = True
+            scenario_mask = scenario_mask & in_region
+        scenario_scores = df_for_map[max_priority_col].to_numpy()
+        df_delta = None
+        with st.expander("Scenarios"):
+            team = st.text_input("Team", value=SCENARIO_TEAM, key="scenario_team")
+            try:
+                team_slug(team)
+            except ValueError as e:
+                st.warning(f"{e}; using team {SCENARIO_TEAM!r}")
+                team = SCENARIO_TEAM
+            scenario_name = st.text_input("Scenario name", key="scenario_name")
+            if st.button("Save current map", disabled=not scenario_name):
+                save_scenario(team, make_scenario(
+                    scenario_name, scenario_mask, scenario_scores,
+                    {
+                        "thresholds": min_thresholds,
+                        "filters": native_filters,
+                        "regulatory_weights": regulatory_weights,
+                        "priority": max_priority_col,
+                        "region": None if show_core_only else map_region,
+                    },
+                    df_for_map["fips"],
+                ))
+            saved = load_scenarios(team)
+            try:
+                names, bits, scores = scenario_arrays(saved, df_for_map["fips"])
+            except ValueError as e:
+                st.warning(f"{e}; re-save them on the current data")
+                names = []
+            if names:
+                base = st.selectbox("Baseline scenario", options=names)
+                other = st.selectbox("Compare with", options=["Current map", *names])
+                i = names.index(base)
+                if other == "Current map":
+                    bits_b, scores_b = np.packbits(scenario_mask), scenario_scores.astype("float32")
+                else:
+                    j = names.index(other)
+                    bits_b, scores_b = bits[j], scores[j]
+                diff = diff_scenarios(bits[i], scores[i], bits_b, scores_b, len(df_for_map))
+                st.caption(
+                    f"{other}: +{int((diff['status'] == 1).sum()):,} / "
+                    f"-{int((diff['status'] == -1).sum()):,} counties vs {base}"
+                )
+                if st.checkbox("Show delta map", value=False):
+                    df_delta = diff.assign(fips=df_for_map["fips"].astype(str).to_numpy())
+                    movers = df_delta.dropna(subset=["rank_change"])
+                    movers = movers.reindex(movers["rank_change"].abs().sort_values(ascending=False).index)
+                    st.dataframe(movers[["fips", "rank_a", "rank_b", "rank_change"]].head(10), hide_index=True)
+                if len(names) > 1:
+                    st.markdown("Counties passing in both")
+                    st.dataframe(pd.DataFrame(overlap_matrix(bits, len(df_for_map)), index=names, columns=names))
+
     with col[1]:
         st.markdown(f"### {max_priority} Score")
-        if show_core_only:
+        choro = None
+        if df_delta is not None:
+            choro = make_delta_choropleth(df_delta, geofips_county_json, base, other)
+        elif use_tiles and show_core_only and "blockgroups" in tilesets:
+            df_bg = filter_master_df(blockgroup_gdf, min_thresholds)
+            bg_ids = df_bg["GEOID"] if "GEOID" in df_bg.columns else df_bg.index.to_series()
+            choro = tile_map_html(
+                tile_url("blockgroups"), "blockgroups", bg_ids, df_bg[max_priority_col] * df_bg["passes"],
+                colorscale=cmap, center=region_index[("core", select_core_market)]["center"], zoom=9,
+                label=max_priority_col,
+            )
+        elif use_tiles and "counties" in tilesets:
+            region = region_index[map_region] if not show_core_only and map_region is not None else None
+            choro = tile_map_html(
+                tile_url("counties"), "counties", df_for_map["fips"], df_for_map["color_val"],
+                colorscale=cmap, center=region["center"] if region else None, zoom=5.5 if region else 3.5,
+                label=max_priority_col,
+            )
+        elif show_core_only:
             choro = census_blockgroup_choropleth(blockgroup_gdf, max_priority_col, select_core_market, cmap, min_thresholds, CORE_MARKET_FIPS_DICT)
         elif show_grid_lmp == True:
             selected_date = st.date_input("Date", value=pd.to_datetime("2023-06-01").date())
@@ -201,9 +486,43 @@ with maps:
                     hourly,
                     title=f"LMPs at {selected_ts.isoformat()}"
                 )
+        elif hex_level is not None:
+            choro = make_hex_choropleth(
+                df_hex, max_priority_col, get_hex_geojson(SCORE_DATA_PATHS["county_geojson_path"], hex_level, map_region), cmap,
+                region=region_index[map_region] if map_region is not None else None,
+            )
+        elif map_region is not None:
+            choro = make_zoomed_choropleth(df_for_map, max_priority_col, region_index[map_region], cmap)
         else:
             choro = make_choropleth_threshold(df_for_map, max_priority_col, geofips_county_json, cmap)
-        st.plotly_chart(choro, use_container_width=True)
+        if isinstance(choro, str):
+            components.html(choro, height=520)
+        elif choro is not None:
+            st.plotly_chart(choro, use_container_width=True)
+
+        with st.expander("Export results"):
+            # Snapshot of the passing, ranked rows; files are built only when a button is clicked
+            if show_core_only:
+                export_level = "blockgroups"
+                export_df = ranked_frame(
+                    filter_master_df(blockgroup_gdf[blockgroup_gdf["statecounty_fips"].isin(CORE_MARKET_FIPS_DICT[select_core_market])].copy(), min_thresholds),
+                    max_priority_col,
+                )
+            else:
+                export_level = "counties"
+                # Rank within the region, so a region export runs 1..n
+                in_scope = df_for_map if map_region is None else df_for_map[df_for_map["fips"].isin(region_index[map_region]["fips"])]
+                export_df = ranked_frame(in_scope, max_priority_col)
+            st.caption(f"{len(export_df):,} {export_level} ranked by {max_priority_col}")
+            export_cols = st.columns(len(EXPORT_FORMATS))
+            for export_col, fmt in zip(export_cols, EXPORT_FORMATS):
+                export_col.download_button(
+                    fmt.upper(),
+                    data=partial(export_file, export_df, fmt, export_level),
+                    file_name=f"{export_level}_{max_priority_col.replace(' ', '_')}.{fmt}",
+                    mime=EXPORT_MIME[fmt],
+                    key=f"export_{fmt}",
+                )
 
 with requirements:
     st.header("Requirements")
@@ -250,20 +569,87 @@ with requirments_summary:
 with results:
     st.header("Performance Metrics")
 
+    # Compile the Requirements answers into a county query and run it
+    query_start = time.perf_counter()
+    query = compile_requirements({
+        "region": region,
+        "power_cap": power_cap,
+        "redundancy": redundancy,
+        "cooling_method": cooling_method,
+        "water_constraints": water_constraints,
+        "land_constraints": land_constraints,
+        "cost_importance": cost_importance,
+        "reliability_importance": reliability_importance,
+        "sustainability_importance": sustainability_importance,
+        "network_latency": network_latency,
+        "proximity": proximity,
+    })
+    req_mask = threshold_mask(df_master, query["thresholds"]) & region_mask(df_master, query["states"])
+    req_score = weighted_score(df_master, query["weights"])
+    best_rows = top_k(req_score, 10, req_mask)
+    query_ms = (time.perf_counter() - query_start) * 1000
+
     # --- Show three key metrics side by side ---
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric(label="Time Saved", value="8 months")
-        st.caption("Estimated time saved in development and deployment")
+        st.metric(label="Counties Meeting Requirements", value=f"{int(req_mask.sum()):,}")
+        st.caption(f"Out of {len(df_master):,} counties")
 
     with col2:
-        st.metric(label="Lifetime Cost Savings", value="$42.7 M")
-        st.caption("Projected cost savings over 10-year lifetime")
+        best_score = f"{req_score[best_rows[0]]:.1f}" if len(best_rows) else "–"
+        st.metric(label="Best Match Score", value=best_score)
+        st.caption("Weighted score of the top-ranked county (0–100)")
 
     with col3:
-        st.metric(label="Reliability", value="99.99 %")
-        st.caption("Projected uptime based on location and infrastructure")
-
+        st.metric(label="Query Time", value=f"{query_ms:.1f} ms")
+        st.caption("Compile, filter and rank across all counties")
+
+    st.subheader("Top Matching Counties")
+    if len(best_rows):
+        df_best = df_master.iloc[best_rows][["fips", "power_score", "fiber_score", "climate factors_score", "land_score"]]
+        df_best = df_best.assign(fips=df_best["fips"].astype(str), score=req_score[best_rows])
+        df_best = df_best.merge(df_county_names, on="fips", how="left")
+        st.dataframe(df_best[["county", "state", "fips", "score", "power_score", "fiber_score", "climate factors_score", "land_score"]],
+                     hide_index=True, use_container_width=True)
+    else:
+        st.warning("No counties meet the current requirements. Try relaxing the site constraints or region.")
+
+    with st.expander("Compiled thresholds and weights"):
+        st.json(query)
+
+    st.markdown("---")
+
+    # ------------------------------
+    # Energy Cost & Load Flexibility
+    # ------------------------------
+    st.subheader("Annual Energy Cost with Workload Flexibility")
+    df_cost = get_county_costs(
+        "data/gridstatus_lmp_samples.parquet",
+        power_cap,
+        (("ai_ml", ai_ml_pct), ("databases", databases_pct),
+         ("web_services", web_services_pct), ("media_streaming", media_streaming_pct)),
+        (("inflexible", inflexible_pct), ("short_term", short_term_pct),
+         ("medium_term", medium_term_pct), ("long_term", long_term_pct)),
+    )
+    # Counties meeting the requirements, or every priced county when none do
+    req_fips = df_master["fips"].astype(str).to_numpy()[req_mask]
+    if df_cost["fips"].isin(req_fips).any():
+        df_cost = df_cost[df_cost["fips"].isin(req_fips)]
+    df_cost = df_cost.merge(df_county_names[["fips", "county", "state"]], on="fips", how="left")
+
+    col_c1, col_c2, col_c3 = st.columns(3)
+    with col_c1:
+        st.metric(label="Median Cost (no shifting)", value=f"${df_cost['baseline_cost'].median() / 1e6:.2f} M/yr")
+    with col_c2:
+        st.metric(label="Median Cost (flexible)", value=f"${df_cost['shifted_cost'].median() / 1e6:.2f} M/yr")
+    with col_c3:
+        st.metric(label="Median Savings", value=f"{df_cost['savings_pct'].median():.1f} %")
+        st.caption("From shifting flexible load within its window")
+    st.caption(f"Per county over {len(df_cost):,} counties, priced from their nearest LMP nodes")
+    st.dataframe(
+        df_cost[["county", "state", "fips", "baseline_cost", "shifted_cost", "savings_pct"]].sort_values("shifted_cost"),
+        hide_index=True, use_container_width=True,
+    )
 
     st.markdown("---")  # horizontal rule to separate sections
 
@@ -272,58 +658,97 @@ with results:
     # ---------------------
     st.subheader("Generation and Storage Mix")
 
-    # 1) Build two small DataFrames for the pie charts
-    gen_data = pd.DataFrame({
-        "Source": ["Solar", "Wind", "Hydro", "Geothermal", "Nuclear"],
-        "Percentage": [45, 35, 10, 5, 5]
-    })
-
-    storage_data = pd.DataFrame({
-        "Storage Type": ["Battery Storage", "Pumped Hydro", "Hydrogen", "Thermal Storage"],
-        "Percentage": [60, 20, 10, 10]
-    })
-
-    # 2) Create pie charts with Plotly Express
-    fig_gen = px.pie(
-        gen_data,
-        names="Source",
-        values="Percentage",
-        title="Generation Mix",
-        hole=0.3  # optional: makes it a donut chart instead of a full pie
+    if len(best_rows):
+        site_options = df_best["fips"].tolist()
+        site_labels = dict(zip(df_best["fips"], df_best["county"].fillna("") + ", " + df_best["state"].fillna("")))
+    else:
+        site_options = df_master["fips"].astype(str).tolist()
+        site_labels = dict(zip(df_county_names["fips"], df_county_names["county"] + ", " + df_county_names["state"]))
+    site_fips = st.selectbox(
+        "Site to optimize",
+        options=site_options,
+        format_func=lambda f: f"{site_labels.get(f, f)} ({f})",
     )
-    fig_storage = px.pie(
-        storage_data,
-        names="Storage Type",
-        values="Percentage",
-        title="Storage Systems",
-        hole=0.3
+    portfolio = get_portfolio(
+        site_fips,
+        power_cap,
+        (("ai_ml", ai_ml_pct), ("databases", databases_pct),
+         ("web_services", web_services_pct), ("media_streaming", media_streaming_pct)),
+        tuple(generation_sources),
+        tuple(storage_technologies),
+        renewable_perc,
+        cost_importance,
+        reliability_importance,
+        sustainability_importance,
     )
 
-    # 3) Display them side by side
-    col4, col5 = st.columns(2)
-    with col4:
-        st.plotly_chart(fig_gen, use_container_width=True)
-    with col5:
-        st.plotly_chart(fig_storage, use_container_width=True)
-
-
-    st.markdown("---")  # separate again
-
-    # ----------------------
-    # System Characteristics
-    # ----------------------
-    st.subheader("System Characteristics")
-
-    # We can show each as a small metric
-    col6, col7, col8 = st.columns(3)
-    with col6:
-        st.metric(label="Reliability", value="99.99 %")
-    with col7:
-        st.metric(label="Cost Efficiency", value="$0.052 / kWh")
-        st.caption("Levelized cost per kWh")
-    with col8:
-        st.metric(label="Renewable %", value="95 %")
-        st.caption("Of total generation")
-
-    # If you also want to show “Annual uptime” as text under the metrics:
-    st.markdown("*Annual uptime based on projected operations and maintenance assumptions*")
\ No newline at end of file
+    if power_cap == 0:
+        st.info("Set a power capacity above 0 MW on the Requirements tab to size a portfolio.")
+    elif portfolio is None:
+        st.info(f"No LMP node within {LMP_NODE_MAX_KM:,} km of this county, so there are no grid prices "
+                "to size a portfolio against.")
+    elif portfolio["status"] != "optimal":
+        st.error(f"No feasible portfolio: {portfolio['status']}. Try allowing more generation sources "
+                 "or lowering the renewable target.")
+    else:
+        # 1) Build two small DataFrames for the pie charts
+        gen_data = pd.DataFrame({
+            "Source": list(portfolio["generation"]),
+            "MWh/yr": [max(v, 0) for v in portfolio["generation"].values()],
+        })
+
+        storage_data = pd.DataFrame({
+            "Storage Type": list(portfolio["storage_power_mw"]),
+            "MW": [max(v, 0) for v in portfolio["storage_power_mw"].values()],
+        })
+
+        # 2) Create pie charts with Plotly Express
+        fig_gen = px.pie(
+            gen_data,
+            names="Source",
+            values="MWh/yr",
+            title="Generation Mix",
+            hole=0.3  # optional: makes it a donut chart instead of a full pie
+        )
+        fig_storage = px.pie(
+            storage_data,
+            names="Storage Type",
+            values="MW",
+            title="Storage Systems (MW)",
+            hole=0.3
+        )
+
+        # 3) Display them side by side
+        col4, col5 = st.columns(2)
+        with col4:
+            st.plotly_chart(fig_gen, use_container_width=True)
+        with col5:
+            if storage_data["MW"].sum() > 0:
+                st.plotly_chart(fig_storage, use_container_width=True)
+            else:
+                st.info("The optimizer builds no storage for these inputs.")
+
+
+        st.markdown("---")  # separate again
+
+        # ----------------------
+        # System Characteristics
+        # ----------------------
+        st.subheader("System Characteristics")
+
+        # We can show each as a small metric
+        col6, col7, col8 = st.columns(3)
+        with col6:
+            st.metric(label="Reliability", value=f"{portfolio['reliability_pct']:.2f} %")
+            st.caption(f"Share of load served, through a {GRID_OUTAGE_HOURS} h grid outage")
+        with col7:
+            st.metric(label="Cost Efficiency", value=f"${portfolio['cost_per_kwh']:.3f} / kWh")
+            st.caption("Levelized cost per kWh")
+        with col8:
+            st.metric(label="Renewable %", value=f"{portfolio['renewable_pct']:.0f} %")
+            st.caption("Of total load")
+
+        st.markdown(f"*Hourly dispatch optimized over {portfolio['rep_days']} representative days of grid prices "
+                    f"(annual mean price error {portfolio['rep_error_pct']:+.1f} %)*")
+
+stop_rerun_profile(st.session_state)
@@ -0,0 +1,98 @@
+"""Multi-year trend metrics per region (population history, LMP rollups).
+
+Series arrive in long form (region, period, value) and are pivoted once into
+a regions x periods matrix; growth, CAGR and volatility are then computed for
+every region at once with array operations over that matrix, never a loop
+per region. Gaps are allowed: each region's growth runs from its first to
+its last observed period.
+
+    python trends.py data/us-population-2010-2019-reshaped.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def series_matrix(df, region_col, period_col, value_col):
+    """
+    Pivot a long-form series to a dense matrix.
+
+    Returns
+    -------
+    tuple
+        (region labels, sorted periods, float64 matrix (regions, periods);
+        NaN where a region has no value for a period).
+    """
+    wide = df.pivot_table(index=region_col, columns=period_col, values=value_col, aggfunc="mean")
+    wide = wide.sort_index(axis=1)
+    return wide.index.to_numpy(), wide.columns.to_numpy(), wide.to_numpy(dtype="float64")
+
+
+def trend_metrics(values, periods):
+    """
+    Growth statistics for each row of a (regions, periods) matrix.
+
+    Parameters
+    ----------
+    values : ndarray
+        Positive series values, NaN for gaps.
+    periods : ndarray
+        Period of each column in years (e.g. 2010 ... 2019).
+
+    Returns
+    -------
+    DataFrame
+        growth (total fractional change first -> last observation),
+        cagr (compound annual rate), volatility (std of year-over-year log
+        changes), n_periods (observations); one row per region.
+    """
+    values = np.where(values > 0, values, np.nan)
+    periods = np.asarray(periods, dtype="float64")
+    observed = ~np.isnan(values)
+    n_periods = observed.sum(axis=1)
+    rows = np.arange(len(values))
+
+    first = observed.argmax(axis=1)
+    last = values.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)
+    v0, v1 = values[rows, first], values[rows, last]
+    span = periods[last] - periods[first]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = v1 / v0 - 1
+        cagr = np.where(span > 0, (v1 / v0) ** (1 / span) - 1, np.nan)
+        # Log changes per year between adjacent columns (gaps leave NaN)
+        log_changes = np.diff(np.log(values), axis=1) / np.diff(periods)
+    enough = np.isfinite(log_changes).sum(axis=1) >= 2
+    volatility = np.full(len(values), np.nan)
+    if enough.any():
+        volatility[enough] = np.nanstd(log_changes[enough], axis=1, ddof=1)
+    return pd.DataFrame({
+        "growth": growth,
+        "cagr": cagr,
+        "volatility": volatility,
+        "n_periods": n_periods,
+    })
+
+
+def region_trends(df, region_col, period_col, value_col):
+    """trend_metrics for a long-form series, indexed by region."""
+    regions, periods, values = series_matrix(df, region_col, period_col, value_col)
+    return trend_metrics(values, periods).set_index(pd.Index(regions, name=region_col))
+
+
+def read_state_population(path):
+    """Long-form state population history (state_fips, year, population) from the reshaped CSV."""
+    df = pd.read_csv(path, usecols=["id", "year", "population"])
+    return pd.DataFrame({
+        "state_fips": df["id"].astype(int).map("{:02d}".format),
+        "year": df["year"].astype(int),
+        "population": df["population"].astype("float64"),
+    })
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/us-population-2010-2019-reshaped.csv"
+    trends = region_trends(read_state_population(path), "state_fips", "year", "population")
+    print(trends.sort_values("cagr", ascending=False).round(4).to_string())
@@ -0,0 +1,375 @@
+"""Mapbox Vector Tile pipeline for county and block-group geometry.
+
+Geometry is cut into MVT tiles once and stored as MBTiles (SQLite) under
+TILE_STORE_DIR; tiles carry only the feature id (county FIPS or block-group
+GEOID). A small threaded HTTP server serves them as /{layer}/{z}/{x}/{y}.pbf
+on TILE_SERVER (browsers reach it through TILE_PUBLIC_URL), together with
+the vendored MapLibre GL JS under /static/, and `tile_map_html` renders a
+MapLibre map that joins live scores to the tiles on the client with
+setFeatureState, keyed by that id. The browser only downloads the tiles in
+view, so national block-group maps stay light: the per-rerun payload is the
+score vector, not the geometry.
+
+Vendor MapLibre once and build tiles from the command line, e.g.
+
+    python vector_tiles.py vendor
+    python vector_tiles.py counties data/us_county_fips.json
+    python vector_tiles.py blockgroups data/core_markets_blockgroup.geojson --id-col GEOID
+
+`vendor` downloads the pinned MAPLIBRE_VERSION, or copies it from a local
+package with --source node_modules/maplibre-gl/dist on an offline host.
+"""
+
+import gzip
+import json
+import math
+import os
+import shutil
+import sqlite3
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import geopandas as gpd
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from plotly.colors import sample_colorscale
+
+from config import MAPLIBRE_DIR, MAPLIBRE_VERSION, TILE_PUBLIC_URL, TILE_SERVER, TILE_STORE_DIR
+from storage import write_atomic
+
+WEB_MERCATOR_HALF = 20037508.342789244
+TILE_EXTENT = 4096
+
+# Vendored MapLibre files served at /static/{name}
+STATIC_FILES = {
+    "maplibre-gl.js": "application/javascript",
+    "maplibre-gl.css": "text/css",
+}
+
+
+def tile_bounds(z, x, y):
+    """Web Mercator (EPSG:3857) bounds of XYZ tile z/x/y."""
+    size = 2 * WEB_MERCATOR_HALF / 2 ** z
+    minx = -WEB_MERCATOR_HALF + x * size
+    maxy = WEB_MERCATOR_HALF - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_range(bounds, z):
+    """Inclusive (x0, y0, x1, y1) XYZ tile range covering 3857 `bounds` at zoom z."""
+    size = 2 * WEB_MERCATOR_HALF / 2 ** z
+    minx, miny, maxx, maxy = bounds
+    clamp = lambda v: min(max(int(v), 0), 2 ** z - 1)
+    return (
+        clamp((minx + WEB_MERCATOR_HALF) / size),
+        clamp((WEB_MERCATOR_HALF - maxy) / size),
+        clamp((maxx + WEB_MERCATOR_HALF) / size),
+        clamp((WEB_MERCATOR_HALF - miny) / size),
+    )
+
+
+def _encode_tile(geoms, ids, bounds, layer):
+    """Clip, simplify and encode the candidate geometries of one tile; None if empty."""
+    minx, miny, maxx, maxy = bounds
+    pad = (maxx - minx) / 64
+    clipped = shapely.clip_by_rect(geoms, minx - pad, miny - pad, maxx + pad, maxy + pad)
+    # Tolerance of one tile-grid unit at this zoom; finer detail is invisible
+    clipped = shapely.simplify(clipped, (maxx - minx) / TILE_EXTENT, preserve_topology=True)
+    keep = ~shapely.is_empty(clipped)
+    if not keep.any():
+        return None
+    features = [
+        {"geometry": g.wkb, "properties": {"id": i}}
+        for g, i in zip(clipped[keep], ids[keep])
+    ]
+    data = mapbox_vector_tile.encode(
+        [{"name": layer, "features": features}],
+        default_options={"quantize_bounds": bounds, "extents": TILE_EXTENT, "y_coord_down": False},
+    )
+    return gzip.compress(data)
+
+
+def build_mbtiles(gdf, path, layer, id_col, minzoom=2, maxzoom=10):
+    """
+    Write `gdf` polygons as an MBTiles file of gzipped MVT tiles.
+
+    Parameters
+    ----------
+    gdf : GeoDataFrame
+        Polygons in any CRS; projected to Web Mercator here.
+    path : str
+        Output .mbtiles path (replaced if it exists).
+    layer : str
+        Vector layer name inside each tile.
+    id_col : str
+        Column holding the join key (FIPS / GEOID); stored as the `id` property.
+    minzoom, maxzoom : int
+        Zoom levels to generate.
+
+    Returns
+    -------
+    int
+        Number of tiles written.
+    """
+    gdf = gdf.to_crs(epsg=3857)
+    geoms = gdf.geometry.to_numpy()
+    ids = gdf[id_col].astype(str).to_numpy()
+    tree = shapely.STRtree(geoms)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE metadata (name TEXT, value TEXT);
+        CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row);
+    """)
+
+    lon_lat = gdf.to_crs(epsg=4326).total_bounds
+    con.executemany("INSERT INTO metadata VALUES (?, ?)", [
+        ("name", layer),
+        ("format", "pbf"),
+        ("minzoom", str(minzoom)),
+        ("maxzoom", str(maxzoom)),
+        ("bounds", ",".join(f"{v:.6f}" for v in lon_lat)),
+        ("json", json.dumps({"vector_layers": [{"id": layer, "fields": {"id": "String"}}]})),
+    ])
+
+    n_tiles = 0
+    for z in range(minzoom, maxzoom + 1):
+        x0, y0, x1, y1 = tile_range(gdf.total_bounds, z)
+        rows = []
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                bounds = tile_bounds(z, x, y)
+                hits = tree.query(shapely.box(*bounds))
+                if len(hits) == 0:
+                    continue
+                tile = _encode_tile(geoms[hits], ids[hits], bounds, layer)
+                if tile is not None:
+                    # MBTiles rows are TMS: y counts from the bottom
+                    rows.append((z, x, 2 ** z - 1 - y, tile))
+        con.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)", rows)
+        con.commit()
+        n_tiles += len(rows)
+    con.close()
+    return n_tiles
+
+
+def tileset_path(layer, store_dir=TILE_STORE_DIR):
+    return os.path.join(store_dir, f"{layer}.mbtiles")
+
+
+def tileset_zooms(path):
+    """(minzoom, maxzoom) from an MBTiles file's metadata."""
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    meta = dict(con.execute("SELECT name, value FROM metadata WHERE name IN ('minzoom', 'maxzoom')"))
+    con.close()
+    return int(meta["minzoom"]), int(meta["maxzoom"])
+
+
+def vendor_maplibre(version=MAPLIBRE_VERSION, out_dir=MAPLIBRE_DIR, source=None):
+    """
+    Put the MapLibre GL JS / CSS dist files in `out_dir`.
+
+    Copies them from a local `source` directory (e.g. an npm package's
+    dist/) when given, otherwise downloads the pinned `version` once.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for name in STATIC_FILES:
+        path = os.path.join(out_dir, name)
+        if source is not None:
+            write_atomic(path, lambda tmp: shutil.copyfile(os.path.join(source, name), tmp))
+        else:
+            url = f"https://unpkg.com/maplibre-gl@{version}/dist/{name}"
+            with urllib.request.urlopen(url, timeout=60) as resp:
+                body = resp.read()
+            write_atomic(path, lambda tmp: _write_bytes(tmp, body))
+    return out_dir
+
+
+def _write_bytes(path, body):
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def maplibre_vendored(static_dir=MAPLIBRE_DIR):
+    return all(os.path.exists(os.path.join(static_dir, name)) for name in STATIC_FILES)
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+    tilesets = {}
+    zooms = {}
+    static_dir = MAPLIBRE_DIR
+    _local = threading.local()
+
+    def _connection(self, layer):
+        # One read-only SQLite connection per server thread and tileset
+        if not hasattr(self._local, "cons"):
+            self._local.cons = {}
+        cons = self._local.cons
+        if layer not in cons:
+            cons[layer] = sqlite3.connect(f"file:{self.tilesets[layer]}?mode=ro", uri=True)
+        return cons[layer]
+
+    def _send_static(self, name):
+        path = os.path.join(self.static_dir, name)
+        if name not in STATIC_FILES or not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", STATIC_FILES[name])
+        self.send_header("Cache-Control", "max-age=86400")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "static":
+            self._send_static(parts[1])
+            return
+        if len(parts) != 4 or parts[0] not in self.tilesets or not parts[3].endswith(".pbf"):
+            self.send_error(404)
+            return
+        try:
+            z, x, y = int(parts[1]), int(parts[2]), int(parts[3][:-4])
+        except ValueError:
+            self.send_error(404)
+            return
+        minzoom, maxzoom = self.zooms[parts[0]]
+        if not (minzoom <= z <= maxzoom and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            self.send_error(404)
+            return
+        row = self._connection(parts[0]).execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (z, x, 2 ** z - 1 - y),
+        ).fetchone()
+        if row is None:
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Cache-Control", "max-age=3600")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Content-Length", str(len(row[0])))
+        self.end_headers()
+        self.wfile.write(row[0])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_tiles(tilesets: dict, host=TILE_SERVER["host"], port=TILE_SERVER["port"], static_dir=MAPLIBRE_DIR):
+    """
+    Serve {layer: mbtiles path} at http://host:port/{layer}/{z}/{x}/{y}.pbf,
+    and the MapLibre files in `static_dir` at /static/{name}, from a daemon
+    thread. Returns the server (call .shutdown() to stop).
+    """
+    handler = type("TileHandler", (_TileHandler,), {
+        "tilesets": dict(tilesets),
+        "static_dir": static_dir,
+        "zooms": {layer: tileset_zooms(path) for layer, path in tilesets.items()},
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def tile_map_html(tile_url, layer, ids, values, colorscale="Viridis", center=None, zoom=3.5,
+                  label="score", height=500, static_url=None):
+    """
+    MapLibre GL page that colors vector-tile features by joined scores.
+
+    ids / values are aligned arrays (FIPS or GEOID strings, 0–100 scores; NaN
+    is drawn transparent). They are shipped once as two JSON arrays and set
+    on the features with setFeatureState, so geometry never leaves the tiles.
+    MapLibre itself loads from the tile server's /static/ (or `static_url`).
+    """
+    static_url = (static_url or f"{TILE_PUBLIC_URL.rstrip('/')}/static").rstrip("/")
+    center = center or {"lat": 39.5, "lon": -98.35}
+    values = np.asarray(values, dtype="float64")
+    stops = []
+    for pos, color in zip(np.linspace(0, 100, 6), sample_colorscale(colorscale, np.linspace(0, 1, 6))):
+        stops += [float(pos), color]
+    payload = json.dumps({
+        "ids": [str(i) for i in ids],
+        "values": [None if math.isnan(v) else round(v, 2) for v in values],
+    })
+    return f"""
+<div id="map" style="height:{height}px;"></div>
+<link href="{static_url}/maplibre-gl.css" rel="stylesheet" />
+<script src="{static_url}/maplibre-gl.js"></script>
+<script>
+const data = {payload};
+const map = new maplibregl.Map({{
+  container: "map",
+  style: {{version: 8, sources: {{}}, layers: [{{id: "bg", type: "background", paint: {{"background-color": "#f4f4f4"}}}}]}},
+  center: [{center["lon"]}, {center["lat"]}],
+  zoom: {zoom},
+}});
+map.on("load", () => {{
+  map.addSource("tiles", {{type: "vector", tiles: ["{tile_url}"], promoteId: {{"{layer}": "id"}}}});
+  map.addLayer({{
+    id: "fill", type: "fill", source: "tiles", "source-layer": "{layer}",
+    paint: {{
+      "fill-color": ["interpolate", ["linear"], ["coalesce", ["feature-state", "score"], 0], {json.dumps(stops)[1:-1]}],
+      "fill-opacity": ["case", ["==", ["feature-state", "score"], null], 0, 0.75],
+    }},
+  }});
+  map.addLayer({{id: "line", type: "line", source: "tiles", "source-layer": "{layer}",
+                 paint: {{"line-color": "#888", "line-width": 0.2}}}});
+  data.ids.forEach((id, i) => {{
+    if (data.values[i] !== null)
+      map.setFeatureState({{source: "tiles", sourceLayer: "{layer}", id: id}}, {{score: data.values[i]}});
+  }});
+  map.on("click", "fill", (e) => {{
+    const f = e.features[0];
+    new maplibregl.Popup().setLngLat(e.lngLat)
+      .setHTML(`${{f.id}}: {label} ${{f.state.score ?? "n/a"}}`).addTo(map);
+  }});
+}});
+</script>
+"""
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build MBTiles vector tiles for the map.")
+    sub = parser.add_subparsers(dest="layer", required=True)
+    vendor = sub.add_parser("vendor", help=f"Vendor MapLibre GL JS {MAPLIBRE_VERSION} into {MAPLIBRE_DIR}")
+    vendor.add_argument("--source", default=None, help="Copy from this dist/ directory instead of downloading")
+    for layer in ["counties", "blockgroups"]:
+        build = sub.add_parser(layer, help=f"Build {layer} tiles")
+        build.add_argument("path", help="County FIPS GeoJSON or block-group GeoJSON")
+        build.add_argument("--id-col", default=None, help="Join key column (default: feature id / GEOID)")
+        build.add_argument("--minzoom", type=int, default=2)
+        build.add_argument("--maxzoom", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.layer == "vendor":
+        print(f"MapLibre GL JS -> {vendor_maplibre(source=args.source)}")
+        raise SystemExit
+
+    gdf = gpd.read_file(args.path)
+    if args.layer == "counties":
+        id_col = args.id_col or "fips"
+        if id_col not in gdf.columns:
+            with open(args.path) as f:
+                gdf[id_col] = [feat["id"] for feat in json.load(f)["features"]]
+        maxzoom = args.maxzoom or 9
+    else:
+        id_col = args.id_col or "GEOID"
+        maxzoom = args.maxzoom or 12
+    n = build_mbtiles(gdf, tileset_path(args.layer), args.layer, id_col, args.minzoom, maxzoom)
+    print(f"{n} tiles -> {tileset_path(args.layer)}")